@@ -1,4 +1,10 @@
-from flask import Flask, request, jsonify
+# Startup timing must be installed before anything else is imported
+from utils.config import STARTUP_TIMING
+from utils.startup import install_import_timer, uninstall_import_timer, get_startup_report
+if STARTUP_TIMING:
+    install_import_timer()
+
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
 
 # Core feature handlers
@@ -11,37 +17,124 @@ from services.db_service import (
     get_chat_history, 
     get_chat_sessions, 
     get_chat_by_id,
-    delete_chat_session
+    delete_chat_session,
+    get_report_by_id,
+    get_chat_sessions_version,
+    get_chat_version,
+    get_chat_history_version,
+    get_user_reports_version
 )
 
 # Auth
 from routes.auth_routes import auth_bp, token_required, verify_token
 from routes.otp_routes import otp_bp
 
+# Retry-safe POSTs
+from services.idempotency_service import idempotent
+
+# 304s and compression for the history endpoints
+from services.http_cache_service import conditional, init_compression
+
+# Logging, metrics and profiling
+from utils.log import get_logger, init_request_ids
+from utils.json_provider import init_json
+from services.metrics_service import init_metrics
+from services.profiling_service import init_profiling
+from services.capture_service import init_capture
+
+# Deferred initialization
+from services.startup_service import warm_up, start_background_warm_up, get_readiness
+from utils.config import READY_WARM_UP_AT_IMPORT
+
+# Admission control
+from services.rate_limit_service import admission_control, token_bucket, trial_ip, authenticated_user_id
+from utils.config import RATE_LIMIT_CHAT_TRIAL_IP, RATE_LIMIT_CHAT_USER
+
+# Trial users are limited per IP, logged-in users per account
+LLM_RATE_LIMITS = (
+    token_bucket("llm_trial_ip", RATE_LIMIT_CHAT_TRIAL_IP, trial_ip),
+    token_bucket("llm_user", RATE_LIMIT_CHAT_USER, authenticated_user_id)
+)
+
+logger = get_logger(__name__)
+
 app = Flask(__name__)
 CORS(app)
 
+# orjson for jsonify and request bodies; encodes ObjectId/datetime/bytes directly
+init_json(app)
+
 # Register authentication blueprint
 app.register_blueprint(auth_bp)
 app.register_blueprint(otp_bp)
 
+# X-Request-ID on every request, attached to all log records
+init_request_ids(app)
+
+# Per-route latency and in-flight metrics for every route, served at /metrics
+init_metrics(app)
+
+# gzip/brotli JSON bodies (installs nothing unless COMPRESSION_ENABLED).
+# Registered after metrics so the timing includes it, before capture so
+# capture still reads plain JSON (after_request hooks run in reverse order).
+init_compression(app)
+
+# On-demand request profiling (installs nothing unless PROFILING_ENABLED)
+init_profiling(app)
+
+# Sanitized traffic capture for replay (installs nothing unless CAPTURE_ENABLED)
+init_capture(app)
+
+# Initialize components listed in WARM_UP_ON_START (everything else loads on first use)
+warm_up()
+if READY_WARM_UP_AT_IMPORT:
+    start_background_warm_up()
+if STARTUP_TIMING:
+    uninstall_import_timer()
+
+
+def get_request_user_id():
+    """User ID from an optional Bearer token ("trial_user" for unauthenticated requests)"""
+    token = request.headers.get("Authorization")
+    if token and token.startswith("Bearer "):
+        user_data = verify_token(token.split(" ")[1])
+        if user_data:
+            return user_data["user_id"]
+    return "trial_user"
+
+
 # -------------------- HEALTH CHECK --------------------
 @app.route("/")
 def health():
     return {"status": "AgriGPT Backend Running 🌾"}
 
+# -------------------- LLM ROUTING STATS --------------------
+@app.route("/api/llm/stats", methods=["GET"])
+def llm_stats():
+    """Per-route model routing, latency and cost counters (for this worker)"""
+    from services.llm_service import get_routing_stats
+    return jsonify(get_routing_stats())
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness probe: 200 once this worker's READY_COMPONENTS are warm, else 503"""
+    readiness = get_readiness()
+    return jsonify(readiness), 200 if readiness["ready"] else 503
+
+
+@app.route("/api/startup", methods=["GET"])
+def startup_report():
+    """Import (with STARTUP_TIMING=true) and warm-up times for this worker"""
+    return jsonify(get_startup_report())
+
 # -------------------- CHAT API --------------------
 @app.route("/api/chat", methods=["POST"])
+@admission_control(*LLM_RATE_LIMITS)
+@idempotent(get_request_user_id)
 def chat_api():
     try:
-        token = request.headers.get("Authorization")
-        user_id = "trial_user"  # default for unauthenticated users
-
-        if token and token.startswith("Bearer "):
-            token_str = token.split(" ")[1]
-            user_data = verify_token(token_str)
-            if user_data:
-                user_id = user_data["user_id"]
+        user_id = get_request_user_id()
 
         data = request.json
         message = data.get("message")
@@ -54,13 +147,14 @@ def chat_api():
         return jsonify(result)
 
     except Exception as e:
-        print(f"❌ Error in chat_api: {str(e)}")
+        logger.error("Error in chat_api: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 
 # -------------------- CHAT SESSIONS API --------------------
 @app.route("/api/chats", methods=["GET"])
 @token_required
+@conditional(get_chat_sessions_version)
 def get_chats():
     """Get all chat sessions for authenticated user"""
     try:
@@ -69,12 +163,35 @@ def get_chats():
         return jsonify(sessions)
 
     except Exception as e:
-        print(f"❌ Error in get_chats: {str(e)}")
+        logger.error("Error in get_chats: %s", e)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@app.route("/api/chats/search", methods=["GET"])
+@token_required
+def search_chats_api():
+    """Search the user's chat messages (?q=...&limit=20)"""
+    try:
+        user_id = request.current_user["user_id"]
+        query = request.args.get("q", "").strip()
+        if not query:
+            return jsonify({"error": "Query parameter q is required"}), 400
+        try:
+            limit = min(max(int(request.args.get("limit", 20)), 1), 50)
+        except ValueError:
+            return jsonify({"error": "limit must be a number"}), 400
+
+        from services.search_service import search_chats
+        return jsonify(search_chats(user_id, query[:200], limit))
+
+    except Exception as e:
+        logger.error("Error in search_chats_api: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 
 @app.route("/api/chats/<chat_id>", methods=["GET"])
 @token_required
+@conditional(get_chat_version)
 def get_chat(chat_id):
     """Get full chat history for a specific chat session"""
     try:
@@ -91,7 +208,7 @@ def get_chat(chat_id):
         return jsonify(chat_data)
 
     except Exception as e:
-        print(f"❌ Error in get_chat: {str(e)}")
+        logger.error("Error in get_chat: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 
@@ -109,13 +226,14 @@ def delete_chat(chat_id):
             return jsonify({"error": "Chat not found"}), 404
 
     except Exception as e:
-        print(f"❌ Error in delete_chat: {str(e)}")
+        logger.error("Error in delete_chat: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 
 # -------------------- VOICE API --------------------
 @app.route("/api/voice", methods=["POST"])
 @token_required
+@admission_control(*LLM_RATE_LIMITS)
 def voice_api():
     try:
         user_id = request.current_user["user_id"]
@@ -128,13 +246,14 @@ def voice_api():
         return jsonify(result)
 
     except Exception as e:
-        print(f"❌ Error in voice_api: {str(e)}")
+        logger.error("Error in voice_api: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 
 # -------------------- CHAT HISTORY --------------------
 @app.route("/api/history", methods=["GET"])
 @token_required
+@conditional(get_chat_history_version)
 def history():
     try:
         user_id = request.current_user["user_id"]
@@ -142,22 +261,17 @@ def history():
         return jsonify(history)
 
     except Exception as e:
-        print(f"❌ Error in history_api: {str(e)}")
+        logger.error("Error in history_api: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 
 # -------------------- REPORT GENERATION --------------------
 @app.route("/api/report", methods=["POST"])
+@admission_control(*LLM_RATE_LIMITS)
+@idempotent(get_request_user_id)
 def report_api():
     try:
-        token = request.headers.get("Authorization")
-        user_id = "trial_user"  # default access
-
-        if token and token.startswith("Bearer "):
-            token_str = token.split(" ")[1]
-            user_data = verify_token(token_str)
-            if user_data:
-                user_id = user_data["user_id"]
+        user_id = get_request_user_id()
 
         data = request.json
 
@@ -181,13 +295,14 @@ def report_api():
         return jsonify(report)
 
     except Exception as e:
-        print(f"❌ Error in report_api: {str(e)}")
+        logger.error("Error in report_api: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 
 # -------------------- REPORT HISTORY --------------------
 @app.route("/api/reports", methods=["GET"])
 @token_required
+@conditional(get_user_reports_version)
 def report_history():
     try:
         user_id = request.current_user["user_id"]
@@ -196,7 +311,179 @@ def report_history():
         return jsonify(reports)
 
     except Exception as e:
-        print(f"❌ Error in report_history: {str(e)}")
+        logger.error("Error in report_history: %s", e)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+# -------------------- ACCOUNT EXPORT --------------------
+@app.route("/api/export", methods=["GET"])
+@token_required
+def export_account():
+    """Stream all of the user's sessions, messages and reports as NDJSON (gzip if accepted)"""
+    try:
+        user_id = request.current_user["user_id"]
+
+        from services.export_service import stream_user_export
+
+        compress = (request.args.get("compress", "true").lower() != "false"
+                    and request.accept_encodings["gzip"] > 0)
+        response = Response(stream_user_export(user_id, compress), mimetype="application/x-ndjson")
+        if compress:
+            response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = "no-store"
+        response.headers["Content-Disposition"] = "attachment; filename=agrigpt-export.ndjson"
+        return response
+
+    except Exception as e:
+        logger.error("Error in export_account: %s", e)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+# -------------------- REPORT PDF EXPORT --------------------
+@app.route("/api/reports/<report_id>/pdf", methods=["GET"])
+@token_required
+def report_pdf(report_id):
+    """Download a saved report as PDF (cached by content hash, supports ETag)"""
+    try:
+        user_id = request.current_user["user_id"]
+        report = get_report_by_id(report_id)
+
+        if not report:
+            return jsonify({"error": "Report not found"}), 404
+
+        # Verify user owns this report
+        if report["user_id"] != user_id:
+            return jsonify({"error": "Unauthorized"}), 403
+
+        from services.pdf_service import build_report_html, report_pdf_key
+        from services.pdf_job_service import open_report_pdf
+
+        report_data = report["report_data"]
+
+        # Answer repeat downloads before touching the renderer
+        etag = report_pdf_key(build_report_html(report_data))
+        if etag in request.if_none_match:
+            return "", 304, {"ETag": f'"{etag}"'}
+
+        # Cache miss renders in the PDF worker pool, not in this process
+        pdf_file, size = open_report_pdf(report_data, etag)
+
+        response = send_file(
+            pdf_file,
+            mimetype="application/pdf",
+            download_name=f"{report['crop_name']}_report.pdf",
+            etag=etag,
+            conditional=True,
+            max_age=3600
+        )
+        if response.status_code == 200:
+            response.content_length = size  # unknown to send_file for an open file
+        response.headers["Cache-Control"] = "private, max-age=3600"
+        return response
+
+    except Exception as e:
+        logger.error("Error in report_pdf: %s", e)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+# -------------------- BATCH REPORT EXPORT --------------------
+@app.route("/api/reports/export", methods=["POST"])
+@token_required
+def export_reports_api():
+    """Queue a batch export of the user's reports (one PDF or a ZIP of PDFs)"""
+    try:
+        user_id = request.current_user["user_id"]
+        data = request.get_json(silent=True) or {}
+
+        from services.pdf_job_service import submit_export_job
+
+        try:
+            job = submit_export_job(
+                user_id,
+                report_ids=data.get("report_ids"),
+                fmt=data.get("format", "pdf")
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except RuntimeError as e:
+            return jsonify({"error": str(e)}), 503
+
+        return jsonify({
+            "job_id": job["_id"],
+            "status": job["status"],
+            "report_count": job["report_count"]
+        }), 202
+
+    except Exception as e:
+        logger.error("Error in export_reports_api: %s", e)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@app.route("/api/reports/export/<job_id>", methods=["GET"])
+@token_required
+def export_status(job_id):
+    """Get the status of a batch export job"""
+    try:
+        user_id = request.current_user["user_id"]
+
+        from services.pdf_job_service import get_export_job
+
+        try:
+            job = get_export_job(job_id, user_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not job:
+            return jsonify({"error": "Export job not found"}), 404
+
+        return jsonify({
+            "job_id": job["_id"],
+            "status": job["status"],
+            "format": job["format"],
+            "report_count": job["report_count"],
+            "size": job.get("size"),
+            "error": job.get("error"),
+            "created_at": job["created_at"],
+            "started_at": job.get("started_at"),
+            "finished_at": job.get("finished_at")
+        })
+
+    except Exception as e:
+        logger.error("Error in export_status: %s", e)
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@app.route("/api/reports/export/<job_id>/download", methods=["GET"])
+@token_required
+def export_download(job_id):
+    """Download a finished batch export"""
+    try:
+        user_id = request.current_user["user_id"]
+
+        from services.pdf_job_service import get_export_job
+
+        try:
+            job = get_export_job(job_id, user_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not job:
+            return jsonify({"error": "Export job not found"}), 404
+
+        if job["status"] != "done":
+            return jsonify({"error": "Export not ready", "status": job["status"]}), 409
+
+        mimetype = "application/zip" if job["format"] == "zip" else "application/pdf"
+        return send_file(
+            job["path"],
+            mimetype=mimetype,
+            as_attachment=True,
+            download_name=f"agrigpt_reports.{job['format']}"
+        )
+
+    except FileNotFoundError:
+        return jsonify({"error": "Export has expired"}), 410
+    except Exception as e:
+        logger.error("Error in export_download: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta, timezone
+from loadtest.fixtures import QUESTIONS
+
+# Inputs for the micro-benchmarks: questions in all 13 supported languages,
+# long chat histories, and well-formed as well as malformed LLM outputs.
+
+LANGUAGES = list(QUESTIONS)
+
+MESSAGES = [q for questions in QUESTIONS.values() for q in questions] + [
+    "Hi",
+    "paddy me khad kab dalna hai",                        # romanized Hindi
+    "ଧାନ crop ପାଇଁ urea କେତେ?",                            # mixed Odia/English
+    "What is the MSP for wheat? गेहूं का भाव क्या है?"       # mixed English/Hindi
+]
+
+ANSWERS = {
+    "English": "Apply 40 kg N per acre in three splits: basal, tillering and panicle initiation.",
+    "Hindi": "प्रति एकड़ 40 किलो नाइट्रोजन तीन भागों में डालें: बुवाई, कल्ले और बाली निकलते समय।",
+    "Odia": "ଏକର ପିଛା ୪୦ କିଲୋ ନାଇଟ୍ରୋଜେନ ତିନି ଭାଗରେ ଦିଅନ୍ତୁ।",
+    "Tamil": "ஏக்கருக்கு 40 கிலோ நைட்ரஜனை மூன்று முறையாக இடவும்.",
+    "Urdu": "فی ایکڑ 40 کلو نائٹروجن تین حصوں میں ڈالیں۔"
+}
+
+
+def chat_history(length: int) -> list:
+    """Alternating user/assistant messages in rotating languages, as get_recent_chat_messages returns"""
+    history = []
+    answer_languages = list(ANSWERS)
+    for i in range(length):
+        language = LANGUAGES[i // 2 % len(LANGUAGES)]
+        if i % 2 == 0:
+            history.append({"role": "user", "message": QUESTIONS[language][0]})
+        else:
+            history.append({"role": "assistant", "message": ANSWERS[answer_languages[i // 2 % len(answer_languages)]] * 3})
+    return history
+
+
+def chat_documents(count: int) -> list:
+    """Newest-first chat_history documents with occasional orphan messages (failed saves)"""
+    now = datetime.now(timezone.utc)
+    docs = []
+    for i in range(count):
+        role = "assistant" if i % 2 == 0 else "user"
+        if i % 97 == 0:
+            role = "user"  # orphan: breaks the pairing rhythm
+        language = LANGUAGES[i % len(LANGUAGES)]
+        docs.append({
+            "user_id": "bench-user",
+            "role": role,
+            "content": QUESTIONS[language][0] if role == "user" else ANSWERS["English"],
+            "response_type": "ai",
+            "language": language,
+            "input_type": "text",
+            "timestamp": now - timedelta(minutes=i)
+        })
+    return docs
+
+
+def chat_payload(count: int) -> dict:
+    """GET /api/chats/<id> body for a long conversation: Mongo session plus oldest-first messages"""
+    from bson import ObjectId
+    now = datetime.now(timezone.utc).replace(tzinfo=None)  # pymongo returns naive UTC
+    session = {
+        "_id": ObjectId(),
+        "user_id": "bench-user",
+        "title": QUESTIONS["Hindi"][0][:50],
+        "language": "Hindi",
+        "created_at": now - timedelta(days=30),
+        "updated_at": now
+    }
+    messages = [{**doc, "chat_id": str(session["_id"]), "timestamp": doc["timestamp"].replace(tzinfo=None)}
+                for doc in reversed(chat_documents(count))]
+    return {"session": session, "messages": messages}
+
+
+def session_list(count: int) -> list:
+    """GET /api/chats body: count Mongo chat_sessions documents"""
+    from bson import ObjectId
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [{
+        "_id": ObjectId(),
+        "user_id": "bench-user",
+        "title": QUESTIONS[LANGUAGES[i % len(LANGUAGES)]][0][:50],
+        "language": LANGUAGES[i % len(LANGUAGES)],
+        "created_at": now - timedelta(hours=i + 1),
+        "updated_at": now - timedelta(hours=i)
+    } for i in range(count)]
+
+
+def _section_lines(prefix: str, count: int = 4) -> list:
+    return [f"{n}. {prefix} recommendation number {n} for healthy crop growth and yield" for n in range(1, count + 1)]
+
+
+WELL_FORMED_REPORT = "\n".join(
+    ["SOWING_ADVICE:"] + [f"- {line}" for line in _section_lines("Sowing")] +
+    ["", "FERTILIZER_PLAN:"] + [f"- {line}" for line in _section_lines("Fertilizer")] +
+    ["", "WEATHER_TIPS:"] + [f"- {line}" for line in _section_lines("Weather")] +
+    ["", "FARMING_CALENDAR:"] + [f"- Week {n}-{n + 1}: field operation details for this stage" for n in range(1, 9, 2)]
+)
+
+HINDI_REPORT = """SOWING_ADVICE:
+- धान की बुवाई जून के दूसरे सप्ताह में करें ताकि मानसून का लाभ मिले
+- बीज को बोने से पहले फफूंदनाशक से उपचारित करें
+- रोपाई के समय पौधों के बीच 20 सेमी की दूरी रखें
+- नर्सरी में स्वस्थ पौध तैयार करने के लिए अच्छी मिट्टी का प्रयोग करें
+
+FERTILIZER_PLAN:
+- प्रति हेक्टेयर 120 किलो नाइट्रोजन तीन बार में डालें
+- फास्फोरस 60 किलो प्रति हेक्टेयर रोपाई के समय डालें
+- पोटाश 40 किलो प्रति हेक्टेयर अंतिम जुताई में मिलाएं
+- जिंक सल्फेट 25 किलो प्रति हेक्टेयर कमी होने पर डालें
+
+WEATHER_TIPS:
+- भारी बारिश में खेत से अतिरिक्त पानी निकालने की व्यवस्था करें
+- सूखे के समय हल्की सिंचाई करते रहें
+- तेज हवा से पहले नाइट्रोजन का छिड़काव न करें
+- पाला पड़ने की संभावना हो तो शाम को सिंचाई करें
+
+FARMING_CALENDAR:
+- सप्ताह 1-2: नर्सरी तैयार करना और बीज बोना
+- सप्ताह 3-4: मुख्य खेत की तैयारी और रोपाई
+- सप्ताह 5-10: खरपतवार नियंत्रण और उर्वरक प्रयोग
+- सप्ताह 16-18: कटाई और मड़ाई"""
+
+MALFORMED_REPORTS = {
+    # Markdown headers instead of the requested tokens
+    "markdown_headers": WELL_FORMED_REPORT.replace("SOWING_ADVICE:", "## **Sowing Advice**")
+                                          .replace("FERTILIZER_PLAN:", "## **Fertilizer Plan**"),
+    # Headers missing entirely: every section falls back
+    "no_headers": "\n".join(_section_lines("Generic", 16)),
+    # Everything on one line
+    "single_line": WELL_FORMED_REPORT.replace("\n", " "),
+    # Model refused / truncated
+    "truncated": "SOWING_ADVICE:\n- Sow after the first monsoon showers when soil",
+    "empty": "",
+    # Preamble, chatter and a trailing summary around the sections
+    "chatty": "Sure! Here is your detailed report.\n\n" + WELL_FORMED_REPORT +
+              "\n\nI hope this helps. Let me know if you need anything else about FARMING!"
+}
+
+LONG_REPORT = "\n".join([WELL_FORMED_REPORT] * 25)
+
+CHAT_RESPONSES = {
+    # Typical agronomy answer: no fallback matches, so every message is scanned
+    "ai_answer": ANSWERS["English"] * 8,
+    "ai_answer_hindi": ANSWERS["Hindi"] * 8,
+    # Model replied with the refusal text inside a longer answer
+    "fallback_embedded": "Sorry. 🌾 I am AgriGPT 🌾 and I only assist with agricultural and farming-related queries. Thanks!"
+}
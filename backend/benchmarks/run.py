@@ -0,0 +1,253 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+# Micro-benchmarks for pure functions on the request path, with stored
+# baselines and a regression gate.
+#
+#   python -m benchmarks.run                    # compare with benchmarks/baseline.json
+#   python -m benchmarks.run --save-baseline    # record a new baseline
+#   python -m benchmarks.run --filter parse --threshold 10
+#
+# Exits with status 1 when any benchmark is slower than its baseline by more
+# than the threshold (default BENCHMARK_THRESHOLD_PCT or 25%; repeated runs on
+# an unchanged tree differ by under 10%). Against a baseline from the same
+# machine and interpreter, raw times are compared. Otherwise timings are
+# normalized by a fixed pure-Python calibration loop, so a baseline recorded
+# on a faster or slower machine still compares sensibly.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD_PCT = float(os.environ.get("BENCHMARK_THRESHOLD_PCT", "25"))
+
+
+def _calibration():
+    total = 0
+    for i in range(10000):
+        total += i * i % 7
+    return total
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+# Machine/interpreter fields that must match for raw times to be comparable
+ENVIRONMENT_KEYS = ("python", "implementation", "machine", "cpu", "cpu_count")
+
+
+def environment() -> dict:
+    """Machine and interpreter details stored with each run"""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "cpu": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "platform": platform.platform()
+    }
+
+
+def _loops_for(fn, min_time: float) -> int:
+    """Calls per timing sample, so one sample takes at least min_time"""
+    loops = 1
+    while True:
+        elapsed = _time(fn, loops)
+        if elapsed >= min_time:
+            return loops
+        loops *= 2 if elapsed == 0 else max(2, int(min_time / elapsed * 1.2))
+
+
+def _time(fn, loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return time.perf_counter() - start
+
+
+def same_environment(baseline: dict) -> bool:
+    """True if the baseline was recorded on this kind of machine with this interpreter"""
+    current = environment()
+    return all(baseline.get(key) == current[key] for key in ENVIRONMENT_KEYS)
+
+
+def measure_all(benchmarks: dict, repeat: int, min_time: float) -> tuple:
+    """
+    Time every benchmark in `repeat` round-robin rounds.
+
+    A slow spell on a shared machine then hits one sample of many benchmarks
+    rather than every sample of one. Each benchmark keeps its fastest round;
+    the calibration loop, timed once per round, keeps the median.
+
+    Returns:
+        (calibration_us, {name: µs per call})
+    """
+    benchmarks = {"__calibration__": _calibration, **benchmarks}
+    loops = {name: _loops_for(fn, min_time) for name, fn in benchmarks.items()}
+    samples = {name: [] for name in benchmarks}
+    gc.collect()
+    gc.disable()  # as timeit does: collections land on random benchmarks
+    try:
+        for _ in range(repeat):
+            for name, fn in benchmarks.items():
+                samples[name].append(_time(fn, loops[name]) / loops[name] * 1_000_000)
+    finally:
+        gc.enable()
+    calibration = samples.pop("__calibration__")
+    return statistics.median(calibration), {name: min(times) for name, times in samples.items()}
+
+
+def build_benchmarks() -> dict:
+    """name -> zero-argument callable. Imports the app modules (needs the app's env/.env)."""
+    from langdetect import DetectorFactory
+    DetectorFactory.seed = 0  # langdetect is randomized otherwise
+
+    from chat import detect_language, build_context_aware_prompt, is_fallback_response
+    from report import parse_report_response, get_fallback_data
+    from services.db_service import pair_chat_messages
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+    from utils.json_provider import FastJSONProvider
+    from utils.text_search import index_terms
+    from benchmarks import fixtures
+
+    history_10 = fixtures.chat_history(10)
+    history_50 = fixtures.chat_history(50)
+    documents = fixtures.chat_documents(1000)
+    payload = fixtures.chat_payload(1000)
+    sessions = fixtures.session_list(500)
+    app = Flask(__name__)
+    stdlib_json, fast_json = DefaultJSONProvider(app), FastJSONProvider(app)
+
+    def each(fn, items):
+        return lambda: [fn(item) for item in items]
+
+    benchmarks = {
+        "detect_language/all_languages": each(detect_language, fixtures.MESSAGES),
+        "detect_language/odia_fast_path": lambda: detect_language(fixtures.QUESTIONS["Odia"][0]),
+        "build_context_aware_prompt/no_history":
+            lambda: build_context_aware_prompt(fixtures.QUESTIONS["Hindi"][0], "Hindi", []),
+        "build_context_aware_prompt/history_10":
+            lambda: build_context_aware_prompt(fixtures.QUESTIONS["Tamil"][0], "Tamil", history_10),
+        "build_context_aware_prompt/history_50":
+            lambda: build_context_aware_prompt(fixtures.QUESTIONS["Urdu"][0], "Urdu", history_50),
+        "parse_report_response/well_formed":
+            lambda: parse_report_response(fixtures.WELL_FORMED_REPORT, "Rice", "Odisha", "English"),
+        "parse_report_response/hindi":
+            lambda: parse_report_response(fixtures.HINDI_REPORT, "Rice", "Bihar", "Hindi"),
+        "parse_report_response/long":
+            lambda: parse_report_response(fixtures.LONG_REPORT, "Rice", "Odisha", "English"),
+        "get_fallback_data/all_languages":
+            each(lambda language: get_fallback_data("Rice", language), fixtures.LANGUAGES),
+        "pair_chat_messages/1000": lambda: pair_chat_messages(documents),
+        # Runs in save_chat for every question and answer
+        "index_terms/all_languages": each(index_terms, fixtures.MESSAGES),
+        "index_terms/long_answer": lambda: index_terms(fixtures.LONG_REPORT),
+        # jsonify of large history responses: Flask's stdlib provider vs the app's
+        "json_chat/stdlib_1000": lambda: stdlib_json.dumps(payload, default=fast_json.default),
+        "json_chat/fast_1000": lambda: fast_json._dumps_bytes(payload),
+        "json_sessions/stdlib_500": lambda: stdlib_json.dumps(sessions, default=fast_json.default),
+        "json_sessions/fast_500": lambda: fast_json._dumps_bytes(sessions)
+    }
+    for name, output in fixtures.MALFORMED_REPORTS.items():
+        benchmarks[f"parse_report_response/malformed_{name}"] = (
+            lambda output=output: parse_report_response(output, "Rice", "Odisha", "English")
+        )
+    for name, response in fixtures.CHAT_RESPONSES.items():
+        benchmarks[f"is_fallback_response/{name}"] = lambda response=response: is_fallback_response(response)
+    return benchmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path micro-benchmarks")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7, help="timing rounds over all benchmarks")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per timing sample")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT,
+                        help="allowed slowdown in percent (per-benchmark overrides: baseline 'thresholds')")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    benchmarks = build_benchmarks()
+    # Fallback-path warnings (malformed reports) would otherwise flood stdout
+    # and time the logging queue instead of the code
+    logging.disable(logging.CRITICAL)
+    if args.filter:
+        benchmarks = {name: fn for name, fn in benchmarks.items() if args.filter in name}
+
+    calibration_us, timings = measure_all(benchmarks, args.repeat, args.min_time)
+    results = {name: round(value, 3) for name, value in timings.items()}
+
+    run = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        **environment(),
+        "calibration_us": round(calibration_us, 3),
+        "results_us": results
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        if baseline:
+            # Keep entries not re-run (--filter) and any threshold overrides
+            run["results_us"] = {**baseline.get("results_us", {}), **results}
+            run["thresholds"] = baseline.get("thresholds", {})
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if not baseline or same_environment(baseline):
+        # Same machine and interpreter: raw times, calibration would only add its own noise
+        scale = 1.0
+    else:
+        scale = calibration_us / baseline["calibration_us"]
+        print(f"Baseline recorded on {baseline.get('cpu')} / Python {baseline.get('python')}: "
+              f"scaling by calibration ({scale:.2f}x)\n")
+    print(f"{'benchmark':<52}{'µs/call':>12}{'baseline':>12}{'change':>9}")
+    regressions = []
+    for name, value in results.items():
+        base = (baseline or {}).get("results_us", {}).get(name)
+        if base is None or args.save_baseline:
+            print(f"{name:<52}{value:>12.1f}{'-':>12}{'':>9}")
+            continue
+        # On another machine, compare in calibration units so its speed cancels out
+        change = (value / (base * scale) - 1) * 100
+        limit = baseline.get("thresholds", {}).get(name, args.threshold)
+        flag = "  REGRESSION" if change > limit else ""
+        print(f"{name:<52}{value:>12.1f}{base * scale:>12.1f}{change:>+8.1f}%{flag}")
+        if flag:
+            regressions.append((name, change, limit))
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed:")
+        for name, change, limit in regressions:
+            print(f"  {name}: {change:+.1f}% (limit {limit:.0f}%)")
+        sys.exit(1)
+    if baseline is None and not args.save_baseline:
+        print(f"\nNo baseline at {args.baseline}; record one with --save-baseline")
+
+
+if __name__ == "__main__":
+    main()
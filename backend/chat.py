@@ -1,4 +1,4 @@
-from services.llm_service import get_ai_response
+from services.llm_service import get_ai_response, classify_prompt
 from services.db_service import (
     save_chat, 
     create_chat_session, 
@@ -6,8 +6,13 @@ from services.db_service import (
     generate_chat_title, 
     get_recent_chat_messages
 )
+from services.semantic_cache_service import lookup_answer, store_answer
+from services.prompt_service import CHAT_PREFIX, build_chat_suffix
+from utils.log import get_logger
 from langdetect import detect
 
+logger = get_logger(__name__)
+
 # Language-wise fallback messages (ALL Indian languages)
 FALLBACK_MESSAGES = {
     "English": "🌾 I am AgriGPT 🌾 and I only assist with agricultural and farming-related queries.",
@@ -72,49 +77,16 @@ def build_context_aware_prompt(current_message: str, language: str, chat_history
     Returns:
         Formatted prompt string with context
     """
-    prompt_parts = []
-    
-    # 1. System instructions for AgriGPT personality
-    prompt_parts.append(
-        f"You are AgriGPT, a friendly agricultural assistant for Indian farmers. "
-        f"Your purpose is to help with farming-related questions.\n"
-        f"\nWhen introducing yourself or responding to greetings/questions about your capabilities:\n"
-        f"- Say 'I am AgriGPT, your agricultural assistant'\n"
-        f"- Mention you can help with: crop selection, soil & fertilizers, pest management, "
-        f"irrigation, government schemes, and weather impact on farming\n"
-        f"- Be warm, friendly, and conversational\n"
-        f"- For 'how are you' type questions, respond naturally (e.g., 'I am fine and ready to help with your farming questions!')\n"
-        f"- For 'what can you do' or 'your service', explain your agricultural assistance capabilities\n"
-        f"- For general conversation starters like 'so let's begin', encourage them to ask their farming queries\n"
-    )
-    
-    # 2. Language instruction (critical for multilingual support)
-    prompt_parts.append(
-        f"\nCRITICAL LANGUAGE RULE: You MUST respond COMPLETELY and ENTIRELY in {language} language only. "
-        f"Do NOT mix languages. Do NOT switch languages mid-response. "
-        f"Every single word must be in {language}.\n"
+    # Fixed persona prefix + per-request language rule, history and question
+    return CHAT_PREFIX + build_chat_suffix(current_message, language, chat_history)
+
+
+def is_fallback_response(response: str) -> bool:
+    """Check if a response matches any fallback message (in any language)"""
+    return any(
+        fallback_msg.lower().replace(" ", "") in response.lower().replace(" ", "")
+        for fallback_msg in FALLBACK_MESSAGES.values()
     )
-    
-    # 3. Conversation context (if exists)
-    if chat_history and len(chat_history) > 0:
-        prompt_parts.append("\n=== CONVERSATION HISTORY ===")
-        for msg in chat_history:
-            role_label = "User" if msg["role"] == "user" else "AgriGPT"
-            prompt_parts.append(f"{role_label}: {msg['message']}")
-        prompt_parts.append("=== END OF HISTORY ===\n")
-    
-    # 4. Current user message
-    prompt_parts.append(f"\nCurrent User Question:\n{current_message}")
-    
-    # 5. Instruction for contextual understanding
-    if chat_history:
-        prompt_parts.append(
-            "\nIMPORTANT: Use the conversation history above to understand context, "
-            "references (like 'this', 'that', 'earlier'), and provide relevant answers. "
-            f"Respond ONLY in {language} language."
-        )
-    
-    return "\n".join(prompt_parts)
 
 
 def handle_chat(user_id: str, message: str, chat_id: str = None) -> dict:
@@ -141,37 +113,40 @@ def handle_chat(user_id: str, message: str, chat_id: str = None) -> dict:
         if chat_id and user_id != "trial_user":
             try:
                 chat_history = get_recent_chat_messages(chat_id, limit=10)
-                if chat_history:
-                    print(f"✓ Retrieved {len(chat_history)} recent messages for context")
-                else:
-                    print("ℹ No previous messages in this chat session")
+                logger.debug("Retrieved chat history", extra={"chat_id": chat_id, "messages": len(chat_history)})
             except Exception as e:
-                print(f"✗ Error retrieving chat history: {str(e)}")
+                logger.error("Error retrieving chat history: %s", e, extra={"chat_id": chat_id})
                 chat_history = []
         else:
-            if chat_id is None:
-                print(f"ℹ New chat session - no history available")
-            else:
-                print(f"ℹ Trial user - limited history")
+            logger.debug("No chat history", extra={"new_session": chat_id is None})
 
-        # Build context-aware prompt with AgriGPT personality
-        prompt = build_context_aware_prompt(message, language, chat_history)
-        
-        print(f"📤 Sending to Gemini API (with {len(chat_history)} context messages)")
-        response = get_ai_response(prompt, chat_history=chat_history)
-
-        # If Gemini indicates non-agriculture → localized fallback
-        # Check if response matches any fallback message (in any language)
-        is_fallback = any(
-            fallback_msg.lower().replace(" ", "") in response.lower().replace(" ", "")
-            for fallback_msg in FALLBACK_MESSAGES.values()
-        )
-        
-        if is_fallback:
-            response = FALLBACK_MESSAGES.get(language, FALLBACK_MESSAGES["English"])
-            response_type = "fallback"
-        else:
+        # History-free questions can reuse the answer to an equivalent earlier question
+        cached_answer, question_vector = None, None
+        if not chat_history:
+            cached_answer, question_vector = lookup_answer(message, language)
+
+        if cached_answer:
+            response = cached_answer
             response_type = "ai"
+        else:
+            # Build context-aware prompt; the AgriGPT persona is sent as a
+            # byte-stable prefix so it can be served from the context cache
+            prompt = build_chat_suffix(message, language, chat_history)
+            
+            # Small talk goes to the lighter model tier, agronomy stays on the large one
+            route = classify_prompt(message, chat_history)
+
+            logger.debug("Sending chat to Gemini", extra={"context_messages": len(chat_history), "route": route})
+            response = get_ai_response(prompt, chat_history=chat_history, route=route, prefix=CHAT_PREFIX)
+
+            # If Gemini indicates non-agriculture → localized fallback
+            if is_fallback_response(response):
+                response = FALLBACK_MESSAGES.get(language, FALLBACK_MESSAGES["English"])
+                response_type = "fallback"
+            else:
+                response_type = "ai"
+                if not chat_history:
+                    store_answer(message, response, language, question_vector)
 
     # Only save chat history for authenticated users (not trial users)
     if user_id != "trial_user":
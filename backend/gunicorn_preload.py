@@ -0,0 +1,49 @@
+"""
+Gunicorn preload profile.
+
+    gunicorn -c gunicorn_preload.py app:app
+
+The master imports the app once and preloads the faster-whisper/CTranslate2
+runtime, so workers share those pages copy-on-write instead of each loading
+their own. Every worker then drops the Mongo/Gemini client state inherited
+from the master and builds its own Whisper model in the background warm-up
+(see voice.preload_whisper_runtime); /ready reports when it is done. This is
+the voice profile, so whisper is in READY_COMPONENTS unless it is set.
+
+GUNICORN_PRELOAD=false runs the same profile without preloading, for comparison
+(python -m utils.memory_report runs both and reports RSS/PSS per worker).
+"""
+import os
+import shutil
+
+# Metrics from all workers are aggregated through this directory (cleared on start)
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/agrigpt_prometheus")
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+# Workers build the Whisper model during warm-up in both modes, so the
+# RSS/PSS comparison (utils.memory_report) measures the same model either way
+os.environ.setdefault("READY_COMPONENTS", "langdetect,mongo,whisper")
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+if preload_app:
+    os.environ.setdefault("WARM_UP_ON_START", "whisper_runtime")
+    # Background warm-up (READY_COMPONENTS) starts in each worker after fork
+    os.environ.setdefault("READY_WARM_UP_AT_IMPORT", "false")
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+workers = int(os.environ.get("WEB_CONCURRENCY", "3"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from services.startup_service import after_fork
+        after_fork()
+
+
+def child_exit(server, worker):
+    from services.metrics_service import mark_process_dead
+    mark_process_dead(worker.pid)
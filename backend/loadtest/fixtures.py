@@ -0,0 +1,111 @@
+import math
+import os
+import struct
+import wave
+
+# Request fixtures for the load test: farming questions in all 13 supported
+# languages, follow-ups for multi-turn chats, crops/regions for reports.
+
+QUESTIONS = {
+    "English": [
+        "What is the best fertilizer schedule for paddy in the kharif season?",
+        "How do I control stem borer in rice without harming bees?",
+        "When should I sow wheat in Punjab for the best yield?"
+    ],
+    "Hindi": [
+        "खरीफ में धान के लिए सबसे अच्छा खाद कार्यक्रम क्या है?",
+        "गेहूं की फसल में पीला रतुआ रोग से कैसे बचाव करें?",
+        "टमाटर की खेती के लिए मिट्टी कैसे तैयार करें?"
+    ],
+    "Bengali": [
+        "আমন ধানে কোন সার কখন দিতে হবে?",
+        "পাট চাষে জলসেচ কীভাবে করব?"
+    ],
+    "Odia": [
+        "ଧାନ ଚାଷରେ କେଉଁ ସାର କେବେ ଦେବା ଉଚିତ?",
+        "ବାଇଗଣ ଗଛରେ ପୋକ ଲାଗିଲେ କଣ କରିବି?"
+    ],
+    "Tamil": [
+        "நெல் சாகுபடிக்கு எந்த உரம் சிறந்தது?",
+        "தென்னை மரத்தில் வண்டு தாக்குதலை எப்படி கட்டுப்படுத்துவது?"
+    ],
+    "Telugu": [
+        "వరి పంటకు ఏ ఎరువు ఎప్పుడు వేయాలి?",
+        "పత్తి పంటలో గులాబీ రంగు పురుగును ఎలా నియంత్రించాలి?"
+    ],
+    "Kannada": [
+        "ಭತ್ತದ ಬೆಳೆಗೆ ಯಾವ ಗೊಬ್ಬರ ಉತ್ತಮ?",
+        "ರಾಗಿ ಬಿತ್ತನೆಗೆ ಸರಿಯಾದ ಸಮಯ ಯಾವುದು?"
+    ],
+    "Malayalam": [
+        "നെൽകൃഷിക്ക് ഏത് വളമാണ് നല്ലത്?",
+        "കുരുമുളകിലെ ദ്രുതവാട്ടം എങ്ങനെ നിയന്ത്രിക്കാം?"
+    ],
+    "Marathi": [
+        "भात पिकासाठी कोणते खत कधी द्यावे?",
+        "कापसावरील बोंडअळी कशी नियंत्रित करावी?"
+    ],
+    "Gujarati": [
+        "ડાંગરના પાક માટે કયું ખાતર શ્રેષ્ઠ છે?",
+        "મગફળીમાં પાણી ક્યારે આપવું જોઈએ?"
+    ],
+    "Punjabi": [
+        "ਝੋਨੇ ਦੀ ਫ਼ਸਲ ਲਈ ਕਿਹੜੀ ਖਾਦ ਵਧੀਆ ਹੈ?",
+        "ਕਣਕ ਦੀ ਬਿਜਾਈ ਕਦੋਂ ਕਰਨੀ ਚਾਹੀਦੀ ਹੈ?"
+    ],
+    "Urdu": [
+        "دھان کی فصل کے لیے کون سی کھاد بہترین ہے؟",
+        "گندم کی بوائی کا صحیح وقت کیا ہے؟"
+    ],
+    "Assamese": [
+        "ধান খেতিৰ বাবে কোনবিধ সাৰ ভাল?",
+        "চাহ বাগিচাত পোক কেনেকৈ নিয়ন্ত্ৰণ কৰিব?"
+    ]
+}
+
+FOLLOW_UPS = [
+    "How much per acre?",
+    "What if it rains heavily next week?",
+    "इसके लिए कितना पानी चाहिए?",
+    "Is there an organic alternative?"
+]
+
+GREETINGS = ["Hi", "नमस्ते", "Hello AgriGPT", "ନମସ୍କାର"]
+
+REPORT_REQUESTS = [
+    {"cropName": "Rice", "region": "Odisha", "language": "Odia"},
+    {"cropName": "Wheat", "region": "Punjab", "language": "Punjabi"},
+    {"cropName": "Cotton", "region": "Maharashtra", "language": "Marathi"},
+    {"cropName": "Tomato", "region": "Karnataka", "language": "English"},
+    {"cropName": "Jute", "region": "West Bengal", "language": "Bengali"},
+    {"cropName": "Groundnut", "region": "Gujarat", "language": "Gujarati"}
+]
+
+SAMPLE_AUDIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+
+
+def all_questions() -> list:
+    return [(language, q) for language, questions in QUESTIONS.items() for q in questions]
+
+
+def sample_audio_path(seconds: float = 2.0, rate: int = 16000) -> str:
+    """
+    Path to the bundled sample recording, generated on first use: a 16 kHz
+    mono WAV with a voiced tone sweep. Pass real recordings with --audio.
+    """
+    path = os.path.join(SAMPLE_AUDIO_DIR, "sample_16k.wav")
+    if os.path.exists(path):
+        return path
+    os.makedirs(SAMPLE_AUDIO_DIR, exist_ok=True)
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        freq = 180 + 120 * math.sin(2 * math.pi * 2 * t)
+        sample = 0.3 * math.sin(2 * math.pi * freq * t) * (0.6 + 0.4 * math.sin(2 * math.pi * 4 * t))
+        frames += struct.pack("<h", int(sample * 32767))
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(frames))
+    return path
@@ -0,0 +1,240 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from loadtest.run import Client, Results, RESULTS_DIR, spawn_stack, stop_stack, create_users, compare, print_summary
+
+# Replays captured production traffic (services/capture_service.py) against a
+# local instance, with the LLM answering from the recording.
+#
+#   python -m loadtest.replay data/capture --spawn --mongo mock
+#   python -m loadtest.replay data/capture --spawn --speed 4 --compare loadtest/results/replay-before.json
+#   python -m loadtest.replay data/capture --target http://127.0.0.1:5000 --speed 0
+#
+# Each captured user becomes a fresh local user, and captured chat IDs are
+# mapped to the chat IDs the local server hands out, so multi-turn
+# conversations keep their history depth. A conversation is always replayed
+# in order by a single worker. --speed 1 keeps the original arrival times,
+# --speed 0 sends as fast as --concurrency allows.
+#
+# With --target, the server must run loadtest.server with LOADTEST_REPLAY
+# pointing at the same capture files, or it will call its own LLM.
+
+ENDPOINT_PATHS = {
+    "chat_api": "/api/chat",
+    "report_api": "/api/report"
+}
+
+
+def read_captures(paths: list) -> list:
+    """Load capture records from files or directories (.jsonl / .jsonl.gz), oldest first"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += glob.glob(os.path.join(path, "*.jsonl")) + glob.glob(os.path.join(path, "*.jsonl.gz"))
+        else:
+            files.append(path)
+
+    records = []
+    for path in files:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass  # truncated last line of a live file
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def conversation_key(record: dict) -> str:
+    """Records sharing a key must be replayed in order on one worker"""
+    chat_id = record["body"].get("chat_id") or (record.get("response") or {}).get("chat_id")
+    return chat_id or record["id"]
+
+
+def describe(records: list) -> dict:
+    """Shape of the captured traffic, and the latencies production saw"""
+    endpoints = {}
+    for record in records:
+        endpoints.setdefault(record["endpoint"], []).append(record["duration_ms"])
+    return {
+        "records": len(records),
+        "users": len({record["user"] for record in records if record["user"]}),
+        "conversations": len({conversation_key(record) for record in records}),
+        "endpoints": {
+            endpoint: {
+                "requests": len(durations),
+                "captured_p50_ms": Results._percentile(sorted(durations), 50),
+                "captured_p95_ms": Results._percentile(sorted(durations), 95)
+            }
+            for endpoint, durations in sorted(endpoints.items())
+        }
+    }
+
+
+class Replay:
+    def __init__(self, base_url: str, records: list, tokens: dict, results: Results, timeout: float):
+        self.base_url = base_url
+        self.records = records
+        self.tokens = tokens          # user pseudonym -> local JWT
+        self.results = results
+        self.timeout = timeout
+        self.chat_ids = {}            # captured chat pseudonym -> local chat_id
+        self.lock = threading.Lock()
+
+    def send(self, client: Client, record: dict, scheduled: float = None):
+        body = dict(record["body"])
+        captured_chat = body.pop("chat_id", None)
+        if captured_chat:
+            with self.lock:
+                local_chat = self.chat_ids.get(captured_chat)
+            if local_chat:
+                body["chat_id"] = local_chat
+
+        headers = {"Content-Type": "application/json", "X-Replay-Id": record["id"]}
+        token = self.tokens.get(record["user"])
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        label = f"POST {ENDPOINT_PATHS[record['endpoint']]} (replay)"
+        start = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            status, data = client.request("POST", ENDPOINT_PATHS[record["endpoint"]],
+                                          json.dumps(body).encode(), headers)
+        except Exception:
+            status, data = None, None
+        self.results.record(label, (time.perf_counter() - start) * 1000, status)
+
+        # Conversation started before capture began, or this turn created it
+        captured_response_chat = (record.get("response") or {}).get("chat_id") or captured_chat
+        if status == 200 and captured_response_chat:
+            try:
+                local_chat = json.loads(data).get("chat_id")
+            except (ValueError, AttributeError):
+                local_chat = None
+            if local_chat:
+                with self.lock:
+                    self.chat_ids.setdefault(captured_response_chat, local_chat)
+
+    def run(self, concurrency: int, speed: float):
+        lanes = [[] for _ in range(concurrency)]
+        lane_of = {}
+        for record in self.records:
+            key = conversation_key(record)
+            if key not in lane_of:
+                lane_of[key] = len(lane_of) % concurrency
+            lanes[lane_of[key]].append(record)
+
+        first_ts = datetime.fromisoformat(self.records[0]["ts"]).timestamp() if self.records else 0
+        start = time.perf_counter()
+
+        def worker(lane):
+            client = Client(self.base_url, self.timeout)
+            for record in lane:
+                scheduled = None
+                if speed > 0:
+                    offset = (datetime.fromisoformat(record["ts"]).timestamp() - first_ts) / speed
+                    scheduled = start + offset
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                self.send(client, record, scheduled)
+
+        threads = [threading.Thread(target=worker, args=(lane,), daemon=True) for lane in lanes if lane]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured AgriGPT traffic")
+    parser.add_argument("captures", nargs="+", help="capture files or directories")
+    parser.add_argument("--target", help="base URL of a running server (default: --spawn one)")
+    parser.add_argument("--spawn", action="store_true", help="start mongod + loadtest.server locally")
+    parser.add_argument("--mongo", default="mongod", help="mongod (throwaway), mock (mongomock) or a mongodb:// URI")
+    parser.add_argument("--llm-latency", choices=["recorded", "none"], default="recorded",
+                        help="sleep for the recorded LLM time, or answer immediately")
+    parser.add_argument("--speed", type=float, default=1.0, help="arrival-time multiplier; 0 = as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--limit", type=int, help="replay only the first N records")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout")
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--output", help="results JSON path (default: loadtest/results/replay-<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    if not args.target and not args.spawn:
+        parser.error("give --target URL or --spawn")
+
+    records = read_captures(args.captures)[:args.limit]
+    if not records:
+        parser.error("no capture records found")
+    traffic = describe(records)
+    print(f"Replaying {traffic['records']} requests from {traffic['users']} users "
+          f"in {traffic['conversations']} conversations")
+
+    # spawn_stack options that don't apply to replays
+    args.llm_latency_ms, args.stub_whisper = 0, True
+
+    processes, tmpdir = [], None
+    try:
+        if args.spawn:
+            base_url, processes, tmpdir = spawn_stack(args, {
+                "LOADTEST_REPLAY": os.pathsep.join(os.path.abspath(path) for path in args.captures),
+                "LOADTEST_REPLAY_LATENCY": args.llm_latency
+            })
+        else:
+            base_url = args.target.rstrip("/")
+
+        users = sorted({record["user"] for record in records if record["user"]})
+        tokens = dict(zip(users, create_users(base_url, len(users))))
+        results = Results()
+        replay = Replay(base_url, records, tokens, results, args.timeout)
+
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        replay.run(args.concurrency, args.speed)
+        elapsed = time.perf_counter() - start
+    finally:
+        stop_stack(processes, tmpdir)
+
+    summary = results.summary(elapsed)
+    report = {
+        "started_at": started_at.isoformat(),
+        "elapsed_s": round(elapsed, 2),
+        "config": {
+            "target": args.target or "spawned",
+            "mongo": args.mongo if args.spawn else None,
+            "mode": "replay",
+            "captures": args.captures,
+            "speed": args.speed,
+            "concurrency": args.concurrency,
+            "llm_latency": args.llm_latency
+        },
+        "captured": traffic,
+        **summary
+    }
+
+    print_summary(summary)
+    output = args.output or os.path.join(RESULTS_DIR, f"replay-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+import argparse
+import http.client
+import json
+import os
+import queue
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from loadtest.fixtures import QUESTIONS, FOLLOW_UPS, GREETINGS, REPORT_REQUESTS, all_questions, sample_audio_path
+
+# Load generator for the AgriGPT API.
+#
+#   python -m loadtest.run --spawn --duration 60 --concurrency 20
+#   python -m loadtest.run --spawn --rate 15 --duration 120 --mix chat_trial=2,report=1
+#   python -m loadtest.run --target http://127.0.0.1:5000 --compare loadtest/results/before.json
+#
+# --spawn starts a throwaway mongod (or mongomock with --mongo mock) and
+# loadtest.server (stub LLM). Without --rate, each of --concurrency workers
+# sends requests back to back (closed loop). With --rate, requests arrive as
+# a Poisson process at that many scenarios/second (open loop); latency is
+# measured from the scheduled arrival, so queueing in the client counts.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "loadtest", "results")
+
+DEFAULT_MIX = "chat_trial=3,chat_auth=3,chat_multi=2,report=1,voice=1,history=2"
+
+
+# -------------------- HTTP --------------------
+
+class Client:
+    """Keep-alive HTTP client for one worker thread"""
+
+    def __init__(self, base_url: str, timeout: float):
+        parsed = urlparse(base_url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body, headers=headers or {})
+                response = self.conn.getresponse()
+                data = response.read()
+                return response.status, data
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # Stale keep-alive connection: reconnect once
+                self.conn.close()
+                self.conn = None
+                if attempt == 2:
+                    raise
+            except Exception:
+                # Refused, timed out...: the connection is mid-request, never reuse it
+                self.conn.close()
+                self.conn = None
+                raise
+
+    def json(self, method: str, path: str, payload=None, token: str = None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = json.dumps(payload).encode() if payload is not None else None
+        status, data = self.request(method, path, body, headers)
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+
+def multipart(field: str, filename: str, content: bytes, content_type: str):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+# -------------------- RESULTS --------------------
+
+class Results:
+    def __init__(self):
+        self.samples = {}  # label -> [(latency_ms, status or None)]
+        self.lock = threading.Lock()
+
+    def record(self, label: str, latency_ms: float, status):
+        with self.lock:
+            self.samples.setdefault(label, []).append((latency_ms, status))
+
+    @staticmethod
+    def _percentile(sorted_values: list, pct: float) -> float:
+        if not sorted_values:
+            return 0.0
+        index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+        return round(sorted_values[index], 1)
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label, samples in sorted(self.samples.items()):
+            latencies = sorted(latency for latency, _ in samples)
+            status_counts = {}
+            for _, status in samples:
+                key = str(status) if status is not None else "exception"
+                status_counts[key] = status_counts.get(key, 0) + 1
+            errors = sum(count for key, count in status_counts.items()
+                         if key == "exception" or int(key) >= 500 or (int(key) >= 400 and key != "429"))
+            rejected = status_counts.get("429", 0)
+            endpoints[label] = {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "errors": errors,
+                "error_rate": round(errors / len(samples), 4),
+                "rate_limited": rejected,
+                "status_counts": status_counts,
+                "latency_ms": {
+                    "p50": self._percentile(latencies, 50),
+                    "p95": self._percentile(latencies, 95),
+                    "p99": self._percentile(latencies, 99),
+                    "mean": round(sum(latencies) / len(latencies), 1),
+                    "max": round(latencies[-1], 1)
+                }
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        total_errors = sum(e["errors"] for e in endpoints.values())
+        return {
+            "endpoints": endpoints,
+            "total": {
+                "requests": total,
+                "throughput_rps": round(total / elapsed, 2),
+                "errors": total_errors,
+                "error_rate": round(total_errors / total, 4) if total else 0.0
+            }
+        }
+
+
+# -------------------- SCENARIOS --------------------
+
+class Scenarios:
+    """Each scenario makes one or more requests, recording each under its own label"""
+
+    def __init__(self, results: Results, users: list, audio: bytes):
+        self.results = results
+        self.users = users
+        self.audio = audio
+
+    def _timed(self, label: str, fn, scheduled: float = None):
+        start = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            status, data = fn()
+        except Exception:
+            status, data = None, None
+        self.results.record(label, (time.perf_counter() - start) * 1000, status)
+        return status, data
+
+    def chat_trial(self, client, scheduled):
+        message = random.choice(GREETINGS) if random.random() < 0.2 else random.choice(all_questions())[1]
+        self._timed("POST /api/chat (trial)",
+                    lambda: client.json("POST", "/api/chat", {"message": message}), scheduled)
+
+    def chat_auth(self, client, scheduled):
+        token = random.choice(self.users)
+        _, message = random.choice(all_questions())
+        self._timed("POST /api/chat (auth)",
+                    lambda: client.json("POST", "/api/chat", {"message": message}, token), scheduled)
+
+    def chat_multi(self, client, scheduled):
+        token = random.choice(self.users)
+        language = random.choice(list(QUESTIONS))
+        status, data = self._timed(
+            "POST /api/chat (multi-turn)",
+            lambda: client.json("POST", "/api/chat", {"message": random.choice(QUESTIONS[language])}, token),
+            scheduled
+        )
+        chat_id = (data or {}).get("chat_id") if status == 200 else None
+        if not chat_id:
+            return
+        for follow_up in random.sample(FOLLOW_UPS, 2):
+            self._timed("POST /api/chat (multi-turn)",
+                        lambda: client.json("POST", "/api/chat", {"message": follow_up, "chat_id": chat_id}, token))
+        self._timed("GET /api/chats/<id>", lambda: client.json("GET", f"/api/chats/{chat_id}", token=token))
+
+    def report(self, client, scheduled):
+        token = random.choice(self.users) if random.random() < 0.7 else None
+        payload = random.choice(REPORT_REQUESTS)
+        self._timed("POST /api/report", lambda: client.json("POST", "/api/report", payload, token), scheduled)
+
+    def voice(self, client, scheduled):
+        token = random.choice(self.users)
+        body, content_type = multipart("audio", "sample.wav", self.audio, "audio/wav")
+        headers = {"Content-Type": content_type, "Authorization": f"Bearer {token}"}
+        self._timed("POST /api/voice", lambda: client.request("POST", "/api/voice", body, headers), scheduled)
+
+    def history(self, client, scheduled):
+        token = random.choice(self.users)
+        path = random.choice(["/api/history", "/api/chats", "/api/reports"])
+        self._timed(f"GET {path}", lambda: client.json("GET", path, token=token), scheduled)
+
+
+def parse_mix(mix: str) -> list:
+    weights = []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights.append((name.strip(), float(weight or 1)))
+    return weights
+
+
+# -------------------- DRIVERS --------------------
+
+def run_closed_loop(base_url, scenarios, mix, concurrency, duration, timeout):
+    names, weights = zip(*mix)
+    deadline = time.monotonic() + duration
+
+    def worker():
+        client = Client(base_url, timeout)
+        while time.monotonic() < deadline:
+            getattr(scenarios, random.choices(names, weights)[0])(client, None)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def run_open_loop(base_url, scenarios, mix, concurrency, duration, rate, timeout):
+    names, weights = zip(*mix)
+    arrivals = queue.Queue()
+    stop = object()
+
+    def worker():
+        client = Client(base_url, timeout)
+        while True:
+            item = arrivals.get()
+            if item is stop:
+                return
+            name, scheduled = item
+            getattr(scenarios, name)(client, scheduled)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+
+    next_arrival = time.perf_counter()
+    end = next_arrival + duration
+    while next_arrival < end:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        arrivals.put((random.choices(names, weights)[0], next_arrival))
+        next_arrival += random.expovariate(rate)
+
+    for _ in threads:
+        arrivals.put(stop)
+    for t in threads:
+        t.join()
+
+
+# -------------------- SETUP --------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url_path: str, base_url: str, timeout: float, want_status: int = 200):
+    client = Client(base_url, 5)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, _ = client.request("GET", url_path)
+            if status == want_status:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{base_url}{url_path} not ready after {timeout}s")
+
+
+def spawn_stack(args, extra_env: dict = None) -> tuple:
+    """Start mongod (unless mock/uri given) and loadtest.server; returns (base_url, processes, tmpdir)"""
+    processes, tmpdir = [], None
+    env = {**os.environ, "LOADTEST_LLM_LATENCY_MS": str(args.llm_latency_ms), **(extra_env or {})}
+    if args.stub_whisper:
+        env["LOADTEST_STUB_WHISPER"] = "true"
+
+    if args.mongo == "mock":
+        env["LOADTEST_MONGO"] = "mock"
+    elif args.mongo == "mongod":
+        mongod = shutil.which("mongod")
+        if not mongod:
+            sys.exit("mongod not found on PATH: install it, use --mongo mock, or --mongo mongodb://...")
+        tmpdir = tempfile.mkdtemp(prefix="agrigpt-loadtest-")
+        mongo_port = free_port()
+        processes.append(subprocess.Popen(
+            [mongod, "--dbpath", tmpdir, "--port", str(mongo_port), "--bind_ip", "127.0.0.1", "--quiet"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        ))
+        env["LOADTEST_MONGO_URI"] = f"mongodb://127.0.0.1:{mongo_port}"
+    else:
+        env["LOADTEST_MONGO_URI"] = args.mongo
+
+    port = free_port()
+    processes.append(subprocess.Popen(
+        [sys.executable, "-m", "loadtest.server", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, start_new_session=True
+    ))
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for("/ready", base_url, args.startup_timeout)
+    except BaseException:
+        # The caller never gets the processes: don't leave them running
+        stop_stack(processes, tmpdir)
+        raise
+    return base_url, processes, tmpdir
+
+
+def _signal_group(process, sig):
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def stop_stack(processes: list, tmpdir: str = None):
+    """Terminate what spawn_stack started (newest first) and remove its data directory"""
+    for process in reversed(processes):
+        # Each runs in its own session: signal the group, so the server's
+        # bcrypt/PDF pool processes exit with it instead of holding our stdout
+        _signal_group(process, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            _signal_group(process, signal.SIGKILL)
+            process.wait()
+    if tmpdir:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def create_users(base_url: str, count: int) -> list:
+    client = Client(base_url, 30)
+    run_id = uuid.uuid4().hex[:8]
+    tokens = []
+    for i in range(count):
+        status, data = client.json("POST", "/api/signup", {
+            "email": f"loadtest-{run_id}-{i}@example.com",
+            "password": "loadtest-password",
+            "name": f"Load Test {i}"
+        })
+        if status != 200:
+            raise RuntimeError(f"Signup failed ({status}): {data}")
+        tokens.append(data["token"])
+    return tokens
+
+
+def compare(current: dict, previous_path: str):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nCompared with {previous_path}:")
+    print(f"{'endpoint':<34}{'p95 ms':>18}{'rps':>18}{'error rate':>20}")
+    for label, now in current["endpoints"].items():
+        before = previous["endpoints"].get(label)
+        if not before:
+            continue
+        print(f"{label:<34}"
+              f"{before['latency_ms']['p95']:>8} → {now['latency_ms']['p95']:<8}"
+              f"{before['throughput_rps']:>8} → {now['throughput_rps']:<8}"
+              f"{before['error_rate']:>9} → {now['error_rate']:<9}")
+
+
+def print_summary(summary: dict):
+    print(f"\n{'endpoint':<34}{'reqs':>7}{'rps':>8}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for label, e in summary["endpoints"].items():
+        lat = e["latency_ms"]
+        print(f"{label:<34}{e['requests']:>7}{e['throughput_rps']:>8}{e['error_rate'] * 100:>6.1f}%"
+              f"{lat['p50']:>9}{lat['p95']:>9}{lat['p99']:>9}")
+    t = summary["total"]
+    print(f"{'TOTAL':<34}{t['requests']:>7}{t['throughput_rps']:>8}{t['error_rate'] * 100:>6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AgriGPT load test")
+    parser.add_argument("--target", help="base URL of a running server (default: --spawn one)")
+    parser.add_argument("--spawn", action="store_true", help="start mongod + loadtest.server locally")
+    parser.add_argument("--mongo", default="mongod", help="mongod (throwaway), mock (mongomock) or a mongodb:// URI")
+    parser.add_argument("--stub-whisper", action="store_true", help="skip real Whisper inference")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="stub LLM latency")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rate", type=float, help="open-loop arrival rate (scenarios/second)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. chat_trial=3,report=1")
+    parser.add_argument("--users", type=int, default=10, help="authenticated users to create")
+    parser.add_argument("--audio", help="WAV/MP3 to upload to /api/voice (default: bundled sample)")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout")
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--output", help="results JSON path (default: loadtest/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    if not args.target and not args.spawn:
+        parser.error("give --target URL or --spawn")
+
+    processes, tmpdir = [], None
+    try:
+        if args.spawn:
+            base_url, processes, tmpdir = spawn_stack(args)
+        else:
+            base_url = args.target.rstrip("/")
+
+        mix = parse_mix(args.mix)
+        with open(args.audio or sample_audio_path(), "rb") as f:
+            audio = f.read()
+        users = create_users(base_url, args.users)
+        results = Results()
+        scenarios = Scenarios(results, users, audio)
+
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        if args.rate:
+            run_open_loop(base_url, scenarios, mix, args.concurrency, args.duration, args.rate, args.timeout)
+        else:
+            run_closed_loop(base_url, scenarios, mix, args.concurrency, args.duration, args.timeout)
+        elapsed = time.perf_counter() - start
+    finally:
+        stop_stack(processes, tmpdir)
+
+    summary = results.summary(elapsed)
+    report = {
+        "started_at": started_at.isoformat(),
+        "elapsed_s": round(elapsed, 2),
+        "config": {
+            "target": args.target or "spawned",
+            "mongo": args.mongo if args.spawn else None,
+            "mode": "open" if args.rate else "closed",
+            "rate": args.rate,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "mix": dict(mix),
+            "users": args.users,
+            "llm_latency_ms": args.llm_latency_ms if args.spawn else None,
+            "stub_whisper": args.stub_whisper
+        },
+        **summary
+    }
+
+    print_summary(summary)
+    output = args.output or os.path.join(RESULTS_DIR, f"{started_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
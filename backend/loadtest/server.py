@@ -0,0 +1,128 @@
+import os
+import random
+import time
+
+# The Flask app wired to local stand-ins for load testing:
+# - Gemini is replaced by a stub with configurable latency
+# - MongoDB is whatever LOADTEST_MONGO_URI points at (the runner starts a
+#   throwaway mongod), or mongomock in-process with LOADTEST_MONGO=mock
+# - Whisper runs for real unless LOADTEST_STUB_WHISPER=true
+# - With LOADTEST_REPLAY=<capture dir or files>, LLM calls made while serving
+#   a request sent with X-Replay-Id return the captured responses instead
+#
+#   python -m loadtest.server --port 5099          (threaded dev server)
+#   gunicorn -c gunicorn_preload.py loadtest.server:app
+
+STUB_LLM_LATENCY_MS = float(os.environ.get("LOADTEST_LLM_LATENCY_MS", "800"))
+STUB_LLM_JITTER = float(os.environ.get("LOADTEST_LLM_JITTER", "0.3"))
+
+# Defaults that make sense for a local run; anything set explicitly wins
+_ENV_DEFAULTS = {
+    "GEMINI_API_KEY": "loadtest",
+    "MONGO_URI": os.environ.get("LOADTEST_MONGO_URI", "mongodb://127.0.0.1:27018"),
+    "MONGO_DB": "agrigpt_loadtest",
+    "JWT_SECRET_KEY": "loadtest-secret",
+    "EMAIL_ID": "loadtest@example.com",
+    "EMAIL_APP_PASSWORD": "loadtest",
+    "BCRYPT_ROUNDS": "4",
+    "RATE_LIMIT_ENABLED": "false",
+    "SEMANTIC_CACHE_ENABLED": "false",
+    "READY_COMPONENTS": "langdetect,mongo",
+    "LOG_LEVEL": "WARNING"
+}
+for name, value in _ENV_DEFAULTS.items():
+    os.environ.setdefault(name, value)
+
+if os.environ.get("LOADTEST_MONGO") == "mock":
+    # mongomock lacks update pipelines: keep limiter/coalescing in process
+    import mongomock
+    import pymongo
+    pymongo.MongoClient = mongomock.MongoClient
+    os.environ["RATE_LIMIT_BACKEND"] = "memory"
+    os.environ["LLM_COALESCE_CROSS_WORKER"] = "false"
+    os.environ["READY_COMPONENTS"] = "langdetect"
+
+
+def _stub_sleep():
+    jitter = random.uniform(1 - STUB_LLM_JITTER, 1 + STUB_LLM_JITTER)
+    time.sleep(STUB_LLM_LATENCY_MS * jitter / 1000)
+
+
+def stub_generate(prompt: str, chat_history: list, route: str, prefix: str) -> str:
+    """Stands in for llm_service._generate: canned text per route, after a realistic delay"""
+    from report import REPORT_SECTIONS
+    _stub_sleep()
+    if route == "classification":
+        return "YES"
+    if route in ("report", "translation"):
+        sections = []
+        for header, _ in REPORT_SECTIONS:
+            sections.append(f"{header}:")
+            sections.extend(f"- Stub advice line {i} for load testing purposes only" for i in range(1, 5))
+        return "\n".join(sections)
+    if route == "greeting":
+        return "Hello! I am AgriGPT. Ask me anything about farming."
+    return ("For paddy, apply a basal dose of NPK at transplanting, top-dress urea at "
+            "tillering and panicle initiation, and keep 5 cm of standing water. " * 3).strip()
+
+
+class _StubSegment:
+    text = "ଧାନ ଚାଷରେ କେଉଁ ସାର ଦେବା ଉଚିତ"
+
+
+class _StubInfo:
+    language = "or"
+
+
+class StubWhisperModel:
+    def transcribe(self, audio, **kwargs):
+        time.sleep(0.2)
+        return iter([_StubSegment()]), _StubInfo()
+
+
+class Replayer:
+    """Serves captured LLM responses, per captured request, in call order"""
+
+    def __init__(self, paths: list, recorded_latency: bool):
+        from loadtest.replay import read_captures
+        self.calls = {record["id"]: record.get("llm", []) for record in read_captures(paths)}
+        self.recorded_latency = recorded_latency
+
+    def generate(self, prompt: str, chat_history: list, route: str, prefix: str) -> str:
+        from flask import g, request, has_request_context
+        from services.capture_service import REPLAY_HEADER
+        calls = self.calls.get(request.headers.get(REPLAY_HEADER)) if has_request_context() else None
+        if calls:
+            # Next unused recorded call for this route
+            used = g.setdefault("replay_used", set())
+            for index, call in enumerate(calls):
+                if index not in used and call["route"] == route:
+                    used.add(index)
+                    if self.recorded_latency:
+                        time.sleep(call["ms"] / 1000)
+                    return call["text"]
+        return stub_generate(prompt, chat_history, route, prefix)
+
+
+import services.llm_service as llm_service  # noqa: E402
+if os.environ.get("LOADTEST_REPLAY"):
+    llm_service._generate = Replayer(
+        os.environ["LOADTEST_REPLAY"].split(os.pathsep),
+        os.environ.get("LOADTEST_REPLAY_LATENCY", "recorded") == "recorded"
+    ).generate
+else:
+    llm_service._generate = stub_generate
+
+if os.environ.get("LOADTEST_STUB_WHISPER", "false").lower() == "true":
+    import voice  # noqa: E402
+    voice.get_whisper_model = lambda: StubWhisperModel()
+
+from app import app  # noqa: E402,F401
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="AgriGPT app with stubbed LLM for load testing")
+    parser.add_argument("--port", type=int, default=5099)
+    args = parser.parse_args()
+    app.run(host="127.0.0.1", port=args.port, threaded=True)
@@ -1,6 +1,18 @@
 from services.llm_service import get_ai_response
 from services.db_service import save_report
+from services.report_cache_service import (
+    get_canonical_report,
+    save_canonical_report,
+    save_translation
+)
+from services.prompt_service import REPORT_PREFIX, TRANSLATION_PREFIX, build_report_suffix
+from services.metrics_service import REPORT_PARSE_SECONDS
+from utils.config import REPORT_TRANSLATION_MODE, REPORT_CANONICAL_LANGUAGE
+from utils.log import get_logger
 from langdetect import detect
+import logging
+
+logger = get_logger(__name__)
 
 # Language mapping
 LANGUAGE_MAP = {
@@ -19,6 +31,18 @@ LANGUAGE_MAP = {
     "as": "Assamese"
 }
 
+# Lower-cased name -> canonical name, for validating requested languages
+SUPPORTED_LANGUAGES = {name.casefold(): name for name in LANGUAGE_MAP.values()}
+
+# Section headers used in prompts, in the order parse_report_response expects
+REPORT_SECTIONS = [
+    ("SOWING_ADVICE", "sowingAdvice"),
+    ("FERTILIZER_PLAN", "fertilizerPlan"),
+    ("WEATHER_TIPS", "weatherTips"),
+    ("FARMING_CALENDAR", "calendar")
+]
+
+
 def detect_language(text: str) -> str:
     """Detect language from text"""
     # Odia Unicode block
@@ -32,128 +56,155 @@ def detect_language(text: str) -> str:
         return "English"
 
 
+def normalize_language(language: str):
+    """Canonical name of a supported language ("hindi " -> "Hindi"), or None"""
+    if not isinstance(language, str):
+        return None
+    return SUPPORTED_LANGUAGES.get(language.strip().casefold())
+
+
 def generate_farming_report(user_id: str, crop_name: str, region: str, language: str = None) -> dict:
     """Generate comprehensive farming report using Gemini AI"""
     
     if not crop_name or not region:
         return {"error": "Crop name and region are required"}
 
-    # Use provided language or detect from input
-    if not language:
+    # Use provided language (canonical spelling if supported) or detect from input
+    if language:
+        language = normalize_language(language) or language
+    else:
         language = detect_language(f"{crop_name} {region}")
     
-    print(f"\n{'='*60}")
-    print(f"📊 Generating Report:")
-    print(f"   Crop: {crop_name}")
-    print(f"   Region: {region}")
-    print(f"   Language: {language}")
-    print(f"   User: {user_id}")
-    print(f"{'='*60}")
-
-    # Language-specific instruction
-    lang_instruction = f"Write EVERY single word in {language} language ONLY. Do NOT mix any other language."
-    if language == "English":
-        lang_instruction = "Write EVERY word in English only. Do NOT use Hindi, Odia, or any other language."
-    elif language == "Hindi":
-        lang_instruction = "हर शब्द केवल हिंदी में लिखें। अंग्रेजी या अन्य भाषा का उपयोग न करें।"
-
-    prompt = f"""You are an expert agricultural advisor for Indian farmers.
-
-**CRITICAL REQUIREMENT:**
-{lang_instruction}
-
-Generate a detailed farming report for:
-- Crop: {crop_name}
-- Region: {region}
-
-Provide exactly 4 points for each of these 4 categories (write in {language} only):
-
-**Category 1 - Sowing Advice:**
-- Best sowing time and season
-- Seed depth and spacing
-- Row spacing
-- Watering after sowing
-Start each point with these emojis in order: 🌱 📏 🌾 💧
-
-**Category 2 - Fertilizer Plan:**
-- Nitrogen quantity (kg/hectare)
-- Phosphorus quantity
-- Potash quantity
-- Organic manure recommendations
-Start each point with these emojis in order: 🧪 🟡 🔴 🌿
-
-**Category 3 - Weather Protection:**
-- Sun/heat protection
-- Rain/drainage management
-- Cold weather protection
-- Wind protection
-Start each point with these emojis in order: ☀️ 🌧️ ❄️ 🌪️
-
-**Category 4 - Farming Calendar:**
-- Week 1-2 activities
-- Week 3-4 activities
-- Week 5-8 activities
-- Week 12-16 harvest
-Start each point with these emojis in order: 📅 🌱 💧 🌾
-
-**IMPORTANT:** Format your response EXACTLY like this:
-
-SOWING_ADVICE:
-🌱 [advice in {language}]
-📏 [advice in {language}]
-🌾 [advice in {language}]
-💧 [advice in {language}]
-
-FERTILIZER_PLAN:
-🧪 [plan in {language}]
-🟡 [plan in {language}]
-🔴 [plan in {language}]
-🌿 [plan in {language}]
-
-WEATHER_TIPS:
-☀️ [tip in {language}]
-🌧️ [tip in {language}]
-❄️ [tip in {language}]
-🌪️ [tip in {language}]
-
-FARMING_CALENDAR:
-📅 [schedule in {language}]
-🌱 [schedule in {language}]
-💧 [schedule in {language}]
-🌾 [schedule in {language}]
-"""
+    logger.info("Generating report", extra={
+        "crop": crop_name, "region": region, "language": language, "user_id": user_id
+    })
 
     try:
-        # Get AI response
-        response = get_ai_response(prompt)
-        
-        # Debug output
-        print(f"\n✓ AI Response received ({len(response)} chars)")
-        print(f"First 200 chars: {response[:200]}...")
-        
-        # Parse the response
-        report_data = parse_report_response(response, crop_name, region, language)
+        if REPORT_TRANSLATION_MODE:
+            # Canonical report + cached translation
+            report_data = get_translated_report(crop_name, region, language)
+        else:
+            # Full generation in the requested language
+            response = get_ai_response(
+                build_report_suffix(crop_name, region, language),
+                route="report",
+                prefix=REPORT_PREFIX
+            )
+
+            logger.debug("Report response received (%d chars): %.200s", len(response), response)
+
+            # Parse the response
+            report_data = parse_report_response(response, crop_name, region, language)
         
         # Save to database (only for authenticated users)
         if user_id != "trial_user":
             try:
                 save_report(user_id, crop_name, region, report_data, language)
-                print(f"✓ Report saved to database for user: {user_id}")
             except Exception as e:
-                print(f"⚠️ Failed to save report: {e}")
+                logger.warning("Failed to save report: %s", e, extra={"user_id": user_id})
 
-        print(f"✓ Report generated successfully")
-        print(f"{'='*60}\n")
+        logger.info("Report generated", extra={"crop": crop_name, "language": language})
         
         return report_data
 
     except Exception as e:
-        print(f"❌ Error generating report: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error generating report: %s", e)
         return {"error": f"Failed to generate report: {str(e)}"}
 
 
+def build_report_prompt(crop_name: str, region: str, language: str) -> str:
+    """Build the full agronomy report prompt for a crop/region in one language"""
+    return REPORT_PREFIX + build_report_suffix(crop_name, region, language)
+
+
+def format_report_sections(report: dict) -> str:
+    """Render a structured report back into the section format parse_report_response reads"""
+    lines = []
+    for header, key in REPORT_SECTIONS:
+        lines.append(f"{header}:")
+        lines.extend(report.get(key, []))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def build_translation_prompt(report: dict, language: str) -> str:
+    """Build the per-request part of the translation prompt for an already generated report"""
+    return f"""
+**Target language:** {language}
+
+Translate the following farming report into {language}:
+
+{format_report_sections(report)}"""
+
+
+def _has_all_sections(response: str) -> bool:
+    """Check that the model returned every section (so fallback data is never cached)"""
+    return all(header in response for header, _ in REPORT_SECTIONS)
+
+
+def get_translated_report(crop_name: str, region: str, language: str) -> dict:
+    """
+    Get a report by translating the cached canonical report for the crop/region.
+    The canonical report is generated once (in REPORT_CANONICAL_LANGUAGE) and each
+    translation is cached per language until the canonical report is replaced.
+    """
+    # Only supported language names (canonical spelling) key cached translations
+    language = normalize_language(language) or language
+    cacheable = normalize_language(language) is not None
+
+    cached = get_canonical_report(crop_name, region)
+
+    if not cached:
+        logger.info("No canonical report cached, generating in %s", REPORT_CANONICAL_LANGUAGE)
+        response = get_ai_response(
+            build_report_suffix(crop_name, region, REPORT_CANONICAL_LANGUAGE),
+            route="report",
+            prefix=REPORT_PREFIX
+        )
+        canonical = parse_report_response(response, crop_name, region, REPORT_CANONICAL_LANGUAGE)
+
+        if not _has_all_sections(response):
+            # Don't cache incomplete output, just translate what we have
+            logger.warning("Canonical report incomplete, not caching", extra={"crop": crop_name, "region": region})
+            version = None
+        else:
+            try:
+                version = save_canonical_report(crop_name, region, REPORT_CANONICAL_LANGUAGE, canonical)
+            except Exception as e:
+                # The report itself is fine; just serve it uncached
+                logger.error("Error caching canonical report: %s", e)
+                version = None
+        canonical_language = REPORT_CANONICAL_LANGUAGE
+        translations = {}
+    else:
+        canonical = cached["canonical"]
+        version = cached["version"]
+        canonical_language = cached.get("canonical_language", REPORT_CANONICAL_LANGUAGE)
+        translations = cached.get("translations", {})
+        logger.debug("Using cached canonical report (v%s)", version)
+
+    if language == canonical_language:
+        return {**canonical, "crop": crop_name, "region": region, "language": language}
+
+    if cacheable and language in translations:
+        logger.debug("Using cached %s translation", language)
+        return {**translations[language], "crop": crop_name, "region": region, "language": language}
+
+    logger.info("Translating canonical report into %s", language)
+    response = get_ai_response(
+        build_translation_prompt(canonical, language),
+        route="translation",
+        prefix=TRANSLATION_PREFIX
+    )
+    report_data = parse_report_response(response, crop_name, region, language)
+
+    if version is not None and cacheable and _has_all_sections(response):
+        save_translation(crop_name, region, version, language, report_data)
+
+    return report_data
+
+
+@REPORT_PARSE_SECONDS.time()
 def parse_report_response(response: str, crop_name: str, region: str, language: str) -> dict:
     """Parse AI response into structured report data"""
     
@@ -167,9 +218,10 @@ def parse_report_response(response: str, crop_name: str, region: str, language:
         "calendar": []
     }
 
+    # Per-line output is only built when DEBUG is on (this runs for every report)
+    debug = logger.isEnabledFor(logging.DEBUG)
+
     try:
-        print(f"\n🔍 Parsing response...")
-        
         # Section header patterns
         section_map = {
             "sowingAdvice": ["SOWING_ADVICE", "SOWING ADVICE", "Sowing Advice"],
@@ -192,7 +244,8 @@ def parse_report_response(response: str, crop_name: str, region: str, language:
                 if any(pattern in line for pattern in patterns):
                     current_section = section_key
                     section_found = True
-                    print(f"  ✓ Found section: {section_key}")
+                    if debug:
+                        logger.debug("Found section: %s", section_key)
                     break
             
             if section_found:
@@ -210,19 +263,21 @@ def parse_report_response(response: str, crop_name: str, region: str, language:
                     continue
                 
                 report[current_section].append(cleaned)
-                print(f"    → {section_key}: {cleaned[:60]}...")
+                if debug:
+                    logger.debug("%s: %.60s", current_section, cleaned)
 
-        # Show parsing results
-        print(f"\n📊 Parse Results:")
-        print(f"  Sowing: {len(report['sowingAdvice'])} items")
-        print(f"  Fertilizer: {len(report['fertilizerPlan'])} items")
-        print(f"  Weather: {len(report['weatherTips'])} items")
-        print(f"  Calendar: {len(report['calendar'])} items")
+        if debug:
+            logger.debug("Parse results", extra={
+                "sowing": len(report['sowingAdvice']),
+                "fertilizer": len(report['fertilizerPlan']),
+                "weather": len(report['weatherTips']),
+                "calendar": len(report['calendar'])
+            })
 
         # Use fallback if any section is empty
         if not all([report['sowingAdvice'], report['fertilizerPlan'], 
                    report['weatherTips'], report['calendar']]):
-            print(f"⚠️ Some sections empty, using fallback data")
+            logger.warning("Some report sections empty, using fallback data", extra={"crop": crop_name})
             fallback = get_fallback_data(crop_name, language)
             
             if not report['sowingAdvice']:
@@ -237,9 +292,7 @@ def parse_report_response(response: str, crop_name: str, region: str, language:
         return report
 
     except Exception as e:
-        print(f"❌ Parse error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Report parse error: %s", e)
         return {
             "crop": crop_name,
             "region": region,
@@ -3,10 +3,27 @@ from services.auth_service import signup_user, login_user, update_user_profile,
 import jwt
 from functools import wraps
 from utils.config import JWT_SECRET_KEY
+from services.password_service import PasswordServiceBusy
+from services.rate_limit_service import admission_control, sliding_window, client_ip, request_email
+from utils.config import (
+    RATE_LIMIT_LOGIN_IP,
+    RATE_LIMIT_LOGIN_EMAIL,
+    RATE_LIMIT_OTP_IP,
+    RATE_LIMIT_OTP_EMAIL,
+    RATE_LIMIT_OTP_VERIFY_EMAIL
+)
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api")
 
 
+def busy_response(e: PasswordServiceBusy):
+    """503 with Retry-After when password hashing is saturated"""
+    response = jsonify({"error": str(e)})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+
 def verify_token(token):
     """Verify JWT token and return payload if valid, None otherwise"""
     try:
@@ -32,19 +49,28 @@ def token_required(f):
 
 
 @auth_bp.route("/signup", methods=["POST"])
+@admission_control(sliding_window("signup_ip", RATE_LIMIT_LOGIN_IP, client_ip))
 def signup():
     try:
         data = request.get_json()
         return jsonify(signup_user(data["email"], data["password"], data.get("name")))
+    except PasswordServiceBusy as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
 
 @auth_bp.route("/login", methods=["POST"])
+@admission_control(
+    sliding_window("login_ip", RATE_LIMIT_LOGIN_IP, client_ip),
+    sliding_window("login_email", RATE_LIMIT_LOGIN_EMAIL, request_email)
+)
 def login():
     try:
         data = request.get_json()
         return jsonify(login_user(data["email"], data["password"]))
+    except PasswordServiceBusy as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 401
 
@@ -74,6 +100,8 @@ def change_password():
         user_id = request.current_user["user_id"]
         result = change_user_password(user_id, data.get("currentPassword"), data.get("newPassword"))
         return jsonify(result)
+    except PasswordServiceBusy as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -90,6 +118,10 @@ def delete_account():
 
 
 @auth_bp.route("/send-otp", methods=["POST"])
+@admission_control(
+    sliding_window("otp_ip", RATE_LIMIT_OTP_IP, client_ip),
+    sliding_window("otp_email", RATE_LIMIT_OTP_EMAIL, request_email)
+)
 def send_otp():
     try:
         data = request.get_json()
@@ -105,6 +137,7 @@ def send_otp():
 
 
 @auth_bp.route("/verify-otp", methods=["POST"])
+@admission_control(sliding_window("otp_verify_email", RATE_LIMIT_OTP_VERIFY_EMAIL, request_email))
 def verify_otp():
     try:
         data = request.get_json()
@@ -1,11 +1,27 @@
 from flask import Blueprint, request, jsonify
-from services.otp_service import create_and_send_otp
+from services.otp_service import (
+    create_and_send_otp,
+    verify_otp as verify_otp_record,
+    OTPVerificationError,
+    get_otp_status,
+    get_otp_indexes
+)
 from services.db_service import db
+from services.email_service import get_email_stats
+from services.rate_limit_service import admission_control, sliding_window, client_ip, request_email
+from utils.config import RATE_LIMIT_OTP_IP, RATE_LIMIT_OTP_EMAIL, RATE_LIMIT_OTP_VERIFY_EMAIL
 from datetime import datetime
+from utils.log import get_logger
+
+logger = get_logger(__name__)
 
 otp_bp = Blueprint("otp", __name__)
 
 @otp_bp.route("/api/send-otp", methods=["POST"])
+@admission_control(
+    sliding_window("otp_ip", RATE_LIMIT_OTP_IP, client_ip),
+    sliding_window("otp_email", RATE_LIMIT_OTP_EMAIL, request_email)
+)
 def send_otp():
     try:
         data = request.json
@@ -22,10 +38,11 @@ def send_otp():
         }), 200
         
     except Exception as e:
-        print(f"❌ Error in send_otp endpoint: {str(e)}")
+        logger.error("Error in send_otp endpoint: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @otp_bp.route("/api/verify-otp", methods=["POST"])
+@admission_control(sliding_window("otp_verify_email", RATE_LIMIT_OTP_VERIFY_EMAIL, request_email))
 def verify_otp():
     try:
         data = request.json
@@ -33,36 +50,17 @@ def verify_otp():
         if not data or "email" not in data or "otp" not in data:
             return jsonify({"error": "Email and OTP are required"}), 400
 
-        print(f"🔍 Verifying OTP for email: {data['email']}")
-        
-        # Check total OTP records for debugging
-        total_otps = db.otp_verifications.count_documents({"email": data["email"]})
-        print(f"📊 Total OTP records for {data['email']}: {total_otps}")
-        
-        record = db.otp_verifications.find_one({
-            "email": data["email"],
-            "otp": data["otp"],
-            "verified": False
-        })
-
-        if not record:
-            print(f"❌ No matching OTP found for {data['email']}")
-            return jsonify({"error": "Invalid OTP"}), 400
+        logger.debug("Verifying OTP for email: %s", data['email'])
 
-        if record["expires_at"] < datetime.utcnow():
-            print(f"⏰ OTP expired for {data['email']}")
-            return jsonify({"error": "OTP expired"}), 400
+        try:
+            verify_otp_record(data["email"], data["otp"])
+        except OTPVerificationError as e:
+            return jsonify({"error": str(e)}), 400
 
-        db.otp_verifications.update_one(
-            {"_id": record["_id"]},
-            {"$set": {"verified": True}}
-        )
-        
-        print(f"✅ OTP verified successfully for {data['email']}")
         return jsonify({"message": "OTP verified successfully"}), 200
         
     except Exception as e:
-        print(f"❌ Error in verify_otp endpoint: {str(e)}")
+        logger.error("Error in verify_otp endpoint: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -72,29 +70,25 @@ def verify_otp():
 def otp_status():
     """Get OTP collection status (for debugging)"""
     try:
-        total_otps = db.otp_verifications.count_documents({})
-        verified_otps = db.otp_verifications.count_documents({"verified": True})
-        unverified_otps = db.otp_verifications.count_documents({"verified": False})
-        expired_otps = db.otp_verifications.count_documents({
-            "expires_at": {"$lt": datetime.utcnow()}
-        })
+        counts = get_otp_status()
         
         # Check if TTL index exists
-        indexes = list(db.otp_verifications.list_indexes())
+        indexes = get_otp_indexes()
         ttl_index_exists = any(idx.get("expireAfterSeconds") is not None for idx in indexes)
         
         return jsonify({
             "collection": "otp_verifications",
-            "total_documents": total_otps,
-            "verified": verified_otps,
-            "unverified": unverified_otps,
-            "expired": expired_otps,
+            "total_documents": counts["total"],
+            "verified": counts["verified"],
+            "unverified": counts["unverified"],
+            "expired": counts["expired"],
             "ttl_index_enabled": ttl_index_exists,
-            "indexes": [{"name": idx["name"], "key": idx["key"]} for idx in indexes]
+            "indexes": [{"name": idx["name"], "key": idx["key"]} for idx in indexes],
+            "email_delivery": get_email_stats()
         }), 200
         
     except Exception as e:
-        print(f"❌ Error in otp_status endpoint: {str(e)}")
+        logger.error("Error in otp_status endpoint: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -106,7 +100,7 @@ def cleanup_expired_otps():
             "expires_at": {"$lt": datetime.utcnow()}
         })
         
-        print(f"🧹 Cleaned up {result.deleted_count} expired OTP records")
+        logger.info("Cleaned up %s expired OTP records", result.deleted_count)
         
         return jsonify({
             "message": "Cleanup completed",
@@ -114,5 +108,5 @@ def cleanup_expired_otps():
         }), 200
         
     except Exception as e:
-        print(f"❌ Error in cleanup_expired_otps endpoint: {str(e)}")
+        logger.error("Error in cleanup_expired_otps endpoint: %s", e)
         return jsonify({"error": str(e)}), 500
@@ -1,19 +1,24 @@
-import jwt, bcrypt
+import jwt
 import random
 from datetime import datetime, timedelta, timezone
 from utils.config import JWT_SECRET_KEY, JWT_EXPIRY_HOURS
-from services.db_service import user_collection, chat_collection, report_collection, db
+from services.db_service import user_collection, chat_collection, report_collection
 from bson import ObjectId
+from services.password_service import hash_password, check_password, needs_rehash, record_rehash, PasswordServiceBusy
 
 # Import the proper OTP service functions
 from services.otp_service import create_and_send_otp as otp_create_and_send
+from services.otp_service import verify_otp as otp_verify, OTPVerificationError
+from utils.log import get_logger
+
+logger = get_logger(__name__)
 
 
 def signup_user(email, password, name):
     if user_collection.find_one({"email": email}):
         raise Exception("User already exists")
 
-    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt())
+    hashed = hash_password(password)
 
     user = {
         "email": email,
@@ -40,13 +45,20 @@ def login_user(email, password):
     user = user_collection.find_one({"email": email})
     if not user:
         raise Exception("User not registered")
-    if not bcrypt.checkpw(password.encode(), user["password"]):
+    if not check_password(password, user["password"]):
         raise Exception("Invalid credentials")
 
     # Update last login timestamp
+    update = {"last_login": datetime.utcnow()}
+
+    # Transparently upgrade hashes made with a different bcrypt cost
+    if needs_rehash(user["password"]):
+        update["password"] = hash_password(password)
+        record_rehash()
+
     user_collection.update_one(
         {"_id": user["_id"]},
-        {"$set": {"last_login": datetime.utcnow()}}
+        {"$set": update}
     )
 
     token = generate_token(str(user["_id"]))
@@ -114,11 +126,11 @@ def change_user_password(user_id, current_password, new_password):
             raise Exception("User not found")
 
         # Verify current password
-        if not bcrypt.checkpw(current_password.encode(), user["password"]):
+        if not check_password(current_password, user["password"]):
             raise Exception("Current password is incorrect")
 
         # Hash new password
-        hashed_new_password = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt())
+        hashed_new_password = hash_password(new_password)
 
         # Update password in database
         result = user_collection.update_one(
@@ -133,6 +145,8 @@ def change_user_password(user_id, current_password, new_password):
             "success": True,
             "message": "Password changed successfully"
         }
+    except PasswordServiceBusy:
+        raise
     except Exception as e:
         raise Exception(str(e))
 
@@ -147,18 +161,18 @@ def delete_user_account(user_id):
 
         # Delete all chat history for this user
         chat_delete_result = chat_collection.delete_many({"user_id": user_id})
-        print(f"✓ Deleted {chat_delete_result.deleted_count} chat records for user: {user_id}")
+        logger.info("Deleted %s chat records for user: %s", chat_delete_result.deleted_count, user_id)
 
         # Delete all farming reports for this user
         report_delete_result = report_collection.delete_many({"user_id": user_id})
-        print(f"✓ Deleted {report_delete_result.deleted_count} report records for user: {user_id}")
+        logger.info("Deleted %s report records for user: %s", report_delete_result.deleted_count, user_id)
 
         # Delete the user account
         user_delete_result = user_collection.delete_one({"_id": ObjectId(user_id)})
         if user_delete_result.deleted_count == 0:
             raise Exception("Failed to delete user account")
 
-        print(f"✓ User account deleted successfully: {user_id}")
+        logger.info("User account deleted successfully: %s", user_id)
 
         return {
             "success": True,
@@ -197,31 +211,14 @@ def send_otp_email(email):
 def verify_otp_code(email, otp):
     """Verify OTP code"""
     try:
-        print(f"🔍 Verifying OTP for email: {email}")
-        
-        # Find OTP in database
-        record = db.otp_verifications.find_one({
-            "email": email,
-            "otp": otp,
-            "verified": False
-        })
+        logger.debug("Verifying OTP for email: %s", email)
 
-        if not record:
-            print(f"❌ No matching OTP found for {email}")
+        try:
+            otp_verify(email, otp)
+        except OTPVerificationError as e:
+            if e.expired:
+                raise Exception("OTP has expired. Please request a new one.")
             raise Exception("Invalid OTP. Please try again.")
-
-        # Check if OTP has expired
-        if record["expires_at"] < datetime.utcnow():
-            print(f"⏰ OTP expired for {email}")
-            raise Exception("OTP has expired. Please request a new one.")
-
-        # Mark OTP as verified
-        db.otp_verifications.update_one(
-            {"_id": record["_id"]},
-            {"$set": {"verified": True}}
-        )
-        
-        print(f"✅ OTP verified successfully for {email}")
         
         return {
             "success": True,
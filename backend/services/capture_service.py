@@ -0,0 +1,172 @@
+import glob
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import queue
+import random
+import re
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import request, g, has_request_context
+from utils.config import (
+    CAPTURE_ENABLED,
+    CAPTURE_DIR,
+    CAPTURE_SAMPLE_RATE,
+    CAPTURE_MAX_MB,
+    CAPTURE_MAX_FILES,
+    JWT_SECRET_KEY
+)
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Traffic capture for replay (see loadtest/replay.py). One JSON line per request:
+# {
+#   "id": "<uuid>",
+#   "ts": "2026-01-01T00:00:00+00:00",
+#   "endpoint": "chat_api" | "report_api",
+#   "user": "<pseudonym>" | null,          # HMAC of the user_id, null for trial users
+#   "body": {...},                         # sanitized request JSON
+#   "status": 200,
+#   "duration_ms": 812.4,
+#   "response": {"chat_id": "<pseudonym>", "language": "Hindi", "chars": 512},
+#   "llm": [{"route": "chat", "ms": 790.1, "text": "..."}]   # in call order
+# }
+# Tokens, headers and IPs are never written; user and chat IDs are pseudonymized
+# and emails/phone/ID numbers in free text are masked. Files are per worker
+# (capture-<pid>.jsonl) and gzipped when they reach CAPTURE_MAX_MB.
+
+CAPTURED_ENDPOINTS = {"chat_api", "report_api"}
+BODY_FIELDS = {
+    "chat_api": ("message", "chat_id"),
+    "report_api": ("cropName", "region", "language")
+}
+REPLAY_HEADER = "X-Replay-Id"
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_LONG_NUMBER = re.compile(r"\+?\d[\d\s-]{8,}\d")
+
+_queue = queue.Queue(maxsize=10000)
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def pseudonym(value: str):
+    """Stable, non-reversible stand-in for a user or chat ID"""
+    if not value:
+        return None
+    return hmac.new(JWT_SECRET_KEY.encode(), str(value).encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def sanitize_text(text):
+    if not isinstance(text, str):
+        return text
+    return _LONG_NUMBER.sub("<number>", _EMAIL.sub("<email>", text))
+
+
+# -------------------- WRITER --------------------
+
+def _current_path() -> str:
+    return os.path.join(CAPTURE_DIR, f"capture-{os.getpid()}.jsonl")
+
+
+def _rotate(path: str):
+    """Gzip the full file aside and drop the oldest archives beyond CAPTURE_MAX_FILES"""
+    archive = f"{path[:-len('.jsonl')]}-{int(time.time())}.jsonl.gz"
+    with open(path, "rb") as src, gzip.open(archive, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(path)
+    archives = sorted(glob.glob(os.path.join(CAPTURE_DIR, "capture-*.jsonl.gz")), key=os.path.getmtime)
+    for old in archives[:-CAPTURE_MAX_FILES]:
+        os.remove(old)
+
+
+def _writer():
+    os.makedirs(CAPTURE_DIR, exist_ok=True)
+    max_bytes = CAPTURE_MAX_MB * 1024 * 1024
+    while True:
+        record = _queue.get()
+        try:
+            path = _current_path()
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+                size = f.tell()
+            if size >= max_bytes:
+                _rotate(path)
+        except Exception as e:
+            logger.warning("Capture write error: %s", e)
+
+
+def _ensure_writer():
+    """Start the writer thread in this process (threads don't survive a fork)"""
+    global _writer_pid
+    if _writer_pid == os.getpid():
+        return
+    with _writer_lock:
+        if _writer_pid != os.getpid():
+            threading.Thread(target=_writer, name="capture-writer", daemon=True).start()
+            _writer_pid = os.getpid()
+
+
+# -------------------- HOOKS --------------------
+
+def record_llm_call(route: str, text: str, elapsed: float):
+    """Called by get_ai_response: attach the LLM output to the request being captured"""
+    if has_request_context() and "capture" in g:
+        g.capture["llm"].append({"route": route, "ms": round(elapsed * 1000, 1), "text": sanitize_text(text)})
+
+
+def _before_request():
+    if request.endpoint not in CAPTURED_ENDPOINTS or random.random() >= CAPTURE_SAMPLE_RATE:
+        return
+    from services.rate_limit_service import authenticated_user_id
+    data = request.get_json(silent=True) or {}
+    body = {}
+    for field in BODY_FIELDS[request.endpoint]:
+        if field in data:
+            value = data[field]
+            body[field] = pseudonym(value) if field == "chat_id" else sanitize_text(value)
+    g.capture = {
+        "id": uuid.uuid4().hex,
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "endpoint": request.endpoint,
+        "user": pseudonym(authenticated_user_id()),
+        "body": body,
+        "llm": [],
+        "_start": time.perf_counter()
+    }
+
+
+def _after_request(response):
+    capture = g.pop("capture", None)
+    if capture is None:
+        return response
+    capture["duration_ms"] = round((time.perf_counter() - capture.pop("_start")) * 1000, 1)
+    capture["status"] = response.status_code
+    data = response.get_json(silent=True) if response.is_json else None
+    if isinstance(data, dict):
+        capture["response"] = {
+            "chat_id": pseudonym(data.get("chat_id")),
+            "language": data.get("language"),
+            "chars": len(data.get("reply") or "")
+        }
+    _ensure_writer()
+    try:
+        _queue.put_nowait(capture)
+    except queue.Full:
+        pass  # never slow a request down for capture
+    return response
+
+
+def init_capture(app):
+    """Install request capture (no-op unless CAPTURE_ENABLED)"""
+    if not CAPTURE_ENABLED:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
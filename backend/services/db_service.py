@@ -1,9 +1,15 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING
 from datetime import datetime, timezone
 from bson import ObjectId
-from utils.config import MONGO_URI, MONGO_DB
+from utils.config import MONGO_URI, MONGO_DB, MONGO_MIN_POOL_SIZE
+from utils.text_search import index_terms
+from utils.log import get_logger
 
-client = MongoClient(MONGO_URI)
+logger = get_logger(__name__)
+
+# connect=False: no sockets or monitor threads until the first operation, so
+# a gunicorn master that preloads the app never hands live connections to workers
+client = MongoClient(MONGO_URI, connect=False, minPoolSize=MONGO_MIN_POOL_SIZE)
 db = client[MONGO_DB]
 
 chat_collection = db.chat_history
@@ -11,6 +17,37 @@ chat_sessions_collection = db.chat_sessions
 user_collection = db.users
 report_collection = db.farming_reports
 
+_indexes_ready = False
+
+
+def reset_after_fork():
+    """Drop any connection state inherited from the parent process.
+
+    The client reopens itself on next use, so module-level collection
+    handles stay valid.
+    """
+    client.close()
+
+
+def ping():
+    """Round-trip to the server (connects the pool; minPoolSize is then kept open)"""
+    client.admin.command("ping")
+
+
+def ensure_indexes():
+    """Indexes behind the per-user history lists and their version lookups"""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        chat_sessions_collection.create_index([("user_id", ASCENDING), ("updated_at", DESCENDING)])
+        chat_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
+        chat_collection.create_index([("chat_id", ASCENDING), ("timestamp", ASCENDING)])
+        report_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
+        _indexes_ready = True
+    except Exception as e:
+        logger.warning("History index setup error: %s", e)
+
 
 def save_chat(user_id, question, answer, response_type, language, input_type="text", chat_id=None):
     """Save individual chat message with chat_id reference"""
@@ -23,7 +60,8 @@ def save_chat(user_id, question, answer, response_type, language, input_type="te
             "input_type": input_type,
             "response_type": response_type,
             "language": language,
-            "timestamp": datetime.now(timezone.utc)
+            "timestamp": datetime.now(timezone.utc),
+            "search_terms": index_terms(question)  # see services/search_service.py
         })
         
         # Save assistant response
@@ -35,13 +73,14 @@ def save_chat(user_id, question, answer, response_type, language, input_type="te
             "input_type": input_type,
             "response_type": response_type,
             "language": language,
-            "timestamp": datetime.now(timezone.utc)
+            "timestamp": datetime.now(timezone.utc),
+            "search_terms": index_terms(answer)
         })
         
-        print(f"✓ Chat saved for user: {user_id}, chat_id: {chat_id}, ID: {result.inserted_id}")
+        logger.debug("Chat saved for user: %s, chat_id: %s, ID: %s", user_id, chat_id, result.inserted_id)
         return result.inserted_id
     except Exception as e:
-        print(f"✗ Error saving chat: {str(e)}")
+        logger.error("Error saving chat: %s", e)
         raise
 
 
@@ -55,28 +94,32 @@ def get_chat_history(user_id):
             ).sort("timestamp", -1)
         )
         
-        # Convert to old format for backward compatibility
-        result = []
-        i = 0
-        while i < len(messages):
-            if i + 1 < len(messages) and messages[i]["role"] == "assistant" and messages[i+1]["role"] == "user":
-                result.append({
-                    "question": messages[i+1]["content"],
-                    "answer": messages[i]["content"],
-                    "response_type": messages[i]["response_type"],
-                    "language": messages[i]["language"],
-                    "timestamp": messages[i]["timestamp"]
-                })
-                i += 2
-            else:
-                i += 1
-        
-        return result
+        return pair_chat_messages(messages)
     except Exception as e:
-        print(f"✗ Error getting chat history: {str(e)}")
+        logger.error("Error getting chat history: %s", e)
         return []
 
 
+def pair_chat_messages(messages):
+    """Convert newest-first messages to the old question/answer format"""
+    result = []
+    i = 0
+    while i < len(messages):
+        if i + 1 < len(messages) and messages[i]["role"] == "assistant" and messages[i+1]["role"] == "user":
+            result.append({
+                "question": messages[i+1]["content"],
+                "answer": messages[i]["content"],
+                "response_type": messages[i]["response_type"],
+                "language": messages[i]["language"],
+                "timestamp": messages[i]["timestamp"]
+            })
+            i += 2
+        else:
+            i += 1
+    
+    return result
+
+
 def save_report(user_id, crop_name, region, report_data, language):
     """Save farming report to database"""
     try:
@@ -88,23 +131,84 @@ def save_report(user_id, crop_name, region, report_data, language):
             "language": language,
             "timestamp": datetime.now(timezone.utc)
         })
-        print(f"✓ Report saved for user: {user_id}, Crop: {crop_name}, Region: {region}, ID: {result.inserted_id}")
+        logger.debug("Report saved for user: %s, Crop: %s, Region: %s, ID: %s", user_id, crop_name, region, result.inserted_id)
         return result.inserted_id
     except Exception as e:
-        print(f"✗ Error saving report: {str(e)}")
+        logger.error("Error saving report: %s", e)
         raise
 
 
 def get_user_reports(user_id):
     """Get all reports for a user"""
+    # _id stays an ObjectId; the JSON provider renders it as a string
     return list(
         report_collection.find(
-            {"user_id": user_id},
-            {"_id": 0}
+            {"user_id": user_id}
         ).sort("timestamp", -1)
     )
 
 
+def get_report_by_id(report_id):
+    """Get a single farming report by ID"""
+    try:
+        report = report_collection.find_one({"_id": ObjectId(report_id)})
+        if not report:
+            return None
+
+        report["_id"] = str(report["_id"])
+        return report
+    except Exception as e:
+        logger.error("Error getting report by ID: %s", e)
+        return None
+
+
+# ==================== VERSIONS (HTTP VALIDATORS) ====================
+# (latest timestamp, count) per list: covered by the indexes above, so a
+# revalidation costs two index lookups instead of loading the whole list.
+# The count catches deletions, which don't move the latest timestamp.
+
+def _latest(collection, query, field):
+    doc = collection.find_one(query, {field: 1, "_id": 0}, sort=[(field, DESCENDING)])
+    return doc[field] if doc else None
+
+
+def get_chat_sessions_version(user_id):
+    """Version of get_chat_sessions(user_id)"""
+    ensure_indexes()
+    query = {"user_id": user_id}
+    return _latest(chat_sessions_collection, query, "updated_at"), chat_sessions_collection.count_documents(query)
+
+
+def get_chat_version(user_id, chat_id):
+    """Version of get_chat_by_id(chat_id), or None if the chat isn't the user's"""
+    ensure_indexes()
+    try:
+        session = chat_sessions_collection.find_one(
+            {"_id": ObjectId(chat_id), "user_id": user_id},
+            {"updated_at": 1}
+        )
+    except Exception:
+        return None  # invalid ID: let the view answer
+    if not session:
+        return None
+    # updated_at is bumped before the new messages are saved, so count them too
+    return session.get("updated_at"), chat_collection.count_documents({"chat_id": chat_id})
+
+
+def get_chat_history_version(user_id):
+    """Version of get_chat_history(user_id)"""
+    ensure_indexes()
+    query = {"user_id": user_id}
+    return _latest(chat_collection, query, "timestamp"), chat_collection.count_documents(query)
+
+
+def get_user_reports_version(user_id):
+    """Version of get_user_reports(user_id)"""
+    ensure_indexes()
+    query = {"user_id": user_id}
+    return _latest(report_collection, query, "timestamp"), report_collection.count_documents(query)
+
+
 # ==================== CHAT SESSION MANAGEMENT ====================
 
 def create_chat_session(user_id, title, language):
@@ -117,29 +221,23 @@ def create_chat_session(user_id, title, language):
             "created_at": datetime.now(timezone.utc),
             "updated_at": datetime.now(timezone.utc)
         })
-        print(f"✓ Chat session created for user: {user_id}, ID: {result.inserted_id}")
+        logger.debug("Chat session created for user: %s, ID: %s", user_id, result.inserted_id)
         return str(result.inserted_id)
     except Exception as e:
-        print(f"✗ Error creating chat session: {str(e)}")
+        logger.error("Error creating chat session: %s", e)
         raise
 
 
 def get_chat_sessions(user_id):
     """Get all chat sessions for a user (sorted by updated_at DESC)"""
     try:
-        sessions = list(
+        return list(
             chat_sessions_collection.find(
                 {"user_id": user_id}
             ).sort("updated_at", -1)
         )
-        
-        # Convert ObjectId to string for JSON serialization
-        for session in sessions:
-            session["_id"] = str(session["_id"])
-        
-        return sessions
     except Exception as e:
-        print(f"✗ Error getting chat sessions: {str(e)}")
+        logger.error("Error getting chat sessions: %s", e)
         return []
 
 
@@ -154,23 +252,17 @@ def get_chat_by_id(chat_id):
         # Get all messages for this chat
         messages = list(
             chat_collection.find(
-                {"chat_id": chat_id}
+                {"chat_id": chat_id},
+                {"_id": 0, "search_terms": 0}
             ).sort("timestamp", 1)
         )
         
-        # Remove MongoDB _id from messages
-        for msg in messages:
-            msg.pop("_id", None)
-        
-        # Convert ObjectId to string
-        session["_id"] = str(session["_id"])
-        
         return {
             "session": session,
             "messages": messages
         }
     except Exception as e:
-        print(f"✗ Error getting chat by ID: {str(e)}")
+        logger.error("Error getting chat by ID: %s", e)
         return None
 
 
@@ -207,7 +299,7 @@ def get_recent_chat_messages(chat_id, limit=10):
         
         return formatted_messages
     except Exception as e:
-        print(f"✗ Error getting recent chat messages: {str(e)}")
+        logger.error("Error getting recent chat messages: %s", e)
         return []
 
 
@@ -218,9 +310,9 @@ def update_chat_session(chat_id):
             {"_id": ObjectId(chat_id)},
             {"$set": {"updated_at": datetime.now(timezone.utc)}}
         )
-        print(f"✓ Chat session updated: {chat_id}")
+        logger.debug("Chat session updated: %s", chat_id)
     except Exception as e:
-        print(f"✗ Error updating chat session: {str(e)}")
+        logger.error("Error updating chat session: %s", e)
         raise
 
 
@@ -239,10 +331,10 @@ def delete_chat_session(chat_id, user_id):
             "user_id": user_id
         })
         
-        print(f"✓ Chat session deleted: {chat_id}")
+        logger.info("Chat session deleted: %s", chat_id)
         return result.deleted_count > 0
     except Exception as e:
-        print(f"✗ Error deleting chat session: {str(e)}")
+        logger.error("Error deleting chat session: %s", e)
         raise
 
 
@@ -0,0 +1,193 @@
+import atexit
+import os
+import queue
+import smtplib
+import threading
+import time
+from utils.config import (
+    EMAIL_ID,
+    EMAIL_APP_PASSWORD,
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_USE_TLS,
+    SMTP_USE_AUTH,
+    SMTP_TIMEOUT_SECONDS,
+    SMTP_POOL_SIZE,
+    SMTP_HEALTH_CHECK_SECONDS,
+    SMTP_MAX_IDLE_SECONDS,
+    EMAIL_QUEUE_MAX,
+    EMAIL_MAX_RETRIES
+)
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Outbound mail is queued and delivered by SMTP_POOL_SIZE background threads
+# over persistent SMTP connections, so requests never wait on the
+# connect/STARTTLS/login handshake or on the send itself.
+
+_stats = {
+    "queued": 0,
+    "sent": 0,
+    "retried": 0,
+    "failed": 0,
+    "connections_opened": 0
+}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+class SMTPConnectionPool:
+    """Reuses logged-in SMTP connections, health-checking ones that sat idle"""
+
+    def __init__(self):
+        self._idle = queue.LifoQueue()
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        if SMTP_USE_TLS:
+            server.starttls()
+        if SMTP_USE_AUTH:
+            server.login(EMAIL_ID, EMAIL_APP_PASSWORD)
+        _count("connections_opened")
+        return server
+
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def acquire(self) -> smtplib.SMTP:
+        """Get a healthy connection (reusing an idle one when possible)"""
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            idle = time.monotonic() - last_used
+            if idle > SMTP_MAX_IDLE_SECONDS:
+                # Server has most likely dropped it already
+                self._close(server)
+                continue
+            if idle > SMTP_HEALTH_CHECK_SECONDS and not self._is_alive(server):
+                self._close(server)
+                continue
+            return server
+
+    def release(self, server: smtplib.SMTP):
+        self._idle.put((server, time.monotonic()))
+
+    def discard(self, server: smtplib.SMTP):
+        self._close(server)
+
+    def close_all(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+
+_pool = SMTPConnectionPool()
+_queue = queue.Queue(maxsize=EMAIL_QUEUE_MAX)
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+
+def _deliver(message):
+    server = _pool.acquire()
+    try:
+        server.send_message(message)
+    except Exception:
+        # Connection state is unknown after an error, don't reuse it
+        _pool.discard(server)
+        raise
+    _pool.release(server)
+
+
+def _worker():
+    while True:
+        message, attempt = _queue.get()
+        try:
+            _deliver(message)
+            _count("sent")
+            logger.info("Email sent successfully to %s", message['To'])
+        except Exception as e:
+            if attempt < EMAIL_MAX_RETRIES:
+                delay = 2 ** attempt
+                _count("retried")
+                logger.warning("Email to %s failed (%s), retrying in %ss", message['To'], e, delay)
+                threading.Timer(delay, _requeue, args=(message, attempt + 1)).start()
+            else:
+                _count("failed")
+                logger.error("Giving up on email to %s: %s", message['To'], e)
+        finally:
+            _queue.task_done()
+
+
+def _requeue(message, attempt: int):
+    try:
+        _queue.put_nowait((message, attempt))
+    except queue.Full:
+        _count("failed")
+        logger.error("Email queue full, dropping retry to %s", message['To'])
+
+
+def _ensure_workers():
+    """Start delivery threads in this process (threads don't survive a fork)"""
+    global _workers_pid
+    if _workers_pid == os.getpid():
+        return
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+        for i in range(SMTP_POOL_SIZE):
+            threading.Thread(target=_worker, name=f"smtp-sender-{i}", daemon=True).start()
+        _workers_pid = os.getpid()
+
+
+def enqueue_email(message):
+    """Queue an email.message.Message for background delivery"""
+    _ensure_workers()
+    try:
+        _queue.put_nowait((message, 0))
+    except queue.Full:
+        raise Exception("Email queue is full, please try again later")
+    _count("queued")
+
+
+def get_email_stats() -> dict:
+    """Snapshot of delivery counters for this process"""
+    with _stats_lock:
+        return {**_stats, "queue_size": _queue.qsize()}
+
+
+def _drain_on_exit(timeout: float = 5.0):
+    """Give queued mail a few seconds to go out on shutdown"""
+    if _workers_pid != os.getpid():
+        return
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.1)
+    _pool.close_all()
+
+
+atexit.register(_drain_on_exit)
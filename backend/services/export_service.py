@@ -0,0 +1,85 @@
+import zlib
+from datetime import datetime, timezone
+from pymongo import ASCENDING
+from services.db_service import chat_sessions_collection, chat_collection, report_collection, ensure_indexes
+from utils.config import EXPORT_BATCH_SIZE, EXPORT_CHUNK_BYTES, COMPRESSION_GZIP_LEVEL
+from utils.json_provider import dumps_bytes
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Account export as NDJSON, one JSON object per line:
+#   {"type": "export", "version": 1, "exported_at": ...}
+#   {"type": "session", "_id": ..., "title": ..., ...}      least recently updated first
+#   {"type": "message", "chat_id": ..., "role": ..., ...}  oldest first
+#   {"type": "report", "_id": ..., "crop_name": ..., ...}  oldest first
+#   {"type": "end", "counts": {"session": n, "message": n, "report": n}}
+# Documents come straight off Mongo cursors EXPORT_BATCH_SIZE at a time and
+# leave in ~EXPORT_CHUNK_BYTES chunks, so memory stays flat however big the
+# account is. A missing "end" line means the export was cut off.
+
+EXPORT_VERSION = 1
+
+# (record type, collection, sort field, projection) in output order;
+# each sort is served by a (user_id, field) index
+SECTIONS = (
+    ("session", chat_sessions_collection, "updated_at", {"user_id": 0}),
+    ("message", chat_collection, "timestamp", {"user_id": 0, "search_terms": 0}),
+    ("report", report_collection, "timestamp", {"user_id": 0})
+)
+
+
+def iter_export_records(user_id: str):
+    """Yield the user's data as export records (dicts), one document at a time"""
+    ensure_indexes()
+    yield {"type": "export", "version": EXPORT_VERSION, "exported_at": datetime.now(timezone.utc)}
+    counts = {}
+    for record_type, collection, sort_field, projection in SECTIONS:
+        cursor = collection.find(
+            {"user_id": user_id},
+            projection
+        ).sort(sort_field, ASCENDING).batch_size(EXPORT_BATCH_SIZE)
+        count = 0
+        with cursor:
+            for doc in cursor:
+                doc["type"] = record_type
+                yield doc
+                count += 1
+        counts[record_type] = count
+    yield {"type": "end", "counts": counts}
+
+
+def iter_ndjson(records):
+    """Encode records as NDJSON, buffered into chunks of about EXPORT_CHUNK_BYTES"""
+    buffer, size = [], 0
+    for record in records:
+        line = dumps_bytes(record) + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def iter_gzip(chunks):
+    """Gzip a stream of byte chunks incrementally"""
+    compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_user_export(user_id: str, compress: bool = False):
+    """Byte chunks of the user's NDJSON export (gzip-compressed if compress)"""
+    chunks = iter_ndjson(iter_export_records(user_id))
+    if compress:
+        chunks = iter_gzip(chunks)
+    try:
+        yield from chunks
+    except Exception as e:
+        # Headers are already sent; the missing "end" line tells the client
+        logger.error("Export for user %s failed mid-stream: %s", user_id, e)
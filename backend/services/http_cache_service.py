@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import request, current_app
+from utils.config import (
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_BYTES,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY,
+    JSON_DATETIME_FORMAT
+)
+from utils.log import get_logger
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+logger = get_logger(__name__)
+
+# Cheaper history endpoints on slow mobile links:
+# - conditional(): answers If-None-Match / If-Modified-Since with 304 from a
+#   small "version" query (latest timestamp + count), before the full list
+#   is loaded or serialized
+# - init_compression(): gzip/brotli for JSON bodies, negotiated on Accept-Encoding
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain", "text/html", "text/csv"}
+ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+# -------------------- CONDITIONAL GET --------------------
+
+def _make_etag(user_id: str, version: tuple) -> str:
+    raw = "|".join(str(part) for part in (request.path, user_id, JSON_DATETIME_FORMAT, *version))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def _not_modified(etag: str, last_modified) -> bool:
+    if request.if_none_match:
+        # If-None-Match wins over If-Modified-Since when both are sent
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return bool(since and last_modified and last_modified.replace(microsecond=0) <= since)
+
+
+def conditional(get_version):
+    """
+    Validators and 304s for a GET endpoint behind token_required.
+
+    The ETag is weak (the same data may be sent gzipped, brotli'd or plain)
+    and responses are "private, no-cache", so browsers always revalidate.
+
+    Args:
+        get_version: Callable(user_id, **view_kwargs) returning
+            (last_modified, *other_parts) for the data the view returns,
+            or None to skip validation (e.g. not found / not the owner)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            user_id = request.current_user["user_id"]
+            try:
+                version = get_version(user_id, **kwargs)
+            except Exception as e:
+                # Validators are an optimization, never fail the request over them
+                logger.warning("Version lookup failed for %s: %s", request.path, e)
+                version = None
+            if version is None:
+                return f(*args, **kwargs)
+
+            last_modified = version[0]
+            if last_modified is not None and last_modified.tzinfo is None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc)  # Mongo returns naive UTC
+            etag = _make_etag(user_id, version)
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                # Version was read first: if data changes meanwhile, the next check just misses
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return decorated
+    return decorator
+
+
+# -------------------- COMPRESSION --------------------
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESSION_BROTLI_QUALITY)
+    # mtime=0: identical bodies compress to identical bytes
+    return gzip.compress(data, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _compress_response(response):
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if not encoding:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_BYTES:
+        return response
+
+    response.set_data(_compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_compression(app):
+    """Compress JSON/text responses (no-op unless COMPRESSION_ENABLED)"""
+    if not COMPRESSION_ENABLED:
+        return
+    app.after_request(_compress_response)
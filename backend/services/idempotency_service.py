@@ -0,0 +1,188 @@
+import hashlib
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import request, jsonify, current_app, Response
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from services.db_service import db
+from utils.config import IDEMPOTENCY_TTL_HOURS, IDEMPOTENCY_WAIT_SECONDS, IDEMPOTENCY_LEASE_SECONDS
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Stored responses for retried POSTs carrying an Idempotency-Key header:
+# {
+#   "_id": "<user_id>:<endpoint>:<key>",
+#   "status": "in_progress" | "done",
+#   "claim": "<uuid of the attempt running it>",
+#   "request_hash": "<sha256 of body>",
+#   "status_code": 200,
+#   "body": "<json response>",
+#   "expires_at": datetime      # lease end while in progress, then IDEMPOTENCY_TTL_HOURS
+# }
+# A worker killed mid-request leaves its record in progress; once the lease
+# ends, the next retry takes it over instead of getting 409 until the TTL.
+idempotency_collection = db.idempotency_keys
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+CLAIM_ATTEMPTS = 3
+
+_indexes_ready = False
+
+
+def _ensure_indexes():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        idempotency_collection.create_index(
+            [("expires_at", ASCENDING)],
+            expireAfterSeconds=0,
+            name="idempotency_ttl_index"
+        )
+        _indexes_ready = True
+    except Exception as e:
+        logger.warning("Idempotency index setup error: %s", e)
+
+
+def _replay(doc):
+    response = Response(doc["body"], status=doc["status_code"], mimetype="application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _lease_expired(doc) -> bool:
+    return doc["expires_at"].replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc)
+
+
+def _wait_for_result(record_id: str):
+    """Poll an in-progress record until it completes, disappears or its lease ends; the record as last seen"""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.1
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+        doc = idempotency_collection.find_one({"_id": record_id})
+        if doc is None or doc["status"] == "done" or _lease_expired(doc):
+            return doc
+    return idempotency_collection.find_one({"_id": record_id})
+
+
+def _scope(user_id: str) -> str:
+    """Key namespace: the user, or the client IP for anonymous (trial) callers"""
+    if user_id == "trial_user":
+        from services.rate_limit_service import client_ip
+        return f"trial_user@{client_ip()}"
+    return user_id
+
+
+def _claim(record_id: str, request_hash: str):
+    """
+    Claim the key for this request, or resolve it from an earlier attempt.
+
+    Returns:
+        (claim, None) if this request now owns the key and should run,
+        (None, response) with the stored response or an error to return
+    """
+    in_progress = (jsonify({"error": "A request with this Idempotency-Key is still in progress"}), 409)
+    claim = uuid.uuid4().hex
+    for _ in range(CLAIM_ATTEMPTS):
+        lease_end = datetime.now(timezone.utc) + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)
+        try:
+            idempotency_collection.insert_one({
+                "_id": record_id,
+                "status": "in_progress",
+                "claim": claim,
+                "request_hash": request_hash,
+                "expires_at": lease_end
+            })
+            return claim, None
+        except DuplicateKeyError:
+            pass
+
+        doc = idempotency_collection.find_one({"_id": record_id})
+        if doc and doc["request_hash"] != request_hash:
+            return None, (jsonify({"error": "Idempotency-Key was already used with a different request"}), 422)
+        if doc and doc["status"] == "in_progress" and not _lease_expired(doc):
+            doc = _wait_for_result(record_id)
+            if doc is not None and doc["status"] == "in_progress" and not _lease_expired(doc):
+                return None, in_progress
+        if doc and doc["status"] == "done":
+            return None, _replay(doc)
+        if doc and _lease_expired(doc):
+            # The attempt holding it died: take the lease over (only one retry wins)
+            taken = idempotency_collection.find_one_and_update(
+                {"_id": record_id, "status": "in_progress", "expires_at": doc["expires_at"]},
+                {"$set": {"claim": claim, "expires_at": lease_end}}
+            )
+            if taken:
+                logger.warning("Took over expired idempotency claim %s", record_id)
+                return claim, None
+        # Released (the attempt failed), expired or taken over meanwhile: try again
+
+    return None, in_progress
+
+
+def idempotent(get_user_id):
+    """
+    Make a POST endpoint safe to retry with an Idempotency-Key header.
+
+    A repeat with the same key gets the stored response (or waits for the
+    in-flight one) instead of running the handler again. Requests without
+    the header run normally.
+
+    Args:
+        get_user_id: Callable returning the caller's user_id for key scoping
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return f(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({"error": "Idempotency-Key is too long"}), 400
+
+            try:
+                _ensure_indexes()
+                record_id = f"{_scope(get_user_id())}:{request.endpoint}:{key}"
+                request_hash = hashlib.sha256(request.get_data()).hexdigest()
+                claim, stored = _claim(record_id, request_hash)
+            except Exception as e:
+                # Never fail the request because of the idempotency store
+                logger.warning("Idempotency store error: %s", e)
+                return f(*args, **kwargs)
+            if claim is None:
+                return stored
+
+            # Only touch the record while we still hold it (it may have been taken over)
+            owned = {"_id": record_id, "claim": claim}
+            try:
+                response = current_app.make_response(f(*args, **kwargs))
+            except Exception:
+                idempotency_collection.delete_one(owned)
+                raise
+
+            try:
+                if response.status_code >= 500:
+                    # Let the client retry server errors for real
+                    idempotency_collection.delete_one(owned)
+                else:
+                    idempotency_collection.update_one(
+                        owned,
+                        {"$set": {
+                            "status": "done",
+                            "status_code": response.status_code,
+                            "body": response.get_data(as_text=True),
+                            "expires_at": datetime.now(timezone.utc) + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+                        }}
+                    )
+            except Exception as e:
+                logger.warning("Failed to store idempotent response: %s", e)
+
+            return response
+        return decorated
+    return decorator
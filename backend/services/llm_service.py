@@ -1,6 +1,29 @@
+import hashlib
+import re
+import threading
+import time
 import warnings
-import google.generativeai as genai
-from utils.config import GEMINI_API_KEY
+from datetime import timedelta
+from utils.config import (
+    GEMINI_API_KEY,
+    LLM_MODEL_TIERS,
+    LLM_ROUTING_TABLE,
+    PROMPT_CACHE_ENABLED,
+    PROMPT_CACHE_TTL_SECONDS,
+    LLM_CACHED_TOKEN_DISCOUNT
+)
+from services.singleflight_service import single_flight, make_key
+from services.metrics_service import (
+    LLM_REQUEST_SECONDS,
+    LLM_CALL_SECONDS,
+    LLM_PROMPT_CHARS,
+    LLM_RESPONSE_CHARS,
+    LLM_TOKENS
+)
+from services.capture_service import record_llm_call
+from utils.log import get_logger
+
+logger = get_logger(__name__)
 
 # Suppress deprecation warning for now (TODO: migrate to google.genai in future)
 warnings.filterwarnings(
@@ -9,7 +32,21 @@ warnings.filterwarnings(
 	module='google.generativeai'
 )
 
-genai.configure(api_key=GEMINI_API_KEY)
+# google.generativeai (grpc/protobuf) is imported and configured on first use
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def get_genai():
+    """Import and configure the Gemini client once"""
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                _genai = genai
+    return _genai
 
 SYSTEM_PROMPT = """
 You are AgriGPT 🌾, an agricultural expert chatbot designed to assist Indian farmers.
@@ -46,19 +83,272 @@ politely decline in the SAME LANGUAGE as the user by saying:
 "I am AgriGPT 🌾 and I only assist with agricultural and farming-related queries."
 """
 
-model = genai.GenerativeModel(
-    model_name="gemini-2.5-flash",
-    system_instruction=SYSTEM_PROMPT
+# -------------------- MODEL ROUTING --------------------
+# Trivial prompts (greetings, capability questions, YES/NO checks, report
+# translation) go to a lighter tier; agronomy answers and reports stay on the
+# large model. See LLM_ROUTING_TABLE / LLM_MODEL_TIERS in utils/config.py.
+
+DEFAULT_ROUTE = "chat"
+
+GREETING_PATTERN = re.compile(
+    r"^\W*(hi+|hello|hey|namaste|namaskar|good (morning|afternoon|evening)|thanks?|thank you|ok(ay)?|bye"
+    r"|how are you|who are you|what can you do|what is your (name|service)|so let'?s begin"
+    r"|नमस्ते|नमस्कार|धन्यवाद|शुक्रिया|ନମସ୍କାର|ଧନ୍ୟବାଦ|নমস্কার|ধন্যবাদ|வணக்கம்|நன்றி|నమస్కారం|ధన్యవాదాలు"
+    r"|ನಮಸ್ಕಾರ|ಧನ್ಯವಾದ|നമസ്കാരം|നന്ദി|નમસ્તે|આભાર|ਸਤ ਸ੍ਰੀ ਅਕਾਲ|ਧੰਨਵਾਦ|سلام|شکریہ)(?=\W|$)",
+    re.IGNORECASE
+)
+
+AGRI_KEYWORDS = (
+    "crop", "soil", "seed", "sow", "fertili", "manure", "urea", "npk", "pest", "disease", "irrigat",
+    "harvest", "yield", "paddy", "rice", "wheat", "cotton", "kharif", "rabi", "weather", "rain",
+    "scheme", "farm", "plant", "spray",
+    "फसल", "मिट्टी", "खाद", "बीज", "सिंचाई", "कीट", "धान", "गेहूं", "खेती",
+    "ଫସଲ", "ମାଟି", "ସାର", "ଧାନ", "ଚାଷ", "ফসল", "মাটি", "সার", "ধান", "பயிர்", "உரம்", "நெல்",
+    "పంట", "ఎరువు", "వరి", "ಬೆಳೆ", "ಗೊಬ್ಬರ", "വിള", "വളം", "पीक", "खत", "પાક", "ખાતર", "ਫਸਲ", "ਖਾਦ", "فصل", "کھاد"
 )
 
-def get_ai_response(prompt: str, chat_history: list = None) -> str:
+
+def score_prompt_complexity(text: str, chat_history: list = None) -> float:
+    """
+    Small rules-plus-features complexity score for a user message.
+    Roughly: < 1 is small talk, >= 1 needs real agronomy reasoning.
+    Only used to veto the light tier for a greeting that carries a question.
+    """
+    lowered = text.lower()
+    words = len(lowered.split())
+    keyword_hits = sum(1 for kw in AGRI_KEYWORDS if kw in lowered)
+
+    score = words / 12
+    score += 2 * keyword_hits
+    score += 1 if any(ch.isdigit() for ch in lowered) else 0
+    score += 0.5 if chat_history else 0
+    if GREETING_PATTERN.match(lowered):
+        score -= 1
+    return score
+
+
+def classify_prompt(text: str, chat_history: list = None) -> str:
+    """
+    Pick a route name for a free-form user message.
+    Only recognized greetings/small talk go to the light tier; a short or
+    unfamiliar message (e.g. in a language the keywords miss) stays on the default.
+    """
+    if GREETING_PATTERN.match(text.lower()) and score_prompt_complexity(text, chat_history) < 1:
+        return "greeting"
+    return DEFAULT_ROUTE
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(route: str = DEFAULT_ROUTE):
+    """Get the GenerativeModel for a route (one instance per model name)"""
+    tier = LLM_ROUTING_TABLE.get(route, LLM_ROUTING_TABLE.get(DEFAULT_ROUTE, "large"))
+    model_name = LLM_MODEL_TIERS[tier]["model"]
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                model = get_genai().GenerativeModel(
+                    model_name=model_name,
+                    system_instruction=SYSTEM_PROMPT
+                )
+                _models[model_name] = model
+    return model, tier
+
+
+# -------------------- PROMPT PREFIX CACHING --------------------
+# Fixed prompt prefixes (see services/prompt_service.py) can be stored once as
+# provider-side CachedContent together with SYSTEM_PROMPT, so each call only
+# sends the per-request suffix. One cache per (model, prefix), refreshed
+# shortly before its TTL runs out.
+
+_prefix_caches = {}
+_prefix_lock = threading.Lock()
+
+
+def get_prefix_cached_model(model_name: str, prefix: str):
+    """
+    Get a model bound to a provider-side cache of SYSTEM_PROMPT + prefix.
+
+    Returns:
+        GenerativeModel, or None if caching is disabled or not possible
+        (e.g. the prefix is below the provider's minimum cacheable size)
+    """
+    if not PROMPT_CACHE_ENABLED:
+        return None
+
+    key = (model_name, hashlib.sha256(prefix.encode("utf-8")).hexdigest())
+    entry = _prefix_caches.get(key)
+    if entry and entry["expires"] > time.time():
+        return entry["model"]
+
+    with _prefix_lock:
+        entry = _prefix_caches.get(key)
+        now = time.time()
+        if entry and entry["expires"] > now:
+            return entry["model"]
+
+        try:
+            genai = get_genai()
+            cached_content = genai.caching.CachedContent.create(
+                model=f"models/{model_name}",
+                display_name=f"agrigpt-{key[1][:12]}",
+                system_instruction=SYSTEM_PROMPT,
+                contents=[{"role": "user", "parts": [prefix]}],
+                ttl=timedelta(seconds=PROMPT_CACHE_TTL_SECONDS)
+            )
+            model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+            logger.info("Prompt prefix cached for %s (%s)", model_name, key[1][:12])
+        except Exception as e:
+            # Don't retry on every request, try again after one TTL
+            logger.warning("Prompt prefix caching unavailable for %s: %s", model_name, e)
+            model = None
+
+        # Refresh a minute before the provider drops the cache
+        _prefix_caches[key] = {"model": model, "expires": now + max(PROMPT_CACHE_TTL_SECONDS - 60, 60)}
+        return model
+
+
+def reset_after_fork():
+    """Forget the Gemini client and models built in the parent (gRPC channels are not fork-safe)"""
+    global _genai, _genai_lock, _models_lock, _prefix_lock
+    _genai = None
+    _models.clear()
+    _prefix_caches.clear()
+    _genai_lock = threading.Lock()
+    _models_lock = threading.Lock()
+    _prefix_lock = threading.Lock()
+
+
+# Per-route counters: calls, errors, latency, tokens and estimated cost
+_route_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _stats_for(route: str, tier: str) -> dict:
+    """Get (or create) the counters for a route; caller holds _stats_lock"""
+    pricing = LLM_MODEL_TIERS[tier]
+    return _route_stats.setdefault(route, {
+        "tier": tier,
+        "model": pricing["model"],
+        "calls": 0,
+        "errors": 0,
+        "total_latency_ms": 0.0,
+        "max_latency_ms": 0.0,
+        "prompt_tokens": 0,
+        "output_tokens": 0,
+        "cached_tokens": 0,
+        "cache_hits": 0,
+        "coalesced": 0,
+        "estimated_cost_usd": 0.0,
+        "cache_savings_usd": 0.0
+    })
+
+
+def _record_call(route: str, tier: str, elapsed: float, prompt_tokens: int, output_tokens: int,
+                 error: bool, cached_tokens: int = 0):
+    pricing = LLM_MODEL_TIERS[tier]
+    input_cost = pricing.get("input_cost", 0)
+    # Cached prompt tokens are billed at a discount
+    savings = cached_tokens * input_cost * LLM_CACHED_TOKEN_DISCOUNT / 1_000_000
+    cost = (prompt_tokens * input_cost + output_tokens * pricing.get("output_cost", 0)) / 1_000_000 - savings
+    with _stats_lock:
+        stats = _stats_for(route, tier)
+        latency_ms = elapsed * 1000
+        stats["calls"] += 1
+        stats["errors"] += 1 if error else 0
+        stats["total_latency_ms"] += latency_ms
+        stats["max_latency_ms"] = max(stats["max_latency_ms"], latency_ms)
+        stats["prompt_tokens"] += prompt_tokens
+        stats["output_tokens"] += output_tokens
+        stats["cached_tokens"] += cached_tokens
+        stats["cache_hits"] += 1 if cached_tokens else 0
+        stats["estimated_cost_usd"] += cost
+        stats["cache_savings_usd"] += savings
+
+    LLM_CALL_SECONDS.labels(route, tier, "error" if error else "ok").observe(elapsed)
+    LLM_TOKENS.labels(route, tier, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(route, tier, "output").inc(output_tokens)
+    if cached_tokens:
+        LLM_TOKENS.labels(route, tier, "cached").inc(cached_tokens)
+
+
+def _record_coalesced(route: str):
+    """Count a request answered by another identical in-flight call (no tokens spent)"""
+    tier = LLM_ROUTING_TABLE.get(route, LLM_ROUTING_TABLE.get(DEFAULT_ROUTE, "large"))
+    with _stats_lock:
+        _stats_for(route, tier)["coalesced"] += 1
+
+
+def get_routing_stats() -> dict:
+    """Snapshot of per-route latency and cost counters for this process"""
+    with _stats_lock:
+        snapshot = {}
+        for route, stats in _route_stats.items():
+            snapshot[route] = {
+                **stats,
+                "avg_latency_ms": round(stats["total_latency_ms"] / stats["calls"], 1) if stats["calls"] else 0.0,
+                "estimated_cost_usd": round(stats["estimated_cost_usd"], 6),
+                "cache_savings_usd": round(stats["cache_savings_usd"], 6)
+            }
+        return {
+            "routing_table": LLM_ROUTING_TABLE,
+            "tiers": {name: tier["model"] for name, tier in LLM_MODEL_TIERS.items()},
+            "routes": snapshot
+        }
+
+
+def get_ai_response(prompt: str, chat_history: list = None, route: str = None, prefix: str = None) -> str:
     """
     Get AI response with optional conversation history.
+    Identical concurrent requests are coalesced into a single Gemini call.
     
     Args:
         prompt: The current user message
         chat_history: List of previous messages in format [{"role": "user"/"assistant", "message": "..."}]
+        route: Routing key from LLM_ROUTING_TABLE ("greeting", "classification",
+               "translation", "chat", "report"). Defaults to "chat".
+        prefix: Optional fixed prompt prefix (from services.prompt_service). Served
+                from the provider context cache when enabled, otherwise prepended.
     """
+    route = route or DEFAULT_ROUTE
+    history_key = "\x1e".join(f"{m['role']}:{m['message']}" for m in chat_history) if chat_history else None
+    key = make_key(route, prefix, history_key, prompt)
+    LLM_PROMPT_CHARS.labels(route).observe(len(prompt) + len(prefix or ""))
+
+    start = time.perf_counter()
+    try:
+        text, shared = single_flight(key, lambda: _generate(prompt, chat_history, route, prefix))
+        if shared:
+            _record_coalesced(route)
+        elapsed = time.perf_counter() - start
+        LLM_REQUEST_SECONDS.labels(route, "coalesced" if shared else "ok").observe(elapsed)
+        LLM_RESPONSE_CHARS.labels(route).observe(len(text))
+        record_llm_call(route, text, elapsed)
+        return text
+    except Exception as e:
+        LLM_REQUEST_SECONDS.labels(route, "error").observe(time.perf_counter() - start)
+        logger.error("Error in get_ai_response: %s", e)
+        return "🌾 I am AgriGPT 🌾 and I only assist with agricultural and farming-related queries."
+
+
+def _generate(prompt: str, chat_history: list, route: str, prefix: str) -> str:
+    """Make one Gemini call on the routed model (raises on failure)"""
+    model, tier = get_model(route)
+
+    if prefix:
+        cached_model = get_prefix_cached_model(LLM_MODEL_TIERS[tier]["model"], prefix)
+        if cached_model is not None:
+            model = cached_model
+        else:
+            prompt = prefix + prompt
+
+    start = time.perf_counter()
+    prompt_tokens, output_tokens, cached_tokens = len(prompt) // 4, 0, 0
+
     try:
         if chat_history and len(chat_history) > 0:
             # Format history for Gemini API
@@ -78,11 +368,23 @@ def get_ai_response(prompt: str, chat_history: list = None) -> str:
         else:
             # No history, single message
             response = model.generate_content(prompt)
-        
-        return response.text.strip()
-    except Exception as e:
-        print(f"Error in get_ai_response: {str(e)}")
-        return "🌾 I am AgriGPT 🌾 and I only assist with agricultural and farming-related queries."
+
+        text = response.text.strip()
+    except Exception:
+        _record_call(route, tier, time.perf_counter() - start, prompt_tokens, output_tokens, error=True)
+        raise
+
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        prompt_tokens = usage.prompt_token_count
+        output_tokens = usage.candidates_token_count
+        # Explicit or implicit (byte-identical prefix) cache hits
+        cached_tokens = getattr(usage, "cached_content_token_count", 0) or 0
+    else:
+        output_tokens = len(text) // 4
+    _record_call(route, tier, time.perf_counter() - start, prompt_tokens, output_tokens,
+                 error=False, cached_tokens=cached_tokens)
+    return text
 
 """For testing purpose"""
 
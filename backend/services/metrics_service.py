@@ -0,0 +1,149 @@
+import os
+import time
+from flask import request, g, Response
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    CONTENT_TYPE_LATEST,
+    REGISTRY
+)
+from prometheus_client import multiprocess
+
+# Prometheus metrics, exposed at /metrics.
+#
+# Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+# and /metrics aggregates them across workers (gunicorn_preload.py sets this
+# up). Without that variable, metrics are per process.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+SIZE_BUCKETS = (64, 256, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "agrigpt_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge(
+    "agrigpt_http_requests_in_flight",
+    "Requests currently being handled",
+    ["route"],
+    multiprocess_mode="livesum"
+)
+
+LLM_REQUEST_SECONDS = Histogram(
+    "agrigpt_llm_request_duration_seconds",
+    "get_ai_response latency (including waits on coalesced calls)",
+    ["route", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_CALL_SECONDS = Histogram(
+    "agrigpt_llm_call_duration_seconds",
+    "Gemini API call latency",
+    ["route", "tier", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_PROMPT_CHARS = Histogram(
+    "agrigpt_llm_prompt_chars",
+    "Prompt size in characters",
+    ["route"],
+    buckets=SIZE_BUCKETS
+)
+LLM_RESPONSE_CHARS = Histogram(
+    "agrigpt_llm_response_chars",
+    "Response size in characters",
+    ["route"],
+    buckets=SIZE_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "agrigpt_llm_tokens",
+    "Gemini tokens by kind (prompt, output, cached)",
+    ["route", "tier", "kind"]
+)
+
+WHISPER_DECODE_SECONDS = Histogram(
+    "agrigpt_whisper_decode_duration_seconds",
+    "Uploaded audio decode/convert to WAV time",
+    buckets=LATENCY_BUCKETS
+)
+WHISPER_TRANSCRIBE_SECONDS = Histogram(
+    "agrigpt_whisper_transcribe_duration_seconds",
+    "Whisper transcription time",
+    buckets=LATENCY_BUCKETS
+)
+
+REPORT_PARSE_SECONDS = Histogram(
+    "agrigpt_report_parse_duration_seconds",
+    "parse_report_response time",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "agrigpt_password_hash_duration_seconds",
+    "bcrypt call latency including the wait for a pool process",
+    ["op"],
+    buckets=LATENCY_BUCKETS
+)
+PASSWORD_HASH_QUEUE = Gauge(
+    "agrigpt_password_hash_queue_depth",
+    "bcrypt calls queued or running",
+    multiprocess_mode="livesum"
+)
+PASSWORD_HASH_EVENTS = Counter(
+    "agrigpt_password_hash_events",
+    "bcrypt calls rejected as busy, and hashes upgraded to BCRYPT_ROUNDS at login",
+    ["event"]
+)
+
+
+def _route_label() -> str:
+    # URL rule, not the raw path, so IDs don't explode label cardinality
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_route = _route_label()
+    HTTP_IN_FLIGHT.labels(g.metrics_route).inc()
+
+
+def _after_request(response):
+    start = g.pop("metrics_start", None)
+    if start is not None:
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, g.metrics_route, str(response.status_code)
+        ).observe(time.perf_counter() - start)
+    return response
+
+
+def _teardown_request(exc):
+    route = g.pop("metrics_route", None)
+    if route is not None:
+        HTTP_IN_FLIGHT.labels(route).dec()
+
+
+def metrics_response() -> Response:
+    """Render all metrics (aggregated across workers in multiprocess mode)"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Time every request (app routes and blueprints) and serve /metrics"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", metrics_response, methods=["GET"])
+
+
+def mark_process_dead(pid: int):
+    """Drop a dead worker's live gauges (gunicorn child_exit hook)"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
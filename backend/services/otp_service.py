@@ -1,10 +1,14 @@
 import random
-import smtplib
+import time
 from email.mime.text import MIMEText
 from datetime import datetime, timedelta
-from utils.config import EMAIL_ID, EMAIL_APP_PASSWORD, OTP_EXPIRY_MINUTES
+from utils.config import EMAIL_ID, OTP_EXPIRY_MINUTES
 from services.db_service import db
-from pymongo import ASCENDING
+from services.email_service import enqueue_email
+from pymongo import ASCENDING, ReturnDocument
+from utils.log import get_logger
+
+logger = get_logger(__name__)
 
 # Initialize TTL index for automatic deletion after 24 hours
 def setup_otp_collection():
@@ -17,7 +21,7 @@ def setup_otp_collection():
                 # Drop any TTL index that isn't the correct one
                 if 'expireAfterSeconds' in idx and idx['name'] != 'otp_ttl_index':
                     db.otp_verifications.drop_index(idx['name'])
-                    print(f"⚠ Dropped conflicting index: {idx['name']}")
+                    logger.warning("Dropped conflicting index: %s", idx['name'])
         except:
             pass  # Ignore errors when dropping indexes
         
@@ -27,21 +31,36 @@ def setup_otp_collection():
             expireAfterSeconds=86400,  # 24 hours in seconds
             name="otp_ttl_index"
         )
-        print("✓ OTP TTL index created/verified (24 hours)")
+        logger.info("OTP TTL index created/verified (24 hours)")
+
+        # Supports the single-round-trip match/expiry/mark in verify_otp
+        db.otp_verifications.create_index(
+            [("email", ASCENDING), ("otp", ASCENDING), ("verified", ASCENDING), ("expires_at", ASCENDING)],
+            name="otp_verify_index"
+        )
+        logger.info("OTP verification index created/verified")
     except Exception as e:
         # Check if it's just a "index already exists" error
         if "already exists" in str(e).lower():
-            print("✓ OTP TTL index already exists")
+            logger.debug("OTP TTL index already exists")
         else:
-            print(f"⚠ TTL index setup error: {str(e)}")
+            logger.warning("TTL index setup error: %s", e)
 
-# Setup collection on import
-setup_otp_collection()
+_otp_collection_ready = False
+
+
+def ensure_otp_collection():
+    """Set up OTP indexes once per process, on first use (not at import)"""
+    global _otp_collection_ready
+    if not _otp_collection_ready:
+        setup_otp_collection()
+        _otp_collection_ready = True
 
 def generate_otp():
     return str(random.randint(100000, 999999))
 
 def send_email_otp(email, otp):
+    """Queue the OTP email for background delivery over the pooled SMTP connections"""
     try:
         body = f"""
 🌾 AgriGPT Verification Code 🌾
@@ -56,24 +75,17 @@ Do not share this code with anyone.
         msg["From"] = EMAIL_ID
         msg["To"] = email
 
-        print(f"📧 Attempting to send email to {email}")
-        print(f"📧 Using email: {EMAIL_ID}")
-        
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.starttls()
-        server.login(EMAIL_ID, EMAIL_APP_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        
-        print(f"✅ Email sent successfully to {email}")
+        enqueue_email(msg)
+        logger.info("OTP email queued for %s", email)
         
     except Exception as e:
-        print(f"❌ Error sending email: {str(e)}")
+        logger.error("Error queueing email: %s", e)
         raise
 
 def create_and_send_otp(email, purpose):
     """Generate OTP, save to database, and send via email"""
     try:
+        ensure_otp_collection()
         otp = generate_otp()
         expiry = datetime.utcnow() + timedelta(minutes=OTP_EXPIRY_MINUTES)
         
@@ -91,21 +103,13 @@ def create_and_send_otp(email, purpose):
         result = db.otp_verifications.insert_one(otp_document)
         
         if result.inserted_id:
-            print(f"✅ OTP saved to database with ID: {result.inserted_id}")
-            print(f"✓ OTP generated for {email}: {otp} (expires at {expiry})")
-            print(f"📋 Purpose: {purpose}")
-            
-            # Verify the document was actually saved
-            saved_doc = db.otp_verifications.find_one({"_id": result.inserted_id})
-            if saved_doc:
-                print(f"✅ Verified: OTP document exists in database")
-            else:
-                print(f"⚠️ Warning: OTP was inserted but cannot be retrieved")
+            # Never log the code itself
+            logger.info("OTP generated for %s (purpose: %s, expires at %s)", email, purpose, expiry)
         else:
-            print(f"❌ Failed to insert OTP into database")
+            logger.error("Failed to insert OTP into database")
             raise Exception("Failed to save OTP to database")
         
-        # Send email after successful database save
+        # Queue email after successful database save (delivered in the background)
         send_email_otp(email, otp)
         
         return {
@@ -115,5 +119,82 @@ def create_and_send_otp(email, purpose):
         }
         
     except Exception as e:
-        print(f"❌ Error in create_and_send_otp: {str(e)}")
+        logger.error("Error in create_and_send_otp: %s", e)
         raise Exception(f"Failed to create OTP: {str(e)}")
+
+
+class OTPVerificationError(Exception):
+    """Raised when an OTP does not match or has expired"""
+
+    def __init__(self, message, expired=False):
+        super().__init__(message)
+        self.expired = expired
+
+
+def verify_otp(email, otp):
+    """
+    Verify and consume an OTP in one round trip: the match, the expiry check
+    and marking it verified all happen in a single find_one_and_update.
+
+    Returns:
+        The verified OTP document
+
+    Raises:
+        OTPVerificationError: if no unexpired, unverified OTP matches
+    """
+    ensure_otp_collection()
+    now = datetime.utcnow()
+    record = db.otp_verifications.find_one_and_update(
+        {
+            "email": email,
+            "otp": otp,
+            "verified": False,
+            "expires_at": {"$gt": now}
+        },
+        {"$set": {"verified": True, "verified_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if record:
+        logger.info("OTP verified successfully for %s", email)
+        return record
+
+    # Failure path only: tell an expired code apart from a wrong one
+    expired = db.otp_verifications.find_one(
+        {"email": email, "otp": otp, "verified": False},
+        {"_id": 1}
+    )
+    if expired:
+        logger.info("OTP expired for %s", email)
+        raise OTPVerificationError("OTP expired", expired=True)
+
+    logger.warning("No matching OTP found for %s", email)
+    raise OTPVerificationError("Invalid OTP")
+
+
+# Index list changes only on deploy, so /api/otp/status caches it briefly
+_index_cache = {"indexes": None, "fetched_at": 0.0}
+INDEX_CACHE_SECONDS = 300
+
+
+def get_otp_indexes():
+    """List otp_verifications indexes (cached for INDEX_CACHE_SECONDS)"""
+    ensure_otp_collection()
+    if _index_cache["indexes"] is None or time.monotonic() - _index_cache["fetched_at"] > INDEX_CACHE_SECONDS:
+        _index_cache["indexes"] = list(db.otp_verifications.list_indexes())
+        _index_cache["fetched_at"] = time.monotonic()
+    return _index_cache["indexes"]
+
+
+def get_otp_status():
+    """Document counts for the OTP collection from a single $facet aggregation"""
+    now = datetime.utcnow()
+    result = next(db.otp_verifications.aggregate([
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "verified": [{"$match": {"verified": True}}, {"$count": "n"}],
+            "unverified": [{"$match": {"verified": False}}, {"$count": "n"}],
+            "expired": [{"$match": {"expires_at": {"$lt": now}}}, {"$count": "n"}]
+        }}
+    ]))
+    return {name: (counts[0]["n"] if counts else 0) for name, counts in result.items()}
@@ -0,0 +1,89 @@
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from services.metrics_service import PASSWORD_HASH_SECONDS, PASSWORD_HASH_QUEUE, PASSWORD_HASH_EVENTS
+from utils.config import (
+    BCRYPT_ROUNDS,
+    BCRYPT_WORKERS,
+    BCRYPT_MAX_PENDING,
+    BCRYPT_QUEUE_TIMEOUT_SECONDS
+)
+
+# bcrypt is deliberately slow. Hashes run in a small process pool so a burst
+# of logins cannot pin the web worker's CPU, and a semaphore caps how many
+# hashes may be queued at once (excess requests wait, then fail as busy).
+# Latency, queue depth and rejections are exported as agrigpt_password_hash_*.
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(BCRYPT_MAX_PENDING)
+
+
+class PasswordServiceBusy(Exception):
+    """All hashing slots stayed taken for BCRYPT_QUEUE_TIMEOUT_SECONDS"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Server is busy, please try again")
+        self.retry_after = retry_after
+
+
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=BCRYPT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def _run(op: str, fn, *args):
+    """Run a bcrypt call in the pool, bounded by BCRYPT_MAX_PENDING"""
+    if not _slots.acquire(timeout=BCRYPT_QUEUE_TIMEOUT_SECONDS):
+        PASSWORD_HASH_EVENTS.labels("rejected").inc()
+        raise PasswordServiceBusy(max(1, math.ceil(BCRYPT_QUEUE_TIMEOUT_SECONDS)))
+
+    PASSWORD_HASH_QUEUE.inc()
+    start = time.perf_counter()
+    try:
+        return _get_pool().submit(fn, *args).result()
+    finally:
+        PASSWORD_HASH_SECONDS.labels(op).observe(time.perf_counter() - start)
+        PASSWORD_HASH_QUEUE.dec()
+        _slots.release()
+
+
+def hash_password(password: str) -> bytes:
+    """Hash a password with the configured cost factor (PasswordServiceBusy if saturated)"""
+    return _run("hash", _hash, password.encode(), BCRYPT_ROUNDS)
+
+
+def check_password(password: str, hashed: bytes) -> bool:
+    """Verify a password against a stored bcrypt hash (PasswordServiceBusy if saturated)"""
+    return _run("check", _check, password.encode(), hashed)
+
+
+def needs_rehash(hashed: bytes) -> bool:
+    """True if a stored hash was made with a different cost factor than BCRYPT_ROUNDS"""
+    try:
+        # Format: $2b$12$<salt+hash>
+        return int(hashed.split(b"$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def record_rehash():
+    PASSWORD_HASH_EVENTS.labels("rehashed").inc()
@@ -0,0 +1,315 @@
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING
+from services.db_service import db, report_collection
+from services.pdf_service import preload_renderer, get_cached_report_pdf, export_reports, open_cached_pdf
+from utils.config import (
+    PDF_WORKERS,
+    PDF_MAX_QUEUED_JOBS,
+    PDF_EXPORT_DIR,
+    PDF_EXPORT_TTL_HOURS,
+    PDF_JOB_QUEUED_TIMEOUT_SECONDS,
+    PDF_JOB_RUNNING_TIMEOUT_SECONDS
+)
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# WeasyPrint renders run in separate processes so they never hold a web
+# worker's CPU. Workers are spawned (not forked from a process holding a
+# MongoClient) and preload fonts/CSS once at start.
+#
+# Export job documents:
+# {
+#   "_id": ObjectId,
+#   "user_id": "...",
+#   "format": "pdf" | "zip",
+#   "status": "queued" | "running" | "done" | "failed",
+#   "owner": "host:pid",        # web worker whose pool runs the job
+#   "report_count": 12,
+#   "path": "static/exports/<job_id>.pdf",
+#   "size": 123456,
+#   "error": "...",
+#   "created_at": datetime,
+#   "started_at": datetime,     # set by the PDF process when it picks the job up
+#   "finished_at": datetime
+# }
+# The pool lives inside one web worker. If that worker dies, its jobs never
+# finish: polling marks them failed once the owner is gone or the job has
+# been queued/running past its timeout, so clients stop waiting.
+pdf_jobs_collection = db.pdf_jobs
+
+MAX_EXPORT_REPORTS = 500
+EXPORT_FORMATS = ("pdf", "zip")
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+_indexes_ready = False
+
+
+def _owner() -> str:
+    # Computed per call: pid changes after a fork
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Get (or start) this process's PDF rendering pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=PDF_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=preload_renderer
+                )
+                logger.info("PDF rendering pool started (%s workers)", PDF_WORKERS)
+    return _pool
+
+
+def shutdown_pdf_pool():
+    """Stop the rendering pool (waits for running renders)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def _ensure_indexes():
+    """Expire job documents together with their export files"""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        pdf_jobs_collection.create_index(
+            [("created_at", ASCENDING)],
+            expireAfterSeconds=PDF_EXPORT_TTL_HOURS * 3600,
+            name="pdf_jobs_ttl_index"
+        )
+        pdf_jobs_collection.create_index([("user_id", ASCENDING), ("created_at", ASCENDING)])
+        _indexes_ready = True
+    except Exception as e:
+        logger.warning("PDF job index setup error: %s", e)
+
+
+def _cleanup_exports():
+    """Remove export files older than PDF_EXPORT_TTL_HOURS"""
+    cutoff = time.time() - PDF_EXPORT_TTL_HOURS * 3600
+    try:
+        with os.scandir(PDF_EXPORT_DIR) as it:
+            for entry in it:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Export cleanup error: %s", e)
+
+
+def render_report_pdf(report: dict, timeout: int = 60) -> tuple:
+    """
+    Render (or fetch from cache) a single report PDF in the worker pool.
+    The calling thread waits, but the CPU work happens in a worker process.
+
+    Returns:
+        (path, key) as returned by pdf_service.get_cached_report_pdf
+    """
+    future = get_pdf_pool().submit(get_cached_report_pdf, report)
+    return future.result(timeout=timeout)
+
+
+def open_report_pdf(report: dict, key: str, timeout: int = 60) -> tuple:
+    """
+    Open a report's cached PDF, rendering it in the pool on a miss.
+    The open file survives eviction by other processes until it is sent.
+
+    Returns:
+        (file, size in bytes)
+    """
+    pdf_file = open_cached_pdf(key)
+    for _ in range(2):
+        if pdf_file is not None:
+            return pdf_file, os.fstat(pdf_file.fileno()).st_size
+        render_report_pdf(report, timeout)
+        # Evicted again before we could open it: render once more
+        pdf_file = open_cached_pdf(key)
+    raise FileNotFoundError(f"Report PDF {key[:12]} was evicted before it could be sent")
+
+
+def submit_export_job(user_id: str, report_ids: list = None, fmt: str = "pdf") -> dict:
+    """
+    Queue a batch export of a user's farming reports.
+
+    Args:
+        user_id: Owner of the reports
+        report_ids: Optional list of report IDs (default: all of the user's reports)
+        fmt: "pdf" (one combined PDF) or "zip" (one PDF per report)
+
+    Returns:
+        The job document (with string _id)
+    """
+    global _pending
+
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    query = {"user_id": user_id}
+    if report_ids:
+        try:
+            query["_id"] = {"$in": [ObjectId(rid) for rid in report_ids]}
+        except (InvalidId, TypeError):
+            raise ValueError("Invalid report id")
+
+    # Reserve a slot; released below unless the job reaches the pool
+    with _pending_lock:
+        if _pending >= PDF_MAX_QUEUED_JOBS:
+            raise RuntimeError("Too many exports in progress, please try again later")
+        _pending += 1
+    submitted = False
+    try:
+        job = _submit(user_id, query, fmt)
+        submitted = True
+        return job
+    finally:
+        if not submitted:
+            with _pending_lock:
+                _pending -= 1
+
+
+def _submit(user_id: str, query: dict, fmt: str) -> dict:
+    _ensure_indexes()
+
+    reports = [
+        doc["report_data"]
+        for doc in report_collection.find(query, {"report_data": 1})
+                                    .sort("timestamp", -1)
+                                    .limit(MAX_EXPORT_REPORTS)
+    ]
+    if not reports:
+        raise ValueError("No reports found to export")
+
+    job = {
+        "user_id": user_id,
+        "format": fmt,
+        "status": "queued",
+        "owner": _owner(),
+        "report_count": len(reports),
+        "created_at": datetime.now(timezone.utc)
+    }
+    job_id = pdf_jobs_collection.insert_one(job).inserted_id
+    target_path = os.path.join(PDF_EXPORT_DIR, f"{job_id}.{fmt}")
+
+    _cleanup_exports()
+
+    try:
+        future = get_pdf_pool().submit(_run_export_job, job_id, reports, fmt, target_path)
+    except Exception as e:
+        pdf_jobs_collection.update_one({"_id": job_id}, {"$set": {
+            "status": "failed", "error": str(e), "finished_at": datetime.now(timezone.utc)
+        }})
+        raise
+    future.add_done_callback(lambda f: _finish_export_job(job_id, f))
+
+    logger.info("Export job queued: %s (%s reports, %s)", job_id, len(reports), fmt)
+    job["_id"] = str(job_id)
+    return job
+
+
+def _run_export_job(job_id, reports: list, fmt: str, target_path: str) -> dict:
+    """Runs in a PDF process: mark the job running, then render it"""
+    try:
+        pdf_jobs_collection.update_one(
+            {"_id": job_id, "status": "queued"},
+            {"$set": {"status": "running", "started_at": datetime.now(timezone.utc)}}
+        )
+    except Exception as e:
+        logger.warning("Could not mark export job %s running: %s", job_id, e)
+    return export_reports(reports, fmt, target_path)
+
+
+def _finish_export_job(job_id, future):
+    """Record the outcome of an export job (runs in the pool's callback thread)"""
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+    update = {"finished_at": datetime.now(timezone.utc)}
+    try:
+        result = future.result()
+        update.update({"status": "done", "path": result["path"], "size": result["size"]})
+        logger.info("Export job finished: %s", job_id)
+    except Exception as e:
+        update.update({"status": "failed", "error": str(e)})
+        logger.error("Export job failed: %s: %s", job_id, e)
+
+    try:
+        pdf_jobs_collection.update_one({"_id": job_id}, {"$set": update})
+    except Exception as e:
+        logger.error("Error updating export job: %s", e)
+
+
+def _owner_gone(owner: str) -> bool:
+    """True if the owning web worker ran on this host and no longer exists"""
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False  # other host: rely on the timeouts
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def _fail_if_stale(job: dict) -> dict:
+    """Mark a queued/running job failed if its worker is gone or it has run too long"""
+    if job["status"] == "queued":
+        since, timeout = job["created_at"], PDF_JOB_QUEUED_TIMEOUT_SECONDS
+    elif job["status"] == "running":
+        since, timeout = job.get("started_at") or job["created_at"], PDF_JOB_RUNNING_TIMEOUT_SECONDS
+    else:
+        return job
+
+    now = datetime.now(timezone.utc)
+    expired = since.replace(tzinfo=timezone.utc) + timedelta(seconds=timeout) < now
+    if not expired and not _owner_gone(job.get("owner")):
+        return job
+
+    error = "Export was interrupted (server restarted), please try again"
+    result = pdf_jobs_collection.update_one(
+        {"_id": job["_id"], "status": job["status"]},
+        {"$set": {"status": "failed", "error": error, "finished_at": now}}
+    )
+    if result.modified_count:
+        logger.warning("Export job %s marked failed (stale %s)", job["_id"], job["status"])
+        job.update({"status": "failed", "error": error, "finished_at": now})
+        return job
+    # Finished meanwhile
+    return pdf_jobs_collection.find_one({"_id": job["_id"]}) or job
+
+
+def get_export_job(job_id: str, user_id: str):
+    """Get an export job owned by the user (status and result); ValueError on a malformed id"""
+    if not ObjectId.is_valid(job_id):
+        raise ValueError("Invalid export job id")
+    try:
+        job = pdf_jobs_collection.find_one({"_id": ObjectId(job_id), "user_id": user_id})
+        if not job:
+            return None
+        job = _fail_if_stale(job)
+        job["_id"] = str(job["_id"])
+        return job
+    except Exception as e:
+        logger.error("Error getting export job: %s", e)
+        return None
@@ -1,46 +1,243 @@
-from weasyprint import HTML
-import uuid
+from html import escape
+import hashlib
+import shutil
+import zipfile
 import os
+from utils.config import PDF_CACHE_DIR, PDF_CACHE_MAX_MB
+from utils.log import get_logger
 
-def generate_report_pdf(report: dict) -> str:
-    os.makedirs("static/reports", exist_ok=True)
+logger = get_logger(__name__)
 
-    filename = f"{report['crop']}_{uuid.uuid4().hex}.pdf"
-    path = f"static/reports/{filename}"
+REPORT_CSS = """
+body {
+    font-family: DejaVu Sans, sans-serif;
+    line-height: 1.6;
+}
+h1 { color: green; }
+h2 { margin-top: 20px; }
+.report { page-break-after: always; }
+.report:last-child { page-break-after: auto; }
+"""
 
-    html = f"""
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <style>
-            body {{
-                font-family: DejaVu Sans, sans-serif;
-                line-height: 1.6;
-            }}
-            h1 {{ color: green; }}
-            h2 {{ margin-top: 20px; }}
-        </style>
-    </head>
-    <body>
+# Font configuration and parsed stylesheet are reused across renders.
+# Building them (and the first render) pays for font discovery, so worker
+# processes call preload_renderer() once at start. WeasyPrint itself is only
+# imported there, so web workers that merely hash/serve cached PDFs never load it.
+_font_config = None
+_stylesheet = None
+
+
+def preload_renderer():
+    """Load fonts and CSS once and run a tiny warm-up render"""
+    global _font_config, _stylesheet
+    if _stylesheet is not None:
+        return
+    from weasyprint import HTML, CSS
+    from weasyprint.text.fonts import FontConfiguration
+    _font_config = FontConfiguration()
+    _stylesheet = CSS(string=REPORT_CSS, font_config=_font_config)
+    HTML(string="<p>AgriGPT 🌾 ଓଡ଼ିଆ हिंदी</p>").write_pdf(
+        stylesheets=[_stylesheet],
+        font_config=_font_config
+    )
 
-    <h1>{report['crop']} – Farming Report</h1>
-    <p><b>Region:</b> {report['region']}</p>
+
+def render_pdf(html: str, target=None):
+    """Render HTML with the shared stylesheet (to a path, or return bytes if no target)"""
+    preload_renderer()
+    from weasyprint import HTML
+    return HTML(string=html).write_pdf(
+        target,
+        stylesheets=[_stylesheet],
+        font_config=_font_config
+    )
+
+
+def build_report_section(report: dict) -> str:
+    """Build the HTML body section for one farming report"""
+    def items(key):
+        return "".join(f"<li>{escape(x)}</li>" for x in report.get(key, []))
+
+    return f"""
+    <section class="report">
+    <h1>{escape(report['crop'])} – Farming Report</h1>
+    <p><b>Region:</b> {escape(report['region'])}</p>
 
     <h2>🌱 Sowing Advice</h2>
-    <ul>{"".join(f"<li>{x}</li>" for x in report['sowingAdvice'])}</ul>
+    <ul>{items('sowingAdvice')}</ul>
 
     <h2>🧪 Fertilizer Plan</h2>
-    <ul>{"".join(f"<li>{x}</li>" for x in report['fertilizerPlan'])}</ul>
+    <ul>{items('fertilizerPlan')}</ul>
 
     <h2>🌦 Weather Tips</h2>
-    <ul>{"".join(f"<li>{x}</li>" for x in report['weatherTips'])}</ul>
+    <ul>{items('weatherTips')}</ul>
 
     <h2>📅 Farming Calendar</h2>
-    <ul>{"".join(f"<li>{x}</li>" for x in report['calendar'])}</ul>
+    <ul>{items('calendar')}</ul>
+    </section>
+    """
+
+
+def build_report_html(report: dict) -> str:
+    """Build the HTML document for a farming report"""
+    return build_reports_html([report])
 
+
+def build_reports_html(reports: list) -> str:
+    """Build one HTML document containing several reports, one per page"""
+    sections = "".join(build_report_section(report) for report in reports)
+    return f"""
+    <html>
+    <head>
+        <meta charset="UTF-8">
+    </head>
+    <body>
+    {sections}
     </body>
     </html>
     """
 
-    HTML(string=html).write_pdf(path)
+
+def report_pdf_key(html: str) -> str:
+    """Content hash of the rendered HTML, used as cache key and ETag"""
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(PDF_CACHE_DIR, f"{key}.pdf")
+
+
+def find_cached_pdf(key: str):
+    """Return the cached PDF path for a content hash (marking it recently used), or None"""
+    path = _cache_path(key)
+    try:
+        # Touch to mark as recently used for LRU eviction
+        os.utime(path, None)
+        return path
+    except FileNotFoundError:
+        return None
+
+
+def open_cached_pdf(key: str):
+    """
+    Open the cached PDF for a content hash (marking it recently used), or None.
+    Serve from the open file: it stays readable even if another process evicts the entry.
+    """
+    path = find_cached_pdf(key)
+    if path is None:
+        return None
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+
+def _evict_pdf_cache(keep: str = None):
+    """Delete least recently used PDFs (never `keep`) until the cache fits in PDF_CACHE_MAX_MB"""
+    max_bytes = PDF_CACHE_MAX_MB * 1024 * 1024
+    try:
+        entries = []
+        total = 0
+        with os.scandir(PDF_CACHE_DIR) as it:
+            for entry in it:
+                if not entry.name.endswith(".pdf"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= max_bytes:
+            return
+
+        # Oldest access time first
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            if path == keep:
+                continue  # just rendered for this caller, even if it alone exceeds the cap
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+    except Exception as e:
+        logger.warning("PDF cache eviction error: %s", e)
+
+
+def get_cached_report_pdf(report: dict) -> tuple:
+    """
+    Get the PDF for a report, rendering it only if it is not already cached.
+
+    Returns:
+        (path, key) where key is the content hash (usable as ETag)
+    """
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+
+    html = build_report_html(report)
+    key = report_pdf_key(html)
+    path = find_cached_pdf(key)
+    if path:
+        return path, key
+
+    path = _cache_path(key)
+
+    # Render to a temp file and move into place atomically
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    render_pdf(html, tmp_path)
+    os.replace(tmp_path, path)
+    logger.info("Rendered report PDF: %s", key[:12])
+
+    _evict_pdf_cache(keep=path)
+    return path, key
+
+
+def _open_report_pdf(report: dict) -> tuple:
+    """
+    Like get_cached_report_pdf, but returns (open file, key) so that eviction
+    by another process cannot remove the PDF before it is read.
+    """
+    for attempt in (1, 2):
+        path, key = get_cached_report_pdf(report)
+        try:
+            return open(path, "rb"), key
+        except FileNotFoundError:
+            # Evicted between render and open: render it again
+            if attempt == 2:
+                raise
+
+
+def generate_report_pdf(report: dict) -> str:
+    path, _ = get_cached_report_pdf(report)
     return path
+
+
+def export_reports(reports: list, fmt: str, target_path: str) -> dict:
+    """
+    Export several reports into one file (runs inside a PDF worker process).
+
+    Args:
+        reports: List of report_data dicts
+        fmt: "pdf" for one combined PDF, "zip" for a ZIP of per-report PDFs
+        target_path: Where to write the export
+
+    Returns:
+        Dict with the export path and size in bytes
+    """
+    os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+    tmp_path = f"{target_path}.{os.getpid()}.tmp"
+
+    if fmt == "zip":
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            for i, report in enumerate(reports, start=1):
+                # Per-report PDFs go through the shared content-hash cache; the
+                # next report's render may evict this one, so copy from the open file
+                pdf_file, _ = _open_report_pdf(report)
+                name = f"{i:02d}_{report.get('crop', 'report')}_{report.get('region', '')}.pdf"
+                with pdf_file, archive.open(name.replace("/", "-").replace(" ", "_"), "w") as entry:
+                    shutil.copyfileobj(pdf_file, entry)
+    else:
+        render_pdf(build_reports_html(reports), tmp_path)
+
+    os.replace(tmp_path, target_path)
+    return {"path": target_path, "size": os.path.getsize(target_path)}
@@ -0,0 +1,278 @@
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from flask import request, jsonify, Response
+from werkzeug.wsgi import ClosingIterator
+from utils.config import (
+    PROFILING_ENABLED,
+    PROFILING_ADMIN_TOKEN,
+    PROFILING_SAMPLE_RATE,
+    PROFILING_BUFFER_SIZE,
+    PROFILING_MODE,
+    PROFILING_SAMPLE_INTERVAL_MS
+)
+
+# On-demand request profiling. A request is profiled when it sends
+# "X-Profile: <PROFILING_ADMIN_TOKEN>" or is sampled (PROFILING_SAMPLE_RATE).
+# Profiles are kept in a per-worker ring buffer:
+# {
+#   "id": "<pid>-<n>",
+#   "method", "path", "status", "duration_ms", "mode", "captured_at",
+#   "pstats": <marshalled pstats data>,   # cprofile mode
+#   "collapsed": Counter                  # "frame;frame;frame" -> samples/microseconds
+# }
+# With PROFILING_ENABLED=false nothing is installed, so requests pay nothing.
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+EXCLUDED_PREFIXES = ("/api/admin/profiles", "/metrics")
+MAX_STACK_DEPTH = 64
+
+_profiles = deque(maxlen=PROFILING_BUFFER_SIZE)
+_profiles_lock = threading.Lock()
+_ids = itertools.count(1)
+# cProfile is one per process on Python 3.12+ (sys.monitoring), so
+# concurrent requests are not cProfiled at the same time
+_cprofile_lock = threading.Lock()
+
+
+def _is_admin(token: str) -> bool:
+    return bool(PROFILING_ADMIN_TOKEN) and hmac.compare_digest(token or "", PROFILING_ADMIN_TOKEN)
+
+
+def _frame_label(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+# -------------------- PROFILERS --------------------
+
+class _SamplingProfiler:
+    """Samples one thread's stack every PROFILING_SAMPLE_INTERVAL_MS into collapsed stacks"""
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _run(self):
+        interval = PROFILING_SAMPLE_INTERVAL_MS / 1000
+        while not self._stop.wait(interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _collapse_pstats(stats: dict) -> Counter:
+    """
+    Approximate collapsed stacks (in microseconds) from cProfile's
+    caller/callee graph, splitting each function's time across its callers.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    def label(func):
+        filename, _, name = func
+        module = os.path.splitext(os.path.basename(filename))[0] if filename != "~" else "builtin"
+        return f"{module}:{name}"
+
+    collapsed = Counter()
+
+    def walk(func, path, share):
+        _, _, tt, ct, _ = stats[func]
+        path = path + [label(func)]
+        collapsed[";".join(path)] += int(tt * share * 1_000_000)
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, []):
+            if label(callee) in path:
+                continue  # recursion
+            callee_ct = stats[callee][3]
+            if callee_ct > 0:
+                walk(callee, path, share * edge_ct / callee_ct)
+
+    # Roots: time not accounted for by any recorded caller (entry points)
+    for func, (_, _, _, ct, callers) in stats.items():
+        unattributed = ct - sum(edge[3] for edge in callers.values())
+        if ct > 0 and unattributed > ct * 0.01:
+            walk(func, [], unattributed / ct)
+    return +collapsed  # drop zero entries
+
+
+# -------------------- MIDDLEWARE --------------------
+
+class ProfilingMiddleware:
+    """WSGI middleware profiling requests chosen by header or sampling"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def _should_profile(self, environ) -> bool:
+        if environ.get("PATH_INFO", "").startswith(EXCLUDED_PREFIXES):
+            return False
+        if PROFILE_HEADER in environ:
+            return _is_admin(environ[PROFILE_HEADER])
+        return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+    def __call__(self, environ, start_response):
+        if not self._should_profile(environ):
+            return self.wsgi_app(environ, start_response)
+
+        mode = PROFILING_MODE
+        if mode == "cprofile" and not _cprofile_lock.acquire(blocking=False):
+            mode = "sampling"  # another request holds the process-wide profiler
+
+        profile_id = f"{os.getpid()}-{next(_ids)}"
+        status = {}
+
+        def profiled_start_response(status_line, headers, exc_info=None):
+            status["code"] = int(status_line.split(" ", 1)[0])
+            headers = list(headers) + [("X-Profile-Id", profile_id)]
+            return start_response(status_line, headers, exc_info)
+
+        start = time.perf_counter()
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            resume, pause = profiler.enable, profiler.disable
+        else:
+            profiler = _SamplingProfiler(threading.get_ident())
+            profiler.start()
+            resume = pause = lambda: None  # samples only this thread's stack anyway
+        finished = []
+
+        def finish():
+            # Runs once, when the server closes the response (or the app raised)
+            if finished:
+                return
+            finished.append(True)
+            if mode == "cprofile":
+                pause()
+                _cprofile_lock.release()
+                stats = pstats.Stats(profiler).stats
+                entry = {"pstats": marshal.dumps(stats), "collapsed": _collapse_pstats(stats)}
+            else:
+                profiler.stop()
+                entry = {"pstats": None, "collapsed": profiler.samples}
+            entry.update({
+                "id": profile_id,
+                "method": environ.get("REQUEST_METHOD"),
+                "path": environ.get("PATH_INFO"),
+                "status": status.get("code"),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "mode": mode,
+                "captured_at": datetime.now(timezone.utc).isoformat()
+            })
+            with _profiles_lock:
+                _profiles.append(entry)
+
+        resume()
+        try:
+            app_iter = self.wsgi_app(environ, profiled_start_response)
+        except BaseException:
+            finish()
+            raise
+        finally:
+            pause()
+
+        def chunks():
+            # Profile body generation (streamed responses), not the server's socket writes
+            iterator = iter(app_iter)
+            while True:
+                resume()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    pause()
+                yield chunk
+
+        def close():
+            # Reach the app's iterable (file handles, call_on_close), then record the profile
+            try:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+            finally:
+                finish()
+
+        # Streams the body through instead of buffering it
+        return ClosingIterator(chunks(), close)
+
+
+# -------------------- ADMIN ENDPOINTS --------------------
+
+def _summary(entry: dict) -> dict:
+    return {key: entry[key] for key in ("id", "method", "path", "status", "duration_ms", "mode", "captured_at")}
+
+
+def list_profiles():
+    """Profiles captured by this worker, newest first"""
+    if not _is_admin(request.headers.get("X-Admin-Token")):
+        return jsonify({"error": "Forbidden"}), 403
+    with _profiles_lock:
+        entries = [_summary(entry) for entry in reversed(_profiles)]
+    return jsonify({"pid": os.getpid(), "profiles": entries})
+
+
+def get_profile(profile_id):
+    """One profile as ?format=text (default), pstats (binary) or collapsed (flamegraph.pl input)"""
+    if not _is_admin(request.headers.get("X-Admin-Token")):
+        return jsonify({"error": "Forbidden"}), 403
+    with _profiles_lock:
+        entry = next((e for e in _profiles if e["id"] == profile_id), None)
+    if entry is None:
+        return jsonify({"error": "Profile not found in this worker", "pid": os.getpid()}), 404
+
+    fmt = request.args.get("format", "text")
+    if fmt == "collapsed":
+        lines = "\n".join(f"{stack} {count}" for stack, count in entry["collapsed"].most_common())
+        return Response(lines + "\n", mimetype="text/plain")
+
+    if entry["pstats"] is None:
+        return jsonify({"error": f"format={fmt} needs a cprofile-mode profile, use format=collapsed"}), 400
+    if fmt == "pstats":
+        return Response(
+            entry["pstats"],
+            mimetype="application/octet-stream",
+            headers={"Content-Disposition": f"attachment; filename=profile-{profile_id}.pstats"}
+        )
+    if fmt == "text":
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = marshal.loads(entry["pstats"])
+        stats.get_top_level_stats()
+        stats.sort_stats("cumulative").print_stats(50)
+        return Response(stream.getvalue(), mimetype="text/plain")
+    return jsonify({"error": "format must be text, pstats or collapsed"}), 400
+
+
+def init_profiling(app):
+    """Install the profiling middleware and admin endpoints (no-op when disabled)"""
+    if not PROFILING_ENABLED:
+        return
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app)
+    app.add_url_rule("/api/admin/profiles", "list_profiles", list_profiles, methods=["GET"])
+    app.add_url_rule("/api/admin/profiles/<profile_id>", "get_profile", get_profile, methods=["GET"])
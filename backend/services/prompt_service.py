@@ -0,0 +1,154 @@
+from functools import lru_cache
+
+# Prompt templates are split into a fixed prefix and a per-request suffix.
+# Prefixes are module-level constants so they are byte-identical on every call:
+# that is what lets Gemini reuse them from its context cache (explicit
+# CachedContent, or implicit prefix caching) instead of billing them again.
+
+# -------------------- CHAT --------------------
+CHAT_PREFIX = (
+    "You are AgriGPT, a friendly agricultural assistant for Indian farmers. "
+    "Your purpose is to help with farming-related questions.\n"
+    "\nWhen introducing yourself or responding to greetings/questions about your capabilities:\n"
+    "- Say 'I am AgriGPT, your agricultural assistant'\n"
+    "- Mention you can help with: crop selection, soil & fertilizers, pest management, "
+    "irrigation, government schemes, and weather impact on farming\n"
+    "- Be warm, friendly, and conversational\n"
+    "- For 'how are you' type questions, respond naturally (e.g., 'I am fine and ready to help with your farming questions!')\n"
+    "- For 'what can you do' or 'your service', explain your agricultural assistance capabilities\n"
+    "- For general conversation starters like 'so let's begin', encourage them to ask their farming queries\n"
+)
+
+
+@lru_cache(maxsize=32)
+def chat_language_rule(language: str) -> str:
+    """Language instruction for chat (critical for multilingual support)"""
+    return (
+        f"\nCRITICAL LANGUAGE RULE: You MUST respond COMPLETELY and ENTIRELY in {language} language only. "
+        f"Do NOT mix languages. Do NOT switch languages mid-response. "
+        f"Every single word must be in {language}.\n"
+    )
+
+
+def build_chat_suffix(current_message: str, language: str, chat_history: list) -> str:
+    """Per-request part of the chat prompt (language rule, history, question)"""
+    prompt_parts = [chat_language_rule(language)]
+
+    # Conversation context (if exists)
+    if chat_history and len(chat_history) > 0:
+        prompt_parts.append("\n=== CONVERSATION HISTORY ===")
+        for msg in chat_history:
+            role_label = "User" if msg["role"] == "user" else "AgriGPT"
+            prompt_parts.append(f"{role_label}: {msg['message']}")
+        prompt_parts.append("=== END OF HISTORY ===\n")
+
+    # Current user message
+    prompt_parts.append(f"\nCurrent User Question:\n{current_message}")
+
+    # Instruction for contextual understanding
+    if chat_history:
+        prompt_parts.append(
+            "\nIMPORTANT: Use the conversation history above to understand context, "
+            "references (like 'this', 'that', 'earlier'), and provide relevant answers. "
+            f"Respond ONLY in {language} language."
+        )
+
+    return "\n".join(prompt_parts)
+
+
+# -------------------- REPORT --------------------
+REPORT_PREFIX = """You are an expert agricultural advisor for Indian farmers.
+
+You will be given a crop, a region and a language. Generate a detailed farming report.
+
+Provide exactly 4 points for each of these 4 categories (write the points in the requested language only):
+
+**Category 1 - Sowing Advice:**
+- Best sowing time and season
+- Seed depth and spacing
+- Row spacing
+- Watering after sowing
+Start each point with these emojis in order: 🌱 📏 🌾 💧
+
+**Category 2 - Fertilizer Plan:**
+- Nitrogen quantity (kg/hectare)
+- Phosphorus quantity
+- Potash quantity
+- Organic manure recommendations
+Start each point with these emojis in order: 🧪 🟡 🔴 🌿
+
+**Category 3 - Weather Protection:**
+- Sun/heat protection
+- Rain/drainage management
+- Cold weather protection
+- Wind protection
+Start each point with these emojis in order: ☀️ 🌧️ ❄️ 🌪️
+
+**Category 4 - Farming Calendar:**
+- Week 1-2 activities
+- Week 3-4 activities
+- Week 5-8 activities
+- Week 12-16 harvest
+Start each point with these emojis in order: 📅 🌱 💧 🌾
+
+**IMPORTANT:** Format your response EXACTLY like this (keep the section headers in English):
+
+SOWING_ADVICE:
+🌱 [advice in the requested language]
+📏 [advice in the requested language]
+🌾 [advice in the requested language]
+💧 [advice in the requested language]
+
+FERTILIZER_PLAN:
+🧪 [plan in the requested language]
+🟡 [plan in the requested language]
+🔴 [plan in the requested language]
+🌿 [plan in the requested language]
+
+WEATHER_TIPS:
+☀️ [tip in the requested language]
+🌧️ [tip in the requested language]
+❄️ [tip in the requested language]
+🌪️ [tip in the requested language]
+
+FARMING_CALENDAR:
+📅 [schedule in the requested language]
+🌱 [schedule in the requested language]
+💧 [schedule in the requested language]
+🌾 [schedule in the requested language]
+"""
+
+
+@lru_cache(maxsize=32)
+def report_language_instruction(language: str) -> str:
+    """Language-specific instruction for reports"""
+    if language == "English":
+        return "Write EVERY word in English only. Do NOT use Hindi, Odia, or any other language."
+    if language == "Hindi":
+        return "हर शब्द केवल हिंदी में लिखें। अंग्रेजी या अन्य भाषा का उपयोग न करें।"
+    return f"Write EVERY single word in {language} language ONLY. Do NOT mix any other language."
+
+
+def build_report_suffix(crop_name: str, region: str, language: str) -> str:
+    """Per-request part of the report prompt"""
+    return f"""
+**CRITICAL REQUIREMENT:**
+{report_language_instruction(language)}
+
+Generate the farming report for:
+- Crop: {crop_name}
+- Region: {region}
+- Language: {language}
+"""
+
+
+# -------------------- REPORT TRANSLATION --------------------
+TRANSLATION_PREFIX = """You translate farming reports for Indian farmers.
+
+Keep these rules:
+- Write EVERY single word of the points in the target language ONLY. Do NOT add, remove or merge points.
+- Keep the section headers (SOWING_ADVICE:, FERTILIZER_PLAN:, WEATHER_TIPS:, FARMING_CALENDAR:) exactly as they are, in English
+- Keep every emoji at the start of its line
+- Keep numbers and units (kg/hectare, cm, Week 1-2) accurate
+- Output ONLY the translated report, one point per line
+"""
@@ -0,0 +1,246 @@
+import math
+import threading
+import jwt
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import request, jsonify
+from pymongo import ASCENDING, ReturnDocument
+from services.db_service import db
+from utils.config import RATE_LIMIT_ENABLED, RATE_LIMIT_BACKEND, RATE_LIMIT_TRUSTED_PROXIES, JWT_SECRET_KEY
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Admission control: cheap checks that reject over-limit requests with 429
+# before any bcrypt, SMTP, database or Gemini work starts.
+#
+# Two algorithms:
+# - sliding window (login / OTP abuse): approximated with the current and
+#   previous fixed-window counters, weighted by how far into the window we are
+# - token bucket (chat): allows short bursts up to capacity, refilling steadily
+
+
+def parse_rate(rate: str) -> tuple:
+    """Parse "<requests>/<seconds>" into (requests, seconds)"""
+    count, seconds = rate.split("/")
+    return int(count), int(seconds)
+
+
+# -------------------- BACKENDS --------------------
+
+class MemoryBackend:
+    """Per-process limiter state (development, single worker)"""
+
+    def __init__(self):
+        self._windows = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def sliding_window(self, key: str, limit: int, window: int) -> tuple:
+        now = time.time()
+        index = int(now // window)
+        with self._lock:
+            current_index, count, prev_count = self._windows.get(key, (index, 0, 0))
+            if current_index == index - 1:
+                prev_count, count = count, 0
+            elif current_index != index:
+                prev_count, count = 0, 0
+            count += 1
+            self._windows[key] = (index, count, prev_count)
+        return _window_decision(now, window, count, prev_count, limit)
+
+    def token_bucket(self, key: str, capacity: int, refill_rate: float) -> tuple:
+        now = time.time()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+        return allowed, 0 if allowed else (1 - tokens) / refill_rate
+
+
+class MongoBackend:
+    """
+    Limiter state shared by all workers. Each check is one atomic
+    find_one_and_update with an update pipeline, on a TTL-indexed collection.
+    """
+
+    def __init__(self):
+        self.collection = db.rate_limits
+        self._indexes_ready = False
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        self.collection.create_index(
+            [("expires_at", ASCENDING)],
+            expireAfterSeconds=0,
+            name="rate_limit_ttl_index"
+        )
+        self._indexes_ready = True
+
+    def sliding_window(self, key: str, limit: int, window: int) -> tuple:
+        self._ensure_indexes()
+        now = time.time()
+        index = int(now // window)
+        doc = self.collection.find_one_and_update(
+            {"_id": f"sw:{key}"},
+            [{"$set": {
+                "prev_count": {"$switch": {
+                    "branches": [
+                        {"case": {"$eq": ["$window", index]}, "then": "$prev_count"},
+                        {"case": {"$eq": ["$window", index - 1]}, "then": "$count"}
+                    ],
+                    "default": 0
+                }},
+                "count": {"$cond": [{"$eq": ["$window", index]}, {"$add": ["$count", 1]}, 1]},
+                "window": index,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=2 * window)
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return _window_decision(now, window, doc["count"], doc["prev_count"], limit)
+
+    def token_bucket(self, key: str, capacity: int, refill_rate: float) -> tuple:
+        self._ensure_indexes()
+        now = time.time()
+        doc = self.collection.find_one_and_update(
+            {"_id": f"tb:{key}"},
+            [
+                {"$set": {
+                    "tokens": {"$min": [
+                        capacity,
+                        {"$add": [
+                            {"$ifNull": ["$tokens", capacity]},
+                            {"$multiply": [{"$subtract": [now, {"$ifNull": ["$ts", now]}]}, refill_rate]}
+                        ]}
+                    ]},
+                    "ts": now
+                }},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=math.ceil(capacity / refill_rate))
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        allowed = doc["allowed"]
+        return allowed, 0 if allowed else (1 - doc["tokens"]) / refill_rate
+
+
+def _window_decision(now: float, window: int, count: int, prev_count: int, limit: int) -> tuple:
+    """Sliding-window estimate from two fixed windows -> (allowed, retry_after_seconds)"""
+    elapsed = (now % window) / window
+    estimate = prev_count * (1 - elapsed) + count
+    if estimate <= limit:
+        return True, 0
+    return False, window - (now % window)
+
+
+_backend = MongoBackend() if RATE_LIMIT_BACKEND == "mongo" else MemoryBackend()
+_proxy_warning_logged = False
+
+
+# -------------------- RULES --------------------
+
+def client_ip() -> str:
+    """
+    Caller IP. Behind RATE_LIMIT_TRUSTED_PROXIES proxies this is the
+    X-Forwarded-For entry added by the outermost one, counted from the right:
+    entries further left are whatever the client sent and can't be trusted.
+    """
+    global _proxy_warning_logged
+    forwarded = request.headers.get("X-Forwarded-For", "")
+    if RATE_LIMIT_TRUSTED_PROXIES > 0:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if len(hops) >= RATE_LIMIT_TRUSTED_PROXIES:
+            return hops[-RATE_LIMIT_TRUSTED_PROXIES]
+        # Fewer hops than proxies: request didn't come through the chain
+    elif forwarded and not _proxy_warning_logged:
+        _proxy_warning_logged = True
+        logger.warning(
+            "X-Forwarded-For received but RATE_LIMIT_TRUSTED_PROXIES=0: "
+            "per-IP limits are applied to the proxy address, shared by all clients"
+        )
+    return request.remote_addr or "unknown"
+
+
+def request_email():
+    """Lower-cased email from the JSON body, if any"""
+    data = request.get_json(silent=True) or {}
+    email = data.get("email")
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def authenticated_user_id():
+    """User ID from a valid Bearer token, or None"""
+    token = request.headers.get("Authorization", "")
+    if not token.startswith("Bearer "):
+        return None
+    try:
+        return jwt.decode(token.split(" ")[1], JWT_SECRET_KEY, algorithms=["HS256"])["user_id"]
+    except Exception:
+        return None
+
+
+def trial_ip():
+    """Caller IP for unauthenticated (trial) requests, None for logged-in users"""
+    return None if authenticated_user_id() else client_ip()
+
+
+def sliding_window(name: str, rate: str, key_func) -> dict:
+    """Rule: at most <requests> per <seconds> (sliding) for each key_func() value"""
+    limit, window = parse_rate(rate)
+    return {"name": name, "kind": "sliding_window", "limit": limit, "window": window, "key_func": key_func}
+
+
+def token_bucket(name: str, rate: str, key_func) -> dict:
+    """Rule: bursts up to <requests>, refilling <requests> per <seconds>, per key_func() value"""
+    capacity, seconds = parse_rate(rate)
+    return {"name": name, "kind": "token_bucket", "capacity": capacity,
+            "refill_rate": capacity / seconds, "key_func": key_func}
+
+
+def check_rule(rule: dict):
+    """Apply one rule -> (allowed, retry_after). Rules whose key_func returns None are skipped."""
+    subject = rule["key_func"]()
+    if subject is None:
+        return True, 0
+    key = f"{rule['name']}:{subject}"
+    if rule["kind"] == "sliding_window":
+        return _backend.sliding_window(key, rule["limit"], rule["window"])
+    return _backend.token_bucket(key, rule["capacity"], rule["refill_rate"])
+
+
+def admission_control(*rules):
+    """Reject requests exceeding any of the rules with 429 and Retry-After"""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not RATE_LIMIT_ENABLED:
+                return f(*args, **kwargs)
+            for rule in rules:
+                try:
+                    allowed, retry_after = check_rule(rule)
+                except Exception as e:
+                    # Fail open: a limiter outage must not take the API down
+                    logger.warning("Rate limiter error (%s): %s", rule['name'], e)
+                    continue
+                if not allowed:
+                    retry_after = max(1, math.ceil(retry_after))
+                    response = jsonify({
+                        "error": "Too many requests. Please try again later.",
+                        "retry_after": retry_after
+                    })
+                    response.status_code = 429
+                    response.headers["Retry-After"] = str(retry_after)
+                    return response
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, ReturnDocument
+from services.db_service import db
+from utils.config import REPORT_CACHE_TTL_HOURS
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# One document per crop/region:
+# {
+#   "_id": "rice|odisha",
+#   "version": 3,
+#   "canonical": {...report_data...},
+#   "canonical_language": "English",
+#   "translations": {"Hindi": {...report_data...}, ...},
+#   "generated_at": datetime
+# }
+# Translations live inside the canonical document, so replacing or deleting
+# the canonical report invalidates every translation with it.
+report_cache_collection = db.report_cache
+
+_indexes_ready = False
+
+
+def _ensure_indexes():
+    """Create the TTL index on first use (expires canonical + translations together)"""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        report_cache_collection.create_index(
+            [("generated_at", ASCENDING)],
+            expireAfterSeconds=REPORT_CACHE_TTL_HOURS * 3600,
+            name="report_cache_ttl_index"
+        )
+        _indexes_ready = True
+    except Exception as e:
+        logger.warning("Report cache index setup error: %s", e)
+
+
+def make_report_key(crop_name: str, region: str) -> str:
+    """Normalize crop/region into a stable cache key"""
+    crop = " ".join(crop_name.lower().split())
+    place = " ".join(region.lower().split())
+    return f"{crop}|{place}"
+
+
+def get_canonical_report(crop_name: str, region: str):
+    """
+    Get the cached canonical report for a crop/region.
+
+    Returns:
+        The cache document (with canonical report, version and translations) or None
+    """
+    _ensure_indexes()
+    try:
+        doc = report_cache_collection.find_one({"_id": make_report_key(crop_name, region)})
+        if not doc:
+            return None
+
+        # TTL monitor only runs once a minute, so also check age here
+        generated_at = doc["generated_at"].replace(tzinfo=timezone.utc)
+        if generated_at + timedelta(hours=REPORT_CACHE_TTL_HOURS) < datetime.now(timezone.utc):
+            return None
+
+        return doc
+    except Exception as e:
+        logger.error("Error reading report cache: %s", e)
+        return None
+
+
+def save_canonical_report(crop_name: str, region: str, language: str, report_data: dict) -> int:
+    """
+    Store a freshly generated canonical report.
+    Replacing the canonical report drops all of its cached translations.
+
+    Returns:
+        The new cache version number
+    """
+    _ensure_indexes()
+    key = make_report_key(crop_name, region)
+    doc = report_cache_collection.find_one_and_update(
+        {"_id": key},
+        {
+            "$set": {
+                "canonical": report_data,
+                "canonical_language": language,
+                "translations": {},
+                "generated_at": datetime.now(timezone.utc)
+            },
+            "$inc": {"version": 1}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    logger.info("Canonical report cached: %s (v%s)", key, doc['version'])
+    return doc["version"]
+
+
+def save_translation(crop_name: str, region: str, version: int, language: str, report_data: dict) -> bool:
+    """
+    Cache a translated report against a specific canonical version.
+    If the canonical report was replaced meanwhile, the stale translation is dropped.
+    language must be a canonical language name (see report.normalize_language).
+    """
+    if not language or "." in language or language.startswith("$"):
+        # Used as a field path below: never let it address other fields
+        logger.warning("Refusing to cache translation for language %r", language)
+        return False
+    key = make_report_key(crop_name, region)
+    try:
+        result = report_cache_collection.update_one(
+            {"_id": key, "version": version},
+            {"$set": {f"translations.{language}": report_data}}
+        )
+        return result.modified_count > 0
+    except Exception as e:
+        logger.error("Error caching translation: %s", e)
+        return False
+
+
+def invalidate_report(crop_name: str, region: str) -> bool:
+    """Remove a canonical report together with all of its translations"""
+    result = report_cache_collection.delete_one({"_id": make_report_key(crop_name, region)})
+    return result.deleted_count > 0
@@ -0,0 +1,190 @@
+import argparse
+import math
+import re
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from services.db_service import chat_collection, chat_sessions_collection
+from utils.config import (
+    SEARCH_MAX_CANDIDATES,
+    SEARCH_MAX_TERMS,
+    SEARCH_PREFIX_MIN_CHARS,
+    SEARCH_SNIPPET_CHARS
+)
+from utils.text_search import tokenize, token_spans, index_terms, normalize
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Full-text search over a user's chat messages.
+#
+# save_chat stores each message's distinct tokens (utils/text_search.py) in
+# chat_history.search_terms, covered by a (user_id, search_terms) multikey
+# index, so the index is updated with every insert. A query fetches the
+# user's most recent messages containing any query term (terms of
+# SEARCH_PREFIX_MIN_CHARS or more also match as prefixes, which catches
+# inflected forms such as Tamil/Malayalam case suffixes), then ranks them
+# with BM25 and returns highlighted snippets.
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.5  # prefix-only matches count half
+
+_indexes_ready = False
+
+
+def _ensure_indexes():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        chat_collection.create_index(
+            [("user_id", ASCENDING), ("search_terms", ASCENDING)],
+            name="chat_search_index"
+        )
+        _indexes_ready = True
+    except Exception as e:
+        logger.warning("Chat search index setup error: %s", e)
+
+
+def _term_filter(term: str):
+    if len(term) >= SEARCH_PREFIX_MIN_CHARS:
+        # Anchored regex: answered from the index as a range scan
+        return re.compile("^" + re.escape(term))
+    return term
+
+
+def _match_weight(token: str, term: str) -> float:
+    if token == term:
+        return 1.0
+    if len(term) >= SEARCH_PREFIX_MIN_CHARS and token.startswith(term):
+        return PREFIX_WEIGHT
+    return 0.0
+
+
+def _snippet(content: str, terms: list) -> dict:
+    """~SEARCH_SNIPPET_CHARS of content around the first hit, with hit offsets"""
+    text = normalize(content)
+    hits = [(start, end) for token, start, end in token_spans(text)
+            if any(_match_weight(token, term) for term in terms)]
+    if not hits:
+        return {"text": text[:SEARCH_SNIPPET_CHARS], "highlights": []}
+
+    start = max(0, hits[0][0] - SEARCH_SNIPPET_CHARS // 4)
+    if start > 0:
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < hits[0][0] else start
+    end = min(len(text), start + SEARCH_SNIPPET_CHARS)
+    if end < len(text):
+        space = text.rfind(" ", hits[0][1], end)
+        end = space if space > 0 else end
+
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    offset = len(prefix) - start
+    return {
+        "text": prefix + text[start:end] + suffix,
+        "highlights": [[s + offset, e + offset] for s, e in hits if s >= start and e <= end]
+    }
+
+
+def search_chats(user_id: str, query: str, limit: int = 20) -> dict:
+    """
+    Search the user's chat messages.
+
+    Returns:
+        {"query", "terms", "results": [{chat_id, title, role, language,
+        timestamp, score, snippet: {text, highlights}}]}, best first
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:SEARCH_MAX_TERMS]
+    if not terms:
+        return {"query": query, "terms": [], "results": []}
+
+    _ensure_indexes()
+    base = {"user_id": user_id}
+    candidates = list(
+        chat_collection.find(
+            {**base, "search_terms": {"$in": [_term_filter(term) for term in terms]}},
+            {"_id": 1, "chat_id": 1, "role": 1, "content": 1, "language": 1, "timestamp": 1}
+        ).sort("timestamp", -1).limit(SEARCH_MAX_CANDIDATES)
+    )
+    if not candidates:
+        return {"query": query, "terms": terms, "results": []}
+
+    # Document frequencies from index-only counts
+    total = chat_collection.count_documents(base) or 1
+    idf = {}
+    for term in terms:
+        df = chat_collection.count_documents({**base, "search_terms": _term_filter(term)})
+        idf[term] = math.log(1 + (total - df + 0.5) / (df + 0.5))
+
+    scored = []
+    tokenized = [tokenize(doc["content"]) for doc in candidates]
+    avg_length = sum(len(tokens) for tokens in tokenized) / len(tokenized) or 1
+    for doc, tokens in zip(candidates, tokenized):
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / avg_length)
+        score, matched = 0.0, 0
+        for term in terms:
+            tf = sum(_match_weight(token, term) for token in tokens)
+            if tf:
+                matched += 1
+                score += idf[term] * tf * (BM25_K1 + 1) / (tf + length_norm)
+        if matched:
+            # Messages containing more of the query rank first
+            scored.append((score * matched / len(terms), doc))
+
+    # Stable sort: equal scores keep the newest-first order
+    scored.sort(key=lambda item: item[0], reverse=True)
+    top = scored[:limit]
+
+    titles = {}
+    chat_ids = list({doc["chat_id"] for _, doc in top if doc.get("chat_id")})
+    if chat_ids:
+        sessions = chat_sessions_collection.find(
+            {"_id": {"$in": [ObjectId(chat_id) for chat_id in chat_ids if ObjectId.is_valid(chat_id)]},
+             "user_id": user_id},
+            {"title": 1}
+        )
+        titles = {str(session["_id"]): session.get("title") for session in sessions}
+
+    return {
+        "query": query,
+        "terms": terms,
+        "results": [{
+            "chat_id": doc.get("chat_id"),
+            "title": titles.get(doc.get("chat_id")),
+            "role": doc["role"],
+            "language": doc.get("language"),
+            "timestamp": doc["timestamp"],
+            "score": round(score, 4),
+            "snippet": _snippet(doc["content"], terms)
+        } for score, doc in top]
+    }
+
+
+def backfill_search_terms(batch_size: int = 1000) -> int:
+    """Add search_terms to messages saved before search existed; returns how many were updated"""
+    _ensure_indexes()
+    updated = 0
+    batch = []
+    cursor = chat_collection.find({"search_terms": {"$exists": False}}, {"content": 1}).batch_size(batch_size)
+    with cursor:
+        for doc in cursor:
+            batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_terms": index_terms(doc.get("content", ""))}}))
+            if len(batch) >= batch_size:
+                updated += chat_collection.bulk_write(batch, ordered=False).modified_count
+                batch = []
+    if batch:
+        updated += chat_collection.bulk_write(batch, ordered=False).modified_count
+    return updated
+
+
+if __name__ == "__main__":
+    # python -m services.search_service --backfill
+    parser = argparse.ArgumentParser(description="Chat search index maintenance")
+    parser.add_argument("--backfill", action="store_true", help="index messages saved before search existed")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    if args.backfill:
+        print(f"Indexed {backfill_search_terms(args.batch_size)} messages")
+    else:
+        parser.print_help()
@@ -0,0 +1,279 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import numpy as np
+from utils.config import (
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_MODEL,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_DIR,
+    SEMANTIC_CACHE_SAVE_EVERY
+)
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Reuses answers for history-free questions that mean the same thing,
+# e.g. "best fertilizer for paddy in kharif" / "which fertilizer for kharif rice".
+# Each language has its own index: a float32 matrix of normalized embeddings
+# (so cosine similarity is a dot product) used as a ring buffer once it reaches
+# SEMANTIC_CACHE_MAX_ENTRIES vectors, which caps memory per language.
+#
+# Every gunicorn worker keeps its own index, so each process saves to its own
+# files (<language>.<pid>.npy/.json) and loading merges all of them, newest
+# entry per question first. Files of exited workers are removed once their
+# entries have been merged into a newer save.
+
+_model = None
+_model_lock = threading.Lock()
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _get_model():
+    """Load the local CPU embedding model on first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(SEMANTIC_CACHE_MODEL, device="cpu")
+                logger.info("Semantic cache model loaded: %s", SEMANTIC_CACHE_MODEL)
+    return _model
+
+
+def embed_question(question: str) -> np.ndarray:
+    """Embed a question into a normalized float32 vector"""
+    vector = _get_model().encode(
+        " ".join(question.lower().split()),
+        normalize_embeddings=True,
+        convert_to_numpy=True
+    )
+    return vector.astype(np.float32)
+
+
+class LanguageIndex:
+    """Bounded in-memory vector index for one language, persisted to disk"""
+
+    def __init__(self, language: str, dim: int, capacity: int):
+        self.language = language
+        self.capacity = capacity
+        # Grown by doubling up to capacity, so rarely used languages stay small
+        self.vectors = np.zeros((min(capacity, 256), dim), dtype=np.float32)
+        self.questions = []
+        self.answers = []
+        self.times = []
+        self.merged = {}  # saved files folded in by load(): entries path -> (vectors path, pid, mtime)
+        self.size = 0
+        self.next_slot = 0
+        self.unsaved = 0
+        self.lock = threading.Lock()
+
+    def search(self, vector: np.ndarray):
+        """Return (score, answer) of the nearest stored question, or (0.0, None)"""
+        with self.lock:
+            if self.size == 0:
+                return 0.0, None
+            scores = self.vectors[:self.size] @ vector
+            best = int(np.argmax(scores))
+            return float(scores[best]), self.answers[best]
+
+    def insert(self, vector: np.ndarray, question: str, answer: str):
+        """Add an entry, overwriting the oldest one when full"""
+        with self.lock:
+            slot = self.next_slot
+            if slot == len(self.vectors):
+                grown = np.zeros((min(self.capacity, slot * 2), self.vectors.shape[1]), dtype=np.float32)
+                grown[:slot] = self.vectors
+                self.vectors = grown
+            self.vectors[slot] = vector
+            if slot == len(self.questions):
+                self.questions.append(question)
+                self.answers.append(answer)
+                self.times.append(time.time())
+            else:
+                self.questions[slot] = question
+                self.answers[slot] = answer
+                self.times[slot] = time.time()
+            self.next_slot = (slot + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.unsaved += 1
+
+    def _paths(self, pid: int = None):
+        base = os.path.join(SEMANTIC_CACHE_DIR, self.language.lower())
+        if pid is not None:
+            base = f"{base}.{pid}"
+        return f"{base}.npy", f"{base}.json"
+
+    def _saved_files(self):
+        """(vectors path, entries path, pid) of every process's save; pid None for a pre-merge file"""
+        shared_vectors, shared_entries = self._paths()
+        files = [(shared_vectors, shared_entries, None)]
+        prefix = shared_entries[:-len(".json")] + "."
+        for entries_path in glob.glob(glob.escape(prefix) + "*.json"):
+            pid = entries_path[len(prefix):-len(".json")]
+            if pid.isdigit():
+                files.append((entries_path[:-len(".json")] + ".npy", entries_path, int(pid)))
+        return [f for f in files if os.path.exists(f[0]) and os.path.exists(f[1])]
+
+    def save(self):
+        """Write this process's vectors and entries to disk atomically"""
+        with self.lock:
+            if self.unsaved == 0:
+                return
+            os.makedirs(SEMANTIC_CACHE_DIR, exist_ok=True)
+            vectors_path, entries_path = self._paths(os.getpid())
+
+            # Store in insertion order (oldest first) so the ring resumes correctly
+            if self.size < self.capacity:
+                order = list(range(self.size))
+            else:
+                order = list(range(self.next_slot, self.capacity)) + list(range(self.next_slot))
+
+            tmp_suffix = ".tmp"
+            with open(vectors_path + tmp_suffix, "wb") as f:
+                np.save(f, self.vectors[order])
+            with open(entries_path + tmp_suffix, "w", encoding="utf-8") as f:
+                json.dump(
+                    [{"q": self.questions[i], "a": self.answers[i], "t": self.times[i]} for i in order],
+                    f,
+                    ensure_ascii=False
+                )
+            os.replace(vectors_path + tmp_suffix, vectors_path)
+            os.replace(entries_path + tmp_suffix, entries_path)
+            self.unsaved = 0
+            self._remove_merged(entries_path)
+
+    def _remove_merged(self, own_entries_path: str):
+        """Delete files this index merged at load whose writer has exited (their entries are in our save)"""
+        for entries_path, (vectors_path, pid, mtime) in self.merged.items():
+            if entries_path == own_entries_path or (pid is not None and _process_alive(pid)):
+                continue
+            try:
+                if os.path.getmtime(entries_path) != mtime:
+                    continue  # rewritten since we merged it
+                os.remove(entries_path)
+                os.remove(vectors_path)
+            except OSError:
+                pass
+        self.merged = {}
+
+    def load(self):
+        """Merge all saved copies, keeping the newest entry per question and the newest `capacity` entries"""
+        dim = self.vectors.shape[1]
+        entries_by_question = {}
+        merged = {}
+        for vectors_path, entries_path, pid in self._saved_files():
+            try:
+                mtime = os.path.getmtime(entries_path)
+                vectors = np.load(vectors_path)
+                with open(entries_path, encoding="utf-8") as f:
+                    entries = json.load(f)
+            except Exception as e:
+                # Also covers a pair caught halfway through its owner's save
+                logger.warning("Skipping unreadable semantic cache file %s: %s", entries_path, e)
+                continue
+            if vectors.ndim != 2 or vectors.shape[1] != dim or len(entries) != len(vectors):
+                logger.warning("Ignoring incompatible semantic cache file %s", entries_path)
+                continue
+            for entry, vector in zip(entries, vectors):
+                saved_at = entry.get("t", 0.0)
+                current = entries_by_question.get(entry["q"])
+                if current is None or saved_at >= current[0]:
+                    entries_by_question[entry["q"]] = (saved_at, entry["a"], vector)
+            merged[entries_path] = (vectors_path, pid, mtime)
+        if not merged:
+            return
+
+        newest = sorted(entries_by_question.items(), key=lambda item: item[1][0])[-self.capacity:]
+        count = len(newest)
+        with self.lock:
+            self.vectors = np.zeros((max(count, min(self.capacity, 256)), dim), dtype=np.float32)
+            for i, (_, (_, _, vector)) in enumerate(newest):
+                self.vectors[i] = vector
+            self.questions = [question for question, _ in newest]
+            self.answers = [answer for _, (_, answer, _) in newest]
+            self.times = [saved_at for _, (saved_at, _, _) in newest]
+            self.size = count
+            self.next_slot = count % self.capacity
+            self.merged = merged
+        logger.info("Semantic cache loaded for %s: %s entries from %s files", self.language, count, len(merged))
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _get_index(language: str, dim: int) -> LanguageIndex:
+    """Get (or load) the index for a language"""
+    index = _indexes.get(language)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(language)
+            if index is None:
+                index = LanguageIndex(language, dim, SEMANTIC_CACHE_MAX_ENTRIES)
+                try:
+                    index.load()
+                except Exception as e:
+                    logger.warning("Failed to load semantic cache for %s: %s", language, e)
+                _indexes[language] = index
+    return index
+
+
+def lookup_answer(question: str, language: str):
+    """
+    Find a stored answer for a semantically equivalent question.
+
+    Returns:
+        (answer, vector) - answer is None on a miss; pass vector to store_answer
+        to avoid embedding the question twice
+    """
+    if not SEMANTIC_CACHE_ENABLED:
+        return None, None
+    try:
+        vector = embed_question(question)
+        score, answer = _get_index(language, vector.shape[0]).search(vector)
+        if answer is not None and score >= SEMANTIC_CACHE_THRESHOLD:
+            logger.debug("Semantic cache hit (%s, similarity %.3f)", language, score)
+            return answer, vector
+        return None, vector
+    except Exception as e:
+        logger.warning("Semantic cache lookup error: %s", e)
+        return None, None
+
+
+def store_answer(question: str, answer: str, language: str, vector: np.ndarray = None):
+    """Add a question/answer pair to the language's index"""
+    if not SEMANTIC_CACHE_ENABLED:
+        return
+    try:
+        if vector is None:
+            vector = embed_question(question)
+        index = _get_index(language, vector.shape[0])
+        index.insert(vector, question, answer)
+        if index.unsaved >= SEMANTIC_CACHE_SAVE_EVERY:
+            index.save()
+    except Exception as e:
+        logger.warning("Semantic cache store error: %s", e)
+
+
+def save_all():
+    """Persist every language index to disk"""
+    for index in list(_indexes.values()):
+        try:
+            index.save()
+        except Exception as e:
+            logger.warning("Failed to save semantic cache for %s: %s", index.language, e)
+
+
+atexit.register(save_all)
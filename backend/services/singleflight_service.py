@@ -0,0 +1,208 @@
+import hashlib
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from services.db_service import db
+from utils.config import (
+    LLM_COALESCE_ENABLED,
+    LLM_COALESCE_CROSS_WORKER,
+    LLM_COALESCE_LEASE_SECONDS,
+    LLM_COALESCE_RESULT_SECONDS
+)
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Single-flight execution: concurrent callers with the same key wait for one
+# in-flight call and share its result.
+#
+# Within a process, followers wait on the leader's threading.Event.
+# Across gunicorn workers, the leader holds a lease document:
+# {
+#   "_id": "<key>",
+#   "status": "running" | "done",
+#   "owner": "host:pid",
+#   "result": ...,              # once done
+#   "expires_at": datetime      # lease end, or result retention end once done
+# }
+# Other workers poll it until it is done. If the leader dies, its lease
+# expires and one follower takes it over.
+llm_leases_collection = db.llm_leases
+
+_calls = {}
+_calls_lock = threading.Lock()
+_indexes_ready = False
+
+
+class _InFlightCall:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def make_key(*parts) -> str:
+    """Hash normalized request parts (whitespace-collapsed) into a coalescing key"""
+    normalized = "\x1f".join(" ".join(str(part).split()) for part in parts if part is not None)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _owner() -> str:
+    # Computed per call: pid changes after a fork
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _ensure_indexes():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        llm_leases_collection.create_index(
+            [("expires_at", ASCENDING)],
+            expireAfterSeconds=0,
+            name="llm_lease_ttl_index"
+        )
+        _indexes_ready = True
+    except Exception as e:
+        logger.warning("LLM lease index setup error: %s", e)
+
+
+def single_flight(key: str, fn, timeout: float = None):
+    """
+    Run fn once for all concurrent callers with the same key.
+    A caller whose leader takes longer than it could itself (timeout for the
+    call, plus timeout for a cross-worker lease wait) runs fn on its own.
+
+    Returns:
+        (result, shared) - shared is True when the result came from another caller
+    """
+    if not LLM_COALESCE_ENABLED:
+        return fn(), False
+
+    timeout = timeout or LLM_COALESCE_LEASE_SECONDS
+
+    with _calls_lock:
+        call = _calls.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _InFlightCall()
+            _calls[key] = call
+
+    if not is_leader:
+        # The leader may first wait out another worker's lease, then make its own call
+        wait = timeout * 2 if LLM_COALESCE_CROSS_WORKER else timeout
+        if not call.event.wait(wait):
+            # Leader is stuck: don't fail the request, make the call ourselves
+            logger.warning("In-flight call still running after %ss, running uncoalesced", wait)
+            return fn(), False
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+    try:
+        if LLM_COALESCE_CROSS_WORKER:
+            call.result, shared = _run_with_lease(key, fn, timeout)
+        else:
+            call.result, shared = fn(), False
+        return call.result, shared
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            _calls.pop(key, None)
+        call.event.set()
+
+
+def _run_with_lease(key: str, fn, timeout: float):
+    """Coalesce across workers through a Mongo lease document"""
+    try:
+        _ensure_indexes()
+        is_leader, result = _acquire_or_wait(key, timeout)
+    except Exception as e:
+        # Coordination problems must never block the actual request
+        logger.warning("LLM lease error, running uncoalesced: %s", e)
+        return fn(), False
+
+    if not is_leader:
+        if result is not None:
+            return result, True
+        # Leader never finished in time, run it ourselves
+        return fn(), False
+
+    owner = _owner()
+    try:
+        result = fn()
+    except Exception:
+        try:
+            llm_leases_collection.delete_one({"_id": key, "owner": owner})
+        except Exception:
+            pass
+        raise
+
+    try:
+        llm_leases_collection.update_one(
+            {"_id": key, "owner": owner},
+            {"$set": {
+                "status": "done",
+                "result": result,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=LLM_COALESCE_RESULT_SECONDS)
+            }}
+        )
+    except Exception as e:
+        logger.warning("Failed to publish coalesced result: %s", e)
+    return result, False
+
+
+def _acquire_or_wait(key: str, timeout: float):
+    """
+    Become the leader for key, or wait for the current leader's result.
+
+    Returns:
+        (True, None) if this worker now holds the lease,
+        (False, result) with the leader's result, or (False, None) on timeout
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+
+    while time.monotonic() < deadline:
+        now = datetime.now(timezone.utc)
+        lease_end = now + timedelta(seconds=LLM_COALESCE_LEASE_SECONDS)
+        try:
+            llm_leases_collection.insert_one({
+                "_id": key,
+                "status": "running",
+                "owner": _owner(),
+                "expires_at": lease_end
+            })
+            return True, None
+        except DuplicateKeyError:
+            pass
+
+        doc = llm_leases_collection.find_one({"_id": key})
+        if doc is None:
+            continue  # Released meanwhile, try to acquire again
+
+        expires_at = doc["expires_at"].replace(tzinfo=timezone.utc)
+        if doc["status"] == "done" and expires_at > now:
+            return False, doc["result"]
+
+        if expires_at <= now:
+            # Leader died or result is stale: take the lease over
+            taken = llm_leases_collection.find_one_and_update(
+                {"_id": key, "expires_at": doc["expires_at"]},
+                {"$set": {"status": "running", "owner": _owner(), "expires_at": lease_end},
+                 "$unset": {"result": ""}}
+            )
+            if taken:
+                return True, None
+            continue
+
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+
+    return False, None
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from utils.config import (
+    WARM_UP_ON_START,
+    WARM_UP_AFTER_FORK,
+    READY_COMPONENTS,
+    READY_RETRY_SECONDS
+)
+from utils.startup import timed_init
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Explicit warm-up phase for components that otherwise initialize on first
+# use. Each step is idempotent and timed into the startup report.
+
+
+def _warm_genai():
+    from services.llm_service import get_genai
+    get_genai()
+
+
+def _warm_whisper():
+    from voice import get_whisper_model
+    get_whisper_model()
+
+
+def _warm_whisper_runtime():
+    from voice import preload_whisper_runtime
+    preload_whisper_runtime()
+
+
+def _warm_otp_indexes():
+    from services.otp_service import ensure_otp_collection
+    ensure_otp_collection()
+
+
+def _warm_pdf():
+    from services.pdf_service import preload_renderer
+    preload_renderer()
+
+
+def _warm_embeddings():
+    from services.semantic_cache_service import embed_question
+    embed_question("warm up")
+
+
+def _warm_transcription():
+    from voice import warm_up_transcription
+    warm_up_transcription()
+
+
+def _warm_langdetect():
+    # First detect() loads every language profile
+    from report import detect_language
+    detect_language("How do I protect my paddy crop from stem borer?")
+
+
+def _warm_mongo():
+    from services.db_service import ping
+    ping()
+
+
+def _warm_llm():
+    from services.llm_service import get_model
+    model, _ = get_model("greeting")
+    model.generate_content("ping", generation_config={"max_output_tokens": 1})
+
+
+WARM_UP_STEPS = {
+    "genai": _warm_genai,
+    "whisper": _warm_whisper,
+    "whisper_runtime": _warm_whisper_runtime,
+    "otp_indexes": _warm_otp_indexes,
+    "pdf": _warm_pdf,
+    "embeddings": _warm_embeddings,
+    # Readiness components (run in the background, see start_background_warm_up)
+    "transcription": _warm_transcription,
+    "langdetect": _warm_langdetect,
+    "mongo": _warm_mongo,
+    "llm": _warm_llm
+}
+
+# Readiness: "whisper" means a real (dummy) transcription, not just a loaded model
+READY_STEPS = {"whisper": "transcription"}
+
+
+def warm_up(components=None) -> dict:
+    """
+    Initialize the given components now instead of on first request.
+
+    Failures are logged and reported, never raised: the component will
+    simply initialize (or fail) on first use as before.
+
+    Returns:
+        {component: True/False}
+    """
+    results = {}
+    for name in (WARM_UP_ON_START if components is None else components):
+        step = WARM_UP_STEPS.get(name)
+        if step is None:
+            logger.warning("Unknown warm-up component: %s", name)
+            results[name] = False
+            continue
+        try:
+            with timed_init(name):
+                step()
+            results[name] = True
+        except Exception as e:
+            logger.warning("Warm-up of %s failed: %s", name, e)
+            results[name] = False
+    return results
+
+
+def after_fork() -> dict:
+    """
+    Per-worker setup for a preloaded (forked) app: drop the Mongo and Gemini
+    client state inherited from the master, then warm up WARM_UP_AFTER_FORK.
+    """
+    from services.db_service import reset_after_fork as reset_db
+    from services.llm_service import reset_after_fork as reset_llm
+    with timed_init("after_fork"):
+        reset_db()
+        reset_llm()
+    results = warm_up(WARM_UP_AFTER_FORK)
+    start_background_warm_up()
+    return results
+
+
+# -------------------- READINESS --------------------
+# {component: {"state": "pending" | "warming" | "ready" | "failed", "ms", "error", "attempts"}}
+_readiness = {}
+_readiness_lock = threading.Lock()
+_warm_up_pid = None
+
+
+def _set_state(name: str, **fields):
+    with _readiness_lock:
+        _readiness[name].update(fields)
+
+
+def _background_warm_up(components):
+    pending = list(components)
+    while pending:
+        failed = []
+        for name in pending:
+            with _readiness_lock:
+                _readiness[name]["state"] = "warming"
+                _readiness[name]["attempts"] += 1
+            step = WARM_UP_STEPS[READY_STEPS.get(name, name)]
+            start = time.perf_counter()
+            try:
+                with timed_init(f"ready:{name}"):
+                    step()
+                _set_state(name, state="ready", error=None,
+                           ms=round((time.perf_counter() - start) * 1000, 2))
+            except Exception as e:
+                logger.warning("Warm-up of %s failed, retrying in %ss: %s", name, READY_RETRY_SECONDS, e)
+                _set_state(name, state="failed", error=str(e),
+                           ms=round((time.perf_counter() - start) * 1000, 2))
+                failed.append(name)
+        pending = failed
+        if pending:
+            time.sleep(READY_RETRY_SECONDS)
+    logger.info("Worker %s warm: %s", os.getpid(), ', '.join(components))
+
+
+def start_background_warm_up(components=None):
+    """
+    Warm READY_COMPONENTS in a background thread of this process.
+
+    Failed components are retried every READY_RETRY_SECONDS. Once per
+    process: threads don't survive a fork, so a forked worker starts its own.
+    """
+    global _warm_up_pid
+    components = READY_COMPONENTS if components is None else components
+    with _readiness_lock:
+        if _warm_up_pid == os.getpid():
+            return
+        _warm_up_pid = os.getpid()
+        unknown = [name for name in components if READY_STEPS.get(name, name) not in WARM_UP_STEPS]
+        for name in unknown:
+            logger.warning("Unknown readiness component: %s", name)
+        components = [name for name in components if name not in unknown]
+        _readiness.clear()
+        for name in components:
+            _readiness[name] = {"state": "pending", "ms": None, "error": None, "attempts": 0}
+
+    threading.Thread(
+        target=_background_warm_up,
+        args=(components,),
+        name="warm-up",
+        daemon=True
+    ).start()
+
+
+def get_readiness() -> dict:
+    """Per-component warm-up state for this worker; ready once all are ready"""
+    with _readiness_lock:
+        components = {name: dict(state) for name, state in _readiness.items()}
+    started = _warm_up_pid == os.getpid()
+    return {
+        "ready": started and all(c["state"] == "ready" for c in components.values()),
+        "pid": os.getpid(),
+        "components": components
+    }
@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,6 +7,7 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB = os.getenv("MONGO_DB")
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "2"))
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change-this-secret")
 JWT_EXPIRY_HOURS = int(os.getenv("JWT_EXPIRY_HOURS", "24"))
@@ -15,6 +17,19 @@ EMAIL_ID = os.getenv("EMAIL_ID")
 EMAIL_APP_PASSWORD = os.getenv("EMAIL_APP_PASSWORD")
 OTP_EXPIRY_MINUTES = int(os.getenv("OTP_EXPIRY_MINUTES", "10"))
 
+# SMTP delivery (point SMTP_HOST/SMTP_PORT at a local stand-in such as
+# `python -m aiosmtpd -n -l localhost:1025` with SMTP_USE_TLS/SMTP_USE_AUTH=false for tests)
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+SMTP_USE_AUTH = os.getenv("SMTP_USE_AUTH", "true").lower() == "true"
+SMTP_TIMEOUT_SECONDS = int(os.getenv("SMTP_TIMEOUT_SECONDS", "15"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_HEALTH_CHECK_SECONDS = int(os.getenv("SMTP_HEALTH_CHECK_SECONDS", "30"))
+SMTP_MAX_IDLE_SECONDS = int(os.getenv("SMTP_MAX_IDLE_SECONDS", "240"))
+EMAIL_QUEUE_MAX = int(os.getenv("EMAIL_QUEUE_MAX", "1000"))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", "3"))
+
 if not GEMINI_API_KEY:
     raise ValueError("❌ GEMINI_API_KEY missing")
 
@@ -29,3 +44,165 @@ if not EMAIL_ID:
 
 if not EMAIL_APP_PASSWORD:
     raise ValueError("❌ EMAIL_APP_PASSWORD missing")
+
+# Report Translation Configuration
+# When enabled, one canonical report per crop/region is generated and every
+# other language is derived from it with a cheaper translation call.
+REPORT_TRANSLATION_MODE = os.getenv("REPORT_TRANSLATION_MODE", "false").lower() == "true"
+REPORT_CANONICAL_LANGUAGE = os.getenv("REPORT_CANONICAL_LANGUAGE", "English")
+REPORT_CACHE_TTL_HOURS = int(os.getenv("REPORT_CACHE_TTL_HOURS", "168"))
+
+# PDF Export Configuration
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "static/reports")
+PDF_CACHE_MAX_MB = int(os.getenv("PDF_CACHE_MAX_MB", "200"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_MAX_QUEUED_JOBS = int(os.getenv("PDF_MAX_QUEUED_JOBS", "20"))
+PDF_EXPORT_DIR = os.getenv("PDF_EXPORT_DIR", "static/exports")
+PDF_EXPORT_TTL_HOURS = int(os.getenv("PDF_EXPORT_TTL_HOURS", "24"))
+# Export jobs queued or running longer than this are reported failed (their worker died)
+PDF_JOB_QUEUED_TIMEOUT_SECONDS = int(os.getenv("PDF_JOB_QUEUED_TIMEOUT_SECONDS", "900"))
+PDF_JOB_RUNNING_TIMEOUT_SECONDS = int(os.getenv("PDF_JOB_RUNNING_TIMEOUT_SECONDS", "900"))
+
+# Semantic Answer Cache Configuration
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "20000"))
+SEMANTIC_CACHE_DIR = os.getenv("SEMANTIC_CACHE_DIR", "data/semantic_cache")
+SEMANTIC_CACHE_SAVE_EVERY = int(os.getenv("SEMANTIC_CACHE_SAVE_EVERY", "50"))
+
+# LLM Model Routing Configuration
+# Tiers map to Gemini models and per-1M-token prices (USD) used for cost counters.
+# Routes map a kind of request to a tier; both can be overridden with JSON.
+LLM_MODEL_TIERS = json.loads(os.getenv("LLM_MODEL_TIERS", json.dumps({
+    "light": {"model": "gemini-2.5-flash-lite", "input_cost": 0.10, "output_cost": 0.40},
+    "large": {"model": "gemini-2.5-flash", "input_cost": 0.30, "output_cost": 2.50}
+})))
+LLM_ROUTING_TABLE = json.loads(os.getenv("LLM_ROUTING_TABLE", json.dumps({
+    "greeting": "light",
+    "classification": "light",
+    "translation": "light",
+    "chat": "large",
+    "report": "large"
+})))
+
+# Prompt Prefix Caching Configuration
+# Fixed prompt prefixes are always byte-stable (Gemini implicit caching applies);
+# PROMPT_CACHE_ENABLED additionally stores them as explicit provider-side CachedContent.
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "false").lower() == "true"
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHED_TOKEN_DISCOUNT = float(os.getenv("LLM_CACHED_TOKEN_DISCOUNT", "0.75"))
+
+# LLM Request Coalescing Configuration
+# Identical in-flight LLM calls share one result: within a process always (when
+# enabled), and across gunicorn workers through a Mongo lease document.
+LLM_COALESCE_ENABLED = os.getenv("LLM_COALESCE_ENABLED", "true").lower() == "true"
+LLM_COALESCE_CROSS_WORKER = os.getenv("LLM_COALESCE_CROSS_WORKER", "true").lower() == "true"
+LLM_COALESCE_LEASE_SECONDS = int(os.getenv("LLM_COALESCE_LEASE_SECONDS", "60"))
+LLM_COALESCE_RESULT_SECONDS = int(os.getenv("LLM_COALESCE_RESULT_SECONDS", "10"))
+
+# Idempotency Key Configuration (/api/chat, /api/report retries)
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_WAIT_SECONDS = int(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "60"))
+# An in-progress key older than this is taken over by the next retry (its worker
+# died mid-request); keep it above the longest request (GUNICORN_TIMEOUT)
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "180"))
+
+# Password Hashing Configuration
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "16"))
+BCRYPT_QUEUE_TIMEOUT_SECONDS = int(os.getenv("BCRYPT_QUEUE_TIMEOUT_SECONDS", "10"))
+
+# Admission Control (Rate Limiting) Configuration
+# Limits are "<requests>/<seconds>". The mongo backend shares limits across
+# gunicorn workers; the memory backend is per process (development only).
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "mongo")
+# Number of reverse proxies in front of the app that append to X-Forwarded-For
+# (1 for the Nginx setup in the README). The client IP is the entry the
+# outermost trusted proxy added; anything left of it is client-controlled.
+# Must be set behind a proxy, or every client shares the proxy's IP limits.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv(
+    "RATE_LIMIT_TRUSTED_PROXIES",
+    "1" if os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true" else "0"
+))
+RATE_LIMIT_LOGIN_IP = os.getenv("RATE_LIMIT_LOGIN_IP", "20/60")
+RATE_LIMIT_LOGIN_EMAIL = os.getenv("RATE_LIMIT_LOGIN_EMAIL", "5/300")
+RATE_LIMIT_OTP_IP = os.getenv("RATE_LIMIT_OTP_IP", "10/3600")
+RATE_LIMIT_OTP_EMAIL = os.getenv("RATE_LIMIT_OTP_EMAIL", "3/600")
+RATE_LIMIT_OTP_VERIFY_EMAIL = os.getenv("RATE_LIMIT_OTP_VERIFY_EMAIL", "10/600")
+RATE_LIMIT_CHAT_TRIAL_IP = os.getenv("RATE_LIMIT_CHAT_TRIAL_IP", "10/60")
+RATE_LIMIT_CHAT_USER = os.getenv("RATE_LIMIT_CHAT_USER", "60/60")
+
+# Startup Configuration
+# Heavy dependencies (Whisper, WeasyPrint, Gemini client) load on first use.
+# WARM_UP_ON_START lists components to initialize eagerly instead, e.g.
+# "otp_indexes,genai,whisper". STARTUP_TIMING records per-module import times.
+# With gunicorn preload (gunicorn_preload.py), WARM_UP_ON_START runs once in the
+# master and WARM_UP_AFTER_FORK in every worker; anything holding sockets or
+# threads (genai, otp_indexes, whisper) belongs in WARM_UP_AFTER_FORK.
+WARM_UP_ON_START = [c.strip() for c in os.getenv("WARM_UP_ON_START", "").split(",") if c.strip()]
+WARM_UP_AFTER_FORK = [c.strip() for c in os.getenv("WARM_UP_AFTER_FORK", "").split(",") if c.strip()]
+
+# Readiness Configuration
+# Components warmed in a background thread per worker; /ready returns 503 until
+# all of them are ready. Voice deployments add "whisper" (the model is built on
+# first use otherwise); "llm" makes a one-token stub Gemini call. The preload
+# profile sets READY_WARM_UP_AT_IMPORT=false and starts it after fork instead.
+READY_COMPONENTS = [c.strip() for c in os.getenv("READY_COMPONENTS", "langdetect,mongo").split(",") if c.strip()]
+READY_WARM_UP_AT_IMPORT = os.getenv("READY_WARM_UP_AT_IMPORT", "true").lower() == "true"
+READY_RETRY_SECONDS = int(os.getenv("READY_RETRY_SECONDS", "10"))
+STARTUP_TIMING = os.getenv("STARTUP_TIMING", "false").lower() == "true"
+
+# Request Profiling Configuration
+# When enabled, a request is profiled if it carries "X-Profile: <PROFILING_ADMIN_TOKEN>"
+# or is picked by PROFILING_SAMPLE_RATE (0.0-1.0). The last PROFILING_BUFFER_SIZE
+# profiles per worker are served from /api/admin/profiles (same token, X-Admin-Token).
+# Disabled means no middleware is installed at all.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0.0"))
+PROFILING_BUFFER_SIZE = int(os.getenv("PROFILING_BUFFER_SIZE", "20"))
+PROFILING_MODE = os.getenv("PROFILING_MODE", "cprofile")  # cprofile | sampling
+PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5"))
+
+# Logging Configuration
+# Records go through a bounded queue to a background writer thread, so request
+# threads never block on stdout. LOG_FORMAT is "json" (one object per line) or
+# "text". Per-item debug output (report parsing, prompts) needs LOG_LEVEL=DEBUG.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", "10000"))
+
+# JSON Responses
+# "http" keeps Flask's datetime format (Wed, 01 Jan 2026 00:00:00 GMT);
+# "iso" (2026-01-01T00:00:00Z) is serialized natively by orjson and is faster
+JSON_DATETIME_FORMAT = os.getenv("JSON_DATETIME_FORMAT", "http").lower()
+
+# Response Compression (brotli needs `pip install brotli`, otherwise gzip only)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+# Account Export (GET /api/export streams NDJSON straight from Mongo cursors)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))
+
+# Chat Search (GET /api/chats/search)
+# Ranks the user's SEARCH_MAX_CANDIDATES most recent matching messages;
+# query terms of SEARCH_PREFIX_MIN_CHARS or more also match as word prefixes
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "300"))
+SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", "8"))
+SEARCH_PREFIX_MIN_CHARS = int(os.getenv("SEARCH_PREFIX_MIN_CHARS", "3"))
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "160"))
+
+# Request Capture Configuration
+# Records sanitized /api/chat and /api/report requests plus their LLM responses
+# (JSON lines, one file per worker, gzipped on rotation) for python -m loadtest.replay.
+CAPTURE_ENABLED = os.getenv("CAPTURE_ENABLED", "false").lower() == "true"
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "data/capture")
+CAPTURE_SAMPLE_RATE = float(os.getenv("CAPTURE_SAMPLE_RATE", "1.0"))
+CAPTURE_MAX_MB = int(os.getenv("CAPTURE_MAX_MB", "50"))
+CAPTURE_MAX_FILES = int(os.getenv("CAPTURE_MAX_FILES", "20"))
@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import date, datetime, time
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+from utils.config import JSON_DATETIME_FORMAT
+from utils.log import get_logger
+
+try:
+    import orjson
+except ImportError:  # stdlib json with the same rules
+    orjson = None
+
+logger = get_logger(__name__)
+
+# Flask JSON provider on orjson (stdlib json if orjson is not installed).
+# Mongo documents can be returned as they are:
+# ObjectId -> "65f0c1...", bytes -> base64, datetime -> HTTP date
+# ("Wed, 01 Jan 2026 00:00:00 GMT", Flask's format) or ISO 8601 with
+# JSON_DATETIME_FORMAT=iso, which orjson encodes natively and is much faster.
+# Mongo returns naive datetimes, which are UTC.
+
+_ISO = JSON_DATETIME_FORMAT == "iso"
+_OPTIONS = 0
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+    if not _ISO:
+        _OPTIONS |= orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _default(o):
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, (bytes, bytearray, memoryview)):
+        return base64.b64encode(o).decode("ascii")
+    if isinstance(o, (datetime, date)):
+        if _ISO:
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)  # HTTP date, as Flask does
+    if isinstance(o, time):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+def dumps_bytes(obj) -> bytes:
+    """Encode obj as UTF-8 JSON with the app's rules, outside of a request (e.g. in streams)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers beyond 64 bits: let the stdlib try
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify / request.get_json on orjson when available, Mongo types handled either way"""
+
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            # Callers asking for stdlib options (indent, sort_keys...) get the stdlib
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj).decode("utf-8")
+
+    def _dumps_bytes(self, obj) -> bytes:
+        return dumps_bytes(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs or orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Bytes straight into the response, no str round trip
+        return self._app.response_class(self._dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Use FastJSONProvider for the app (on the stdlib encoder if orjson is missing)"""
+    if orjson is None:
+        logger.warning("orjson not installed, encoding JSON with the standard library")
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
@@ -0,0 +1,141 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from utils.config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_MAX
+
+# Structured, non-blocking logging.
+#
+#   from utils.log import get_logger
+#   logger = get_logger(__name__)
+#   logger.info("Report generated", extra={"crop": crop_name, "chars": len(text)})
+#
+# Loggers hand records to a bounded queue; a listener thread per process
+# writes them to stdout. When the queue is full, records are dropped (and
+# counted) instead of blocking the request. Every record carries the current
+# request ID (X-Request-ID), so lines from concurrent requests and gunicorn
+# workers can be told apart.
+
+ROOT_LOGGER = "agrigpt"
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_id_var = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "request_id"}
+
+_dropped = 0
+_handler = None
+_listener = None
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def enqueue(self, record):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process,
+            "request_id": getattr(record, "request_id", None)
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _STANDARD_ATTRS})
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        extras = " ".join(f"{k}={v}" for k, v in vars(record).items() if k not in _STANDARD_ATTRS)
+        request_id = getattr(record, "request_id", None) or "-"
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name} [{request_id}] {record.getMessage()}"
+        return f"{line} {extras}" if extras else line
+
+
+def _start_listener():
+    global _listener
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    _listener = QueueListener(_handler.queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+
+
+def _after_fork_in_child():
+    # The listener thread does not survive a fork, and the queue's lock may
+    # have been held by it: give the child a fresh queue and listener
+    if _handler is not None:
+        _handler.queue = queue.Queue(maxsize=LOG_QUEUE_MAX)
+        _start_listener()
+
+
+def setup_logging():
+    """Install the queue handler on the "agrigpt" logger (idempotent)"""
+    global _handler
+    if _handler is not None:
+        return
+    _handler = _DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_MAX))
+    _handler.addFilter(_RequestIdFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(_handler)
+    root.propagate = False
+
+    _start_listener()
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records (called at exit)"""
+    if _listener is not None:
+        _listener.stop()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the "agrigpt" hierarchy (sets up logging on first use)"""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def get_dropped_count() -> int:
+    return _dropped
+
+
+def init_request_ids(app):
+    """Give every request an ID (from X-Request-ID or a new one) and echo it back"""
+    from flask import request
+
+    def _set_request_id():
+        request_id_var.set(request.headers.get(REQUEST_ID_HEADER, "")[:128] or uuid.uuid4().hex)
+
+    def _add_request_id_header(response):
+        request_id = request_id_var.get()
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+    app.before_request(_set_request_id)
+    app.after_request(_add_request_id_header)
@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+# Compare per-worker memory of the gunicorn profile with and without preload.
+#
+#   python -m utils.memory_report --workers 3
+#
+# RSS counts every resident page a process maps; PSS splits shared pages
+# between the processes sharing them, so sum(PSS) is the real footprint.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_memory(pid: int) -> dict:
+    """RSS/PSS/shared/private in MB from /proc/<pid>/smaps_rollup"""
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Shared_Clean": "shared_clean_mb",
+              "Shared_Dirty": "shared_dirty_mb", "Private_Clean": "private_clean_mb",
+              "Private_Dirty": "private_dirty_mb"}
+    result = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in fields:
+                result[fields[name]] = round(int(value.split()[0]) / 1024, 1)
+    return result
+
+
+def child_pids(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def wait_until_ready(port: int, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2):
+                return
+        except Exception:
+            time.sleep(1)
+    raise TimeoutError("gunicorn did not become ready")
+
+
+def measure(preload: bool, workers: int, port: int, settle: float, timeout: float) -> dict:
+    # Workers must build the Whisper model in both runs, whatever READY_COMPONENTS the shell has
+    env = {**os.environ, "GUNICORN_PRELOAD": str(preload).lower(),
+           "WEB_CONCURRENCY": str(workers), "GUNICORN_BIND": f"127.0.0.1:{port}",
+           "READY_COMPONENTS": "langdetect,mongo,whisper"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_preload.py", "app:app"],
+        cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port, timeout)
+        # Workers warm up (build Whisper) after they start serving
+        time.sleep(settle)
+        worker_pids = child_pids(server.pid)
+        worker_memory = [{"pid": pid, **read_memory(pid)} for pid in worker_pids]
+        master_memory = {"pid": server.pid, **read_memory(server.pid)}
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    processes = [master_memory] + worker_memory
+    return {
+        "preload": preload,
+        "master": master_memory,
+        "workers": worker_memory,
+        "avg_worker_rss_mb": round(sum(w["rss_mb"] for w in worker_memory) / max(len(worker_memory), 1), 1),
+        "avg_worker_pss_mb": round(sum(w["pss_mb"] for w in worker_memory) / max(len(worker_memory), 1), 1),
+        "total_pss_mb": round(sum(p["pss_mb"] for p in processes), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker RSS/PSS with and without gunicorn preload")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--settle", type=float, default=20.0, help="seconds to wait for worker warm-up")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    parser.add_argument("--output", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = {
+        "workers": args.workers,
+        "without_preload": measure(False, args.workers, args.port, args.settle, args.timeout),
+        "with_preload": measure(True, args.workers, args.port, args.settle, args.timeout)
+    }
+    report["total_pss_saved_mb"] = round(
+        report["without_preload"]["total_pss_mb"] - report["with_preload"]["total_pss_mb"], 1
+    )
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+
+# Startup timing: per-module import times (when the import timer is
+# installed) and named initialization steps (always recorded).
+#
+# Usage from a shell, to see what a cold worker pays for:
+#   python -m utils.startup
+
+PROCESS_START = time.perf_counter()
+
+# Modules belonging to this app (reported separately from dependencies)
+APP_MODULES = ("app", "chat", "voice", "report", "services", "routes", "utils")
+
+_imports = {}   # module name -> {"inclusive_ms", "self_ms"}
+_init_steps = {}  # step name -> {"ms", "ok", "error"}
+_local = threading.local()
+
+
+class _TimedLoader:
+    """Wraps a module loader, timing exec_module (nested imports included)"""
+
+    def __init__(self, loader, name):
+        self._loader = loader
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        frame = [self._name, 0.0]  # name, time spent in child imports
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            stack.pop()
+            if stack:
+                stack[-1][1] += elapsed
+            _imports[self._name] = {
+                "inclusive_ms": round(elapsed, 2),
+                "self_ms": round(elapsed - frame[1], 2)
+            }
+
+
+class _ImportTimer(MetaPathFinder):
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, fullname)
+                return spec
+        return None
+
+
+_timer = None
+
+
+def install_import_timer():
+    """Start timing every module imported from now on"""
+    global _timer
+    if _timer is None:
+        _timer = _ImportTimer()
+        sys.meta_path.insert(0, _timer)
+
+
+def uninstall_import_timer():
+    global _timer
+    if _timer is not None:
+        sys.meta_path.remove(_timer)
+        _timer = None
+
+
+@contextmanager
+def timed_init(name: str):
+    """Record how long an initialization step takes (and whether it failed)"""
+    start = time.perf_counter()
+    step = {"ok": True, "error": None}
+    try:
+        yield
+    except Exception as e:
+        step.update(ok=False, error=str(e))
+        raise
+    finally:
+        step["ms"] = round((time.perf_counter() - start) * 1000, 2)
+        _init_steps[name] = step
+
+
+def _is_app_module(name: str) -> bool:
+    return name.split(".")[0] in APP_MODULES
+
+
+def get_startup_report(top: int = 15) -> dict:
+    """Import and initialization times, broken down by module and package"""
+    by_package = {}
+    for name, timing in _imports.items():
+        package = by_package.setdefault(name.split(".")[0], {"self_ms": 0.0, "modules": 0})
+        package["self_ms"] += timing["self_ms"]
+        package["modules"] += 1
+
+    packages = sorted(
+        ({"package": name, "self_ms": round(p["self_ms"], 2), "modules": p["modules"]}
+         for name, p in by_package.items()),
+        key=lambda p: p["self_ms"],
+        reverse=True
+    )
+    slowest = sorted(_imports.items(), key=lambda item: item[1]["self_ms"], reverse=True)
+
+    return {
+        "import_timing_enabled": _timer is not None or bool(_imports),
+        "uptime_ms": round((time.perf_counter() - PROCESS_START) * 1000, 2),
+        "imports": {
+            "modules": len(_imports),
+            "total_ms": round(sum(t["self_ms"] for t in _imports.values()), 2),
+            "app_modules": {name: t for name, t in sorted(_imports.items()) if _is_app_module(name)},
+            "by_package": packages[:top],
+            "slowest_modules": [{"module": name, **t} for name, t in slowest[:top]]
+        },
+        "init": dict(_init_steps)
+    }
+
+
+if __name__ == "__main__":
+    import json
+
+    install_import_timer()
+    with timed_init("import_app"):
+        import app  # noqa: F401
+    uninstall_import_timer()
+
+    from services.startup_service import warm_up
+    from utils.config import WARM_UP_ON_START
+    warm_up(WARM_UP_ON_START)
+
+    print(json.dumps(get_startup_report(), indent=2, ensure_ascii=False))
@@ -0,0 +1,56 @@
+import re
+import unicodedata
+
+# Tokenizer for chat search across the 13 supported languages.
+#
+# Python's \w stops at combining marks, so "नमस्ते" would split into
+# "नमस", "त" and Tamil/Odia/Bengali words fall apart the same way at every
+# vowel sign or virama. Tokens here are runs of word characters *and*
+# combining marks (Unicode category M*), plus ZWJ/ZWNJ, which sit inside
+# Indic words. Tokens are NFC-normalized and casefolded; ZWJ/ZWNJ are then
+# dropped, since they only change how a word is rendered.
+
+# All supported scripts are in the Basic Multilingual Plane
+_MARKS = "".join(
+    chr(code) for code in range(0x300, 0x10000)
+    if unicodedata.category(chr(code)).startswith("M")
+)
+_TOKEN = re.compile(f"[\\w{_MARKS}\u200c\u200d]+")
+_JOINERS = str.maketrans("", "", "\u200c\u200d_")
+
+MIN_TOKEN_LENGTH = 2
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFC", text)
+
+
+def _clean(raw: str) -> str:
+    return raw.casefold().translate(_JOINERS)
+
+
+def tokenize(text: str) -> list:
+    """Search tokens of text in order (with repeats)"""
+    if not text:
+        return []
+    tokens = []
+    for match in _TOKEN.finditer(normalize(text)):
+        token = _clean(match.group())
+        if len(token) >= MIN_TOKEN_LENGTH:
+            tokens.append(token)
+    return tokens
+
+
+def token_spans(text: str) -> list:
+    """(token, start, end) for each token; offsets refer to normalize(text)"""
+    spans = []
+    for match in _TOKEN.finditer(text):
+        token = _clean(match.group())
+        if len(token) >= MIN_TOKEN_LENGTH:
+            spans.append((token, match.start(), match.end()))
+    return spans
+
+
+def index_terms(text: str) -> list:
+    """Distinct tokens of text, as stored in chat_history.search_terms"""
+    return sorted(set(tokenize(text)))
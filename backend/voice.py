@@ -1,19 +1,59 @@
-from faster_whisper import WhisperModel
 from pydub import AudioSegment
 import tempfile
+import threading
 import os
 
-from services.llm_service import get_ai_response
+from services.llm_service import get_ai_response, classify_prompt
 from services.db_service import save_chat
+from services.metrics_service import WHISPER_DECODE_SECONDS, WHISPER_TRANSCRIBE_SECONDS
 
 # -----------------------------
 # Whisper Model (FREE, OFFLINE)
 # -----------------------------
-whisper_model = WhisperModel(
-    model_size_or_path="tiny",
-    device="cpu",
-    compute_type="int8"
-)
+# Loaded on first use (or during warm-up), so workers that never handle
+# voice don't pay for faster-whisper/CTranslate2 at import.
+WHISPER_MODEL_SIZE = "tiny"
+_whisper_model = None
+_whisper_model_path = None
+_whisper_lock = threading.Lock()
+
+
+def preload_whisper_runtime():
+    """
+    Import faster-whisper/CTranslate2 and resolve the model files, without
+    building the model.
+
+    Meant for a preloading gunicorn master: the imported libraries are then
+    shared copy-on-write by all workers, and workers skip the model hub
+    lookup. The model itself is built per worker, because CTranslate2 starts
+    its worker threads in the constructor and threads don't survive a fork.
+    """
+    global _whisper_model_path
+    from faster_whisper.utils import download_model
+    if _whisper_model_path is None:
+        _whisper_model_path = download_model(WHISPER_MODEL_SIZE)
+    return _whisper_model_path
+
+
+def get_whisper_model():
+    global _whisper_model
+    if _whisper_model is None:
+        with _whisper_lock:
+            if _whisper_model is None:
+                from faster_whisper import WhisperModel
+                _whisper_model = WhisperModel(
+                    model_size_or_path=_whisper_model_path or WHISPER_MODEL_SIZE,
+                    device="cpu",
+                    compute_type="int8"
+                )
+    return _whisper_model
+
+
+def warm_up_transcription():
+    """Run one transcription of a second of silence (first inference is the slow one)"""
+    import numpy as np
+    segments, _ = get_whisper_model().transcribe(np.zeros(16000, dtype=np.float32))
+    list(segments)  # segments are decoded lazily
 
 # -----------------------------
 # Language-wise fallback messages
@@ -45,7 +85,7 @@ irrigation, fertilizers, pests, or weather impact on farming?
 Query:
 {text}
 """
-    result = get_ai_response(prompt).strip().upper()
+    result = get_ai_response(prompt, route="classification").strip().upper()
     return result.startswith("YES")
 
 # -----------------------------
@@ -63,12 +103,14 @@ def handle_voice(audio_file, user_id):
             audio_file.save(audio_path)
 
         # Ensure WAV format
-        audio = AudioSegment.from_file(audio_path)
-        audio.export(audio_path, format="wav")
+        with WHISPER_DECODE_SECONDS.time():
+            audio = AudioSegment.from_file(audio_path)
+            audio.export(audio_path, format="wav")
 
-        # Whisper transcription
-        segments, info = whisper_model.transcribe(audio_path)
-        user_text = " ".join(s.text for s in segments).strip()
+        # Whisper transcription (segments are decoded lazily, so time the join too)
+        with WHISPER_TRANSCRIBE_SECONDS.time():
+            segments, info = get_whisper_model().transcribe(audio_path)
+            user_text = " ".join(s.text for s in segments).strip()
 
         language_code = info.language or "en"
 
@@ -85,7 +127,7 @@ def handle_voice(audio_file, user_id):
         else:
             # Agriculture query → AI response
             ai_prompt = f"Respond ONLY in the same language.\n\n{user_text}"
-            response = get_ai_response(ai_prompt)
+            response = get_ai_response(ai_prompt, route=classify_prompt(user_text))
             response_type = "ai"
 
         # Save to MongoDB (voice input)